@@ -0,0 +1,149 @@
+""" Batch module, runs client operations from a JSONL or YAML script without menus. """
+import asyncio
+import json
+import sys
+
+from solution.models.async_azure_client import AsyncAzureClient
+from solution.models.data_classes.data_classes import Success, Error
+
+# operations a script may call, every one is a method of AsyncAzureClient
+OPERATIONS = ["create_project", "list_projects", "delete_project", "delete_projects", "get_project",
+              "create_work_item", "list_work_items", "update_work_item", "delete_work_item",
+              "get_work_item", "get_work_items_by_titles", "clone_project_work_items",
+              "org_stats"]
+
+# how many operations may be read ahead of the ones running, per unit of concurrency
+READ_AHEAD = 10
+
+END = object()
+
+
+def read_operations(path: str):
+    """ Yield operations one by one from a JSONL file, a YAML file or stdin when path is '-'. """
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("PyYAML is needed to run YAML scripts, install it or use JSONL.")
+
+        with open(path, encoding="utf-8") as script:
+            yield from yaml.safe_load(script) or []
+        return
+
+    script = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line_number, line in enumerate(script, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                yield {"id": f"line {line_number}", "error": f"Line {line_number} is not valid JSON."}
+    finally:
+        if script is not sys.stdin:
+            script.close()
+
+
+def result_line(operation_id, operation_name, result):
+    return json.dumps({
+        "id": operation_id,
+        "op": operation_name,
+        "ok": isinstance(result, Success),
+        "status_code": result.status_code,
+        "message": result.message,
+        "response": result.response if isinstance(result, Success) else None,
+    }, default=str)
+
+
+class BatchRunner:
+    """ Run operations through one async client, at most concurrency of them at a time.
+
+    Each operation is {"id": ..., "op": ..., "args": {...} or [...], "depends_on": [...]},
+    an operation starts only after the operations it depends on succeeded.
+    """
+
+    def __init__(self, client: AsyncAzureClient, concurrency: int = 10, output=sys.stdout) -> None:
+        if not isinstance(concurrency, int) or concurrency < 1:
+            raise ValueError("Concurrency must be positive integer.")
+
+        self.client = client
+        self.concurrency = concurrency
+        self.output = output
+        self.results = {}
+        # position of every operation id in the script, a dependency must have a lower one
+        self.numbers = {}
+        self.counts = {"ok": 0, "failed": 0}
+
+    async def run(self, operations):
+        running = asyncio.Semaphore(self.concurrency)
+        read_ahead = asyncio.Semaphore(self.concurrency * READ_AHEAD)
+        tasks = []
+        operations = iter(operations)
+        loop = asyncio.get_running_loop()
+        number = 0
+
+        # read in a worker thread so a slow stdin does not stop the operations already running
+        while (operation := await loop.run_in_executor(None, next, operations, END)) is not END:
+            number += 1
+            await read_ahead.acquire()
+
+            operation_id = str(operation.get("id", number)) if isinstance(operation, dict) else str(number)
+            result = loop.create_future()
+            if operation_id in self.results:
+                operation = {"op": operation.get("op"), "error": f"Operation id '{operation_id}' is used twice."}
+            else:
+                self.results[operation_id] = result
+                self.numbers[operation_id] = number
+
+            task = asyncio.create_task(self._run_operation(operation_id, number, operation, result, running))
+            task.add_done_callback(lambda _: read_ahead.release())
+            tasks.append(task)
+
+        await asyncio.gather(*tasks)
+        return self.counts
+
+    async def _run_operation(self, operation_id, number, operation, result_future, running):
+        operation_name = operation.get("op") if isinstance(operation, dict) else None
+        try:
+            result = await self._execute(operation_id, number, operation, running)
+        except Exception as exception:
+            result = Error(message=f"{type(exception).__name__}: {exception}")
+
+        result_future.set_result(result)
+        self.counts["ok" if isinstance(result, Success) else "failed"] += 1
+
+        print(result_line(operation_id, operation_name, result), file=self.output, flush=True)
+
+    async def _execute(self, operation_id, number, operation, running):
+        if isinstance(operation, dict) and "error" in operation:
+            return Error(message=operation["error"])
+        if not isinstance(operation, dict) or operation.get("op") not in OPERATIONS:
+            return Error(message=f"Unknown operation in '{operation_id}'.")
+
+        dependencies = operation.get("depends_on", [])
+        if not isinstance(dependencies, list):
+            return Error(message=f"Dependencies of '{operation_id}' must be a list of ids.")
+
+        for dependency in dependencies:
+            dependency = str(dependency)
+            # an operation read later may already be known here, waiting for it could wait forever
+            if self.numbers.get(dependency, number) >= number:
+                return Error(message=f"Dependency '{dependency}' must be an earlier operation.")
+            if not isinstance(await self.results[dependency], Success):
+                return Error(message=f"Dependency '{dependency}' failed.")
+
+        method = getattr(self.client, operation["op"])
+        arguments = operation.get("args", {})
+
+        async with running:
+            if isinstance(arguments, dict):
+                return await method(**arguments)
+            return await method(*arguments)
+
+
+async def run_batch(path: str, concurrency: int = 10, settings: dict = None):
+    client = AsyncAzureClient(settings)
+    try:
+        return await BatchRunner(client, concurrency).run(read_operations(path))
+    finally:
+        await client.close()
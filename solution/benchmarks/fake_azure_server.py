@@ -0,0 +1,247 @@
+""" Local stand-in for the Azure DevOps REST API, enough of it for the clients to run against without a network.
+
+Projects and work items live in memory, every request waits latency seconds first to look like a remote server.
+"""
+import itertools
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit, parse_qs
+
+PROJECT_PATTERN = re.compile(r"\[System\.TeamProject\] = '((?:[^']|'')*)'")
+TITLE_PATTERN = re.compile(r"System\.Title\]? = '((?:[^']|'')*)'")
+TITLES_PATTERN = re.compile(r"\[System\.Title\] IN \((.*)\)")
+LITERAL_PATTERN = re.compile(r"'((?:[^']|'')*)'")
+TAG_PATTERN = re.compile(r"\[System\.Tags\] CONTAINS '((?:[^']|'')*)'")
+
+# projects per page of a listing when $top is not given, the next page is asked with the continuation token
+PROJECTS_PAGE_SIZE = 100
+
+
+def unescape(literal: str):
+    return literal.replace("''", "'")
+
+
+class FakeAzureState:
+    """ Projects and work items of the fake organization, shared by all request threads. """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.projects = {}
+        self.work_items = {}
+        # ids of the operations that end failed instead of succeeded
+        self.failed_operations = set()
+        # creations that store the work item but answer with a server error, like a gateway that gave up on them
+        self.lost_creations = 0
+        self._ids = itertools.count(1)
+
+    def add_project(self, name: str):
+        with self.lock:
+            project = {"id": str(uuid.uuid4()), "name": name, "url": f"projects/{name}"}
+            self.projects[name.casefold()] = project
+            return project
+
+    def add_work_item(self, project_name: str, work_item_type: str, title: str, fields: dict = None):
+        with self.lock:
+            work_item_id = next(self._ids)
+            self.work_items[work_item_id] = {
+                "id": work_item_id, "rev": 1,
+                "fields": {**(fields or {}), "System.TeamProject": self.projects[project_name.casefold()]["name"],
+                           "System.WorkItemType": work_item_type, "System.Title": title, "System.State": "New"}}
+            return self.work_items[work_item_id]
+
+    def find_project(self, key: str):
+        """ Project by name or id. """
+        with self.lock:
+            for project in self.projects.values():
+                if project["name"].casefold() == key.casefold() or project["id"] == key:
+                    return project
+        return None
+
+    def query(self, wiql: str, project_name: str = None):
+        """ Ids of the work items that match the project, title and tag conditions of a WIQL query, project_name
+        stands for @project. """
+        project_match = PROJECT_PATTERN.search(wiql)
+        if project_match is not None:
+            project_name = unescape(project_match.group(1))
+        elif "@project" not in wiql:
+            project_name = None
+        titles_match = TITLES_PATTERN.search(wiql)
+        tags = [unescape(tag).casefold() for tag in TAG_PATTERN.findall(wiql)]
+        title_match = TITLE_PATTERN.search(wiql)
+
+        titles = None
+        if titles_match:
+            titles = {unescape(title).casefold() for title in LITERAL_PATTERN.findall(titles_match.group(1))}
+        elif title_match:
+            titles = {unescape(title_match.group(1)).casefold()}
+
+        with self.lock:
+            return [work_item_id for work_item_id, work_item in sorted(self.work_items.items())
+                    if (project_name is None or work_item["fields"]["System.TeamProject"].casefold()
+                        == project_name.casefold())
+                    and (titles is None or work_item["fields"]["System.Title"].casefold() in titles)
+                    and (not tags or any(tag in work_item["fields"].get("System.Tags", "").casefold()
+                                         for tag in tags))]
+
+    @staticmethod
+    def projected(work_item: dict, fields: list = None):
+        if not fields:
+            return work_item
+        return {**work_item, "fields": {field: value for field, value in work_item["fields"].items()
+                                        if field in fields}}
+
+
+class FakeAzureHandler(BaseHTTPRequestHandler):
+    """ Answers the endpoints in AzureClient.END_POINTS the way Azure DevOps does. """
+
+    protocol_version = "HTTP/1.1"
+    # answers are written in several small pieces, which would otherwise wait for the client's delayed ack
+    disable_nagle_algorithm = True
+    server: "FakeAzureServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def _handle(self, method: str):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        # first part of the path is the organization
+        parts = [unquote(part) for part in url.path.strip("/").split("/")][1:]
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length)) if length else None
+
+        self.answer_headers = {}
+        status_code, answer = self._route(method, parts, query, body)
+        content = json.dumps(answer).encode("utf-8")
+
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        for name, value in self.answer_headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _route(self, method: str, parts: list, query: dict, body):
+        state = self.server.state
+
+        if parts[:2] == ["_apis", "projects"]:
+            return self._projects(method, parts[2:], query, body)
+        if parts[:2] == ["_apis", "operations"]:
+            return 200, {"id": parts[2], "status": "failed" if parts[2] in state.failed_operations else "succeeded"}
+
+        if len(parts) < 4 or parts[1:3] != ["_apis", "wit"] or state.find_project(parts[0]) is None:
+            return 404, {"message": "Not found."}
+        project = state.find_project(parts[0])
+
+        if parts[3] == "wiql":
+            work_item_ids = state.query(body["query"], project["name"])
+            return 200, {"workItems": [{"id": work_item_id} for work_item_id in work_item_ids]}
+        if parts[3] == "workitemsbatch":
+            with state.lock:
+                return 200, {"count": len(body["ids"]),
+                             "value": [state.projected(state.work_items[work_item_id], body.get("fields"))
+                                       for work_item_id in body["ids"] if work_item_id in state.work_items]}
+        if parts[3] == "workitems" and len(parts) == 5 and parts[4].startswith("$"):
+            fields = {operation["path"][len("/fields/"):]: operation["value"] for operation in body}
+            work_item = state.add_work_item(project["name"], parts[4][1:], fields.pop("System.Title"), fields)
+            with state.lock:
+                if state.lost_creations:
+                    state.lost_creations -= 1
+                    return 500, {"message": "The gateway did not receive a response in time."}
+            return 200, work_item
+        if parts[3] == "workitems" and len(parts) == 5:
+            return self._work_item(method, int(parts[4]), query, body)
+
+        return 404, {"message": "Not found."}
+
+    def _projects(self, method: str, parts: list, query: dict, body):
+        state = self.server.state
+
+        if not parts:
+            if method == "GET":
+                start = int(query.get("continuationToken", 0))
+                end = start + int(query.get("$top", PROJECTS_PAGE_SIZE))
+                with state.lock:
+                    projects = list(state.projects.values())
+                if end < len(projects):
+                    self.answer_headers["x-ms-continuationtoken"] = str(end)
+                return 200, {"count": len(projects[start:end]), "value": projects[start:end]}
+            if state.find_project(body["name"]) is not None:
+                return 400, {"message": "Project already exists."}
+            project = state.add_project(body["name"])
+            return 202, {"id": project["id"], "status": "queued", "url": f"operations/{project['id']}"}
+
+        project = state.find_project(parts[0])
+        if project is None:
+            return 404, {"message": "Project not found."}
+        if method == "DELETE":
+            with state.lock:
+                state.projects.pop(project["name"].casefold(), None)
+            return 202, {"id": project["id"], "status": "queued", "url": f"operations/{project['id']}"}
+        return 200, project
+
+    def _work_item(self, method: str, work_item_id: int, query: dict, body):
+        state = self.server.state
+
+        with state.lock:
+            work_item = state.work_items.get(work_item_id)
+            if work_item is None:
+                return 404, {"message": f"Work item {work_item_id} does not exist."}
+
+            if method == "DELETE":
+                del state.work_items[work_item_id]
+                return 200, {"id": work_item_id}
+            if method == "PATCH":
+                for operation in body:
+                    if operation["op"] in ("add", "replace"):
+                        work_item["fields"][operation["path"].split("/")[-1]] = operation["value"]
+                work_item["rev"] += 1
+
+            fields = query.get("fields")
+            return 200, state.projected(work_item, fields.split(",") if fields else None)
+
+
+class FakeAzureServer(ThreadingHTTPServer):
+    """ Fake organization served on a free local port from a background thread. """
+
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.0) -> None:
+        super().__init__(("127.0.0.1", 0), FakeAzureHandler)
+        self.latency = latency
+        self.state = FakeAzureState()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """ Value for the base_url client setting. """
+        return f"http://127.0.0.1:{self.server_address[1]}/fake-organization/"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-azure-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,40 @@
+""" Cold start benchmark, compares importing the CLI with importing every client up front.
+
+Run from the repository root: python -m solution.benchmarks.import_time_benchmark
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RUNS = 15
+
+# what main.py used to import before showing the first menu
+EAGER_IMPORTS = ("import asyncio, solution.telegram_bot, solution.models.sync_azure_client, "
+                 "solution.models.async_azure_client")
+LAZY_IMPORTS = "import solution.main"
+
+
+def cold_start_time(statement: str):
+    """ Median wall time in milliseconds of a fresh interpreter running statement. """
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    times = []
+
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], cwd=root, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(times)
+
+
+if __name__ == "__main__":
+    baseline = cold_start_time("pass")
+    eager = cold_start_time(EAGER_IMPORTS)
+    lazy = cold_start_time(LAZY_IMPORTS)
+
+    print(f"interpreter only   : {baseline:8.1f} ms")
+    print(f"all clients eagerly: {eager:8.1f} ms")
+    print(f"main.py (lazy)     : {lazy:8.1f} ms")
+    print(f"saved on cold start: {eager - lazy:8.1f} ms")
@@ -0,0 +1,239 @@
+""" Load test, virtual users sharing one client against the local fake Azure DevOps server.
+
+Every user loops over operations picked at random from the mix until the duration is over, and each
+concurrency level reports throughput, latency percentiles, error rate and how saturated the connection pool was.
+
+Run from the repository root: python -m solution.benchmarks.load_benchmark --users 1,10,50 --duration 5
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+import uuid
+
+from solution.benchmarks.fake_azure_server import FakeAzureServer
+from solution.models.async_azure_client import AsyncAzureClient
+from solution.models.data_classes.data_classes import Error
+from solution.models.sync_azure_client import SyncAzureClient
+
+PROJECT_NAME = "load-test"
+SEED_WORK_ITEMS = 500
+DEFAULT_MIX = "get_work_item=4,get_project=2,create_work_item=2,list_work_items=1,list_projects=1"
+
+# how often the connection pool is looked at while users run
+SAMPLE_INTERVAL = 0.01
+
+
+def parse_mix(text: str):
+    """ Weight of every operation, from 'operation=weight,...'. """
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{name}', use one of {', '.join(OPERATIONS)}.")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def seed_work_item_title(rng: random.Random):
+    return f"item {rng.randrange(SEED_WORK_ITEMS)}"
+
+
+# arguments of every operation a user may run
+OPERATIONS = {
+    "list_projects": lambda rng: (),
+    "get_project": lambda rng: (PROJECT_NAME,),
+    "list_work_items": lambda rng: (PROJECT_NAME,),
+    "get_work_item": lambda rng: (PROJECT_NAME, seed_work_item_title(rng)),
+    "get_work_items_by_titles": lambda rng: (PROJECT_NAME, [seed_work_item_title(rng) for _ in range(5)]),
+    "create_work_item": lambda rng: (PROJECT_NAME, "Task", f"load {uuid.uuid4()}"),
+}
+
+
+def start_server(latency: float):
+    server = FakeAzureServer(latency).start()
+    server.state.add_project(PROJECT_NAME)
+    for number in range(SEED_WORK_ITEMS):
+        server.state.add_work_item(PROJECT_NAME, "Task", f"item {number}")
+    return server
+
+
+def client_settings(server: FakeAzureServer, max_workers: int):
+    return {"token": "load-test", "organization": "fake-organization", "base_url": server.base_url,
+            "max_workers": max_workers}
+
+
+def pool_usage(client):
+    """ Connections busy and requests waiting for one in the client's httpx pool, None when it can not be seen.
+
+    httpx has no public view of its pool, this reads the private attributes of httpx and httpcore (0.24 and
+    0.17 here), so a version that renames them gives None instead of failing the run.
+    """
+    pool = getattr(getattr(client.client, "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None)
+    requests = getattr(pool, "_requests", None)
+    if connections is None or requests is None:
+        return None
+
+    try:
+        busy = sum(1 for connection in connections if not connection.is_idle())
+        waiting = sum(1 for status in requests if status.connection is None)
+    except AttributeError:
+        return None
+    return busy, waiting
+
+
+class LevelRecorder:
+    """ Latencies, errors and pool samples of one concurrency level. """
+
+    def __init__(self) -> None:
+        self.latencies = []
+        self.errors = 0
+        self.pool_samples = []
+
+    def record(self, started: float, result):
+        self.latencies.append(time.perf_counter() - started)
+        if isinstance(result, (Error, Exception)):
+            self.errors += 1
+
+    def sample_pool(self, client):
+        usage = pool_usage(client)
+        if usage is not None:
+            self.pool_samples.append(usage)
+
+    def summary(self, client_name: str, users: int, elapsed: float, max_workers: int):
+        latencies = sorted(self.latencies)
+        operations = len(latencies)
+        busy = [sample[0] for sample in self.pool_samples] or [0]
+        waiting = [sample[1] for sample in self.pool_samples] or [0]
+
+        return {
+            "client": client_name,
+            "users": users,
+            "operations": operations,
+            "ops_per_second": operations / elapsed if elapsed > 0 else 0.0,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "error_rate": self.errors / operations if operations else 0.0,
+            "pool_busy": sum(busy) / len(busy) / max_workers,
+            "pool_waiting_max": max(waiting),
+        }
+
+
+def percentile(sorted_values: list, percent: float):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))]
+
+
+def pick_operation(rng: random.Random, mix: dict):
+    name = rng.choices(list(mix), weights=list(mix.values()))[0]
+    return name, OPERATIONS[name](rng)
+
+
+def run_sync_level(server: FakeAzureServer, users: int, duration: float, mix: dict, max_workers: int):
+    client = SyncAzureClient(client_settings(server, max_workers))
+    recorder = LevelRecorder()
+    stop_at = time.monotonic() + duration
+
+    def user(number: int):
+        rng = random.Random(number)
+        while time.monotonic() < stop_at:
+            name, arguments = pick_operation(rng, mix)
+            started = time.perf_counter()
+            try:
+                result = getattr(client, name)(*arguments)
+            except Exception as exception:
+                result = exception
+            recorder.record(started, result)
+
+    def sampler():
+        while time.monotonic() < stop_at:
+            recorder.sample_pool(client)
+            time.sleep(SAMPLE_INTERVAL)
+
+    threads = [threading.Thread(target=user, args=(number,)) for number in range(users)]
+    threads.append(threading.Thread(target=sampler))
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    client.close()
+    return recorder.summary("sync", users, elapsed, max_workers)
+
+
+async def run_async_level(server: FakeAzureServer, users: int, duration: float, mix: dict, max_workers: int):
+    client = AsyncAzureClient(client_settings(server, max_workers))
+    recorder = LevelRecorder()
+    stop_at = time.monotonic() + duration
+
+    async def user(number: int):
+        rng = random.Random(number)
+        while time.monotonic() < stop_at:
+            name, arguments = pick_operation(rng, mix)
+            started = time.perf_counter()
+            try:
+                result = await getattr(client, name)(*arguments)
+            except Exception as exception:
+                result = exception
+            recorder.record(started, result)
+
+    async def sampler():
+        while time.monotonic() < stop_at:
+            recorder.sample_pool(client)
+            await asyncio.sleep(SAMPLE_INTERVAL)
+
+    started = time.monotonic()
+    await asyncio.gather(sampler(), *(user(number) for number in range(users)))
+    elapsed = time.monotonic() - started
+
+    await client.close()
+    return recorder.summary("async", users, elapsed, max_workers)
+
+
+def print_report(rows: list):
+    print(f"{'client':<7}{'users':>6}{'ops':>8}{'ops/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'errors':>8}{'pool busy':>11}{'waiting':>9}")
+    for row in rows:
+        print(f"{row['client']:<7}{row['users']:>6}{row['operations']:>8}{row['ops_per_second']:>9.1f}"
+              f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['error_rate']:>8.1%}"
+              f"{row['pool_busy']:>11.0%}{row['pool_waiting_max']:>9}")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Load test the clients against a local fake Azure DevOps.")
+    parser.add_argument("--client", choices=["sync", "async", "both"], default="both")
+    parser.add_argument("--users", default="1,10,50",
+                        help="comma separated numbers of concurrent users, one run per number (default 1,10,50)")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds every run lasts (default 5)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"operation weights (default {DEFAULT_MIX})")
+    parser.add_argument("--latency", type=float, default=0.02,
+                        help="seconds the fake server waits before answering (default 0.02)")
+    parser.add_argument("--max-workers", type=int, default=20, help="client max_workers setting (default 20)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    mix = parse_mix(arguments.mix)
+    levels = [int(users) for users in arguments.users.split(",")]
+
+    fake_server = start_server(arguments.latency)
+    report = []
+    try:
+        for level in levels:
+            if arguments.client in ("sync", "both"):
+                report.append(run_sync_level(fake_server, level, arguments.duration, mix, arguments.max_workers))
+            if arguments.client in ("async", "both"):
+                report.append(asyncio.run(run_async_level(fake_server, level, arguments.duration, mix,
+                                                          arguments.max_workers)))
+    finally:
+        fake_server.stop()
+
+    print_report(report)
@@ -0,0 +1,118 @@
+""" Replay benchmark, the same recorded traffic run against a client again and again to time its CPU side.
+
+Record a cassette once, against the local fake server or against Azure DevOps with the settings.init credentials:
+    python -m solution.benchmarks.replay_benchmark record traffic.jsonl
+    python -m solution.benchmarks.replay_benchmark record traffic.jsonl --live --project salaht321 --title "Task 1"
+then replay it on every commit to compare, with zero latency only the client's own work is timed:
+    python -m solution.benchmarks.replay_benchmark replay traffic.jsonl --runs 20
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from solution.benchmarks.load_benchmark import PROJECT_NAME, seed_work_item_title, start_server
+from solution.models.async_azure_client import AsyncAzureClient
+from solution.models.sync_azure_client import SyncAzureClient
+
+SCENARIO_LENGTH = 50
+SCENARIO_SEED = 0
+
+
+def scenario(project_name: str, title=None):
+    """ Read operations run in this order by every record and replay, so replays ask for what was recorded. """
+    rng = random.Random(SCENARIO_SEED)
+    operations = [("list_projects", ()), ("get_project", (project_name,)), ("list_work_items", (project_name,))]
+    while len(operations) < SCENARIO_LENGTH:
+        work_item_title = title or seed_work_item_title(rng)
+        operations.append(rng.choice([("get_work_item", (project_name, work_item_title)),
+                                      ("get_project", (project_name,)),
+                                      ("list_work_items", (project_name,))]))
+    return operations
+
+
+def run_sync(settings: dict, operations: list):
+    client = SyncAzureClient(settings)
+    try:
+        for name, arguments in operations:
+            getattr(client, name)(*arguments)
+    finally:
+        client.close()
+
+
+async def run_async(settings: dict, operations: list):
+    client = AsyncAzureClient(settings)
+    try:
+        for name, arguments in operations:
+            await getattr(client, name)(*arguments)
+    finally:
+        await client.close()
+
+
+def run(client_name: str, settings: dict, operations: list):
+    if client_name == "sync":
+        run_sync(settings, operations)
+    else:
+        asyncio.run(run_async(settings, operations))
+
+
+def record(arguments):
+    project_name = arguments.project or PROJECT_NAME
+    settings = {"record_cassette": arguments.cassette}
+
+    server = None
+    if not arguments.live:
+        server = start_server(arguments.latency)
+        settings.update(token="replay-benchmark", organization="fake-organization", base_url=server.base_url)
+
+    try:
+        run(arguments.client, settings, scenario(project_name, arguments.title))
+    finally:
+        if server is not None:
+            server.stop()
+    print(f"recorded {SCENARIO_LENGTH} operations to {arguments.cassette}")
+
+
+def replay(arguments):
+    # replays never reach the network, the credentials only have to pass validation
+    settings = {"token": "replay-benchmark", "organization": arguments.organization,
+                "replay_cassette": arguments.cassette, "replay_timing": arguments.timing}
+    operations = scenario(arguments.project or PROJECT_NAME, arguments.title)
+
+    wall_times, cpu_times = [], []
+    for _ in range(arguments.runs):
+        wall_started, cpu_started = time.perf_counter(), time.process_time()
+        run(arguments.client, settings, operations)
+        wall_times.append(time.perf_counter() - wall_started)
+        cpu_times.append(time.process_time() - cpu_started)
+
+    print(f"{arguments.client} client, {arguments.runs} runs of {len(operations)} operations, timing {arguments.timing}")
+    print(f"wall ms: median {statistics.median(wall_times) * 1000:.1f}  min {min(wall_times) * 1000:.1f}")
+    print(f"cpu ms:  median {statistics.median(cpu_times) * 1000:.1f}  min {min(cpu_times) * 1000:.1f}")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Record client traffic once and replay it to time the client.")
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("cassette", help="cassette file written by record and read by replay")
+    parser.add_argument("--client", choices=["sync", "async"], default="sync")
+    parser.add_argument("--project", help=f"project the scenario reads (default {PROJECT_NAME})")
+    parser.add_argument("--title", help="title of the work item every get_work_item reads (default seeded titles)")
+    parser.add_argument("--live", action="store_true", help="record against Azure DevOps instead of the fake server")
+    parser.add_argument("--latency", type=float, default=0.02,
+                        help="seconds the fake server waits before answering while recording (default 0.02)")
+    parser.add_argument("--organization", default="fake-organization",
+                        help="organization the cassette was recorded with (default fake-organization)")
+    parser.add_argument("--timing", choices=["original", "none"], default="none",
+                        help="replay with the recorded latency or with none (default none)")
+    parser.add_argument("--runs", type=int, default=10, help="times the scenario is replayed (default 10)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    parsed_arguments = parse_arguments()
+    if parsed_arguments.mode == "record":
+        record(parsed_arguments)
+    else:
+        replay(parsed_arguments)
@@ -0,0 +1,13 @@
+""" Settings module, settings.init is read once per process and shared by clients and bots. """
+import functools
+import os
+from configparser import ConfigParser
+
+SETTINGS_PATH = os.path.join(os.path.dirname(__file__), "settings.init")
+
+
+@functools.lru_cache(maxsize=None)
+def load_config() -> ConfigParser:
+    config = ConfigParser()
+    config.read(SETTINGS_PATH)
+    return config
@@ -0,0 +1,169 @@
+""" Export module, streams work items of a project or a whole organization to NDJSON or CSV. """
+import csv
+import io
+import json
+import sys
+import time
+
+from solution.models.abstract_azure_client import AzureClient
+from solution.models.data_classes.data_classes import Success, Error
+from solution.models.scheduler import BULK, priority_scope
+
+FORMATS = ["ndjson", "csv"]
+
+# rows serialised in memory before they are written to the file in one call
+WRITE_CHUNK_ROWS = 1000
+
+# columns of every csv row, each extra field asked for gets its own column after them
+CSV_COLUMNS = ["project", "id", "type", "title"]
+
+
+def export_format_of(path: str):
+    """ Format picked by the file extension, NDJSON unless the file ends with .csv. """
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+class WorkItemExporter:
+    """ Write work items to output while the client streams them, never holding more than one chunk of rows.
+
+    The client fetches the batches of a project concurrently, the rows are serialised into a buffer
+    and written every WRITE_CHUNK_ROWS rows, and progress with rows per second goes to progress.
+    Its requests are sent at bulk priority, so calls of other users of the client go first.
+    """
+
+    def __init__(self, client, output, export_format: str = "ndjson", fields: list = None,
+                 progress=sys.stderr) -> None:
+        if export_format not in FORMATS:
+            raise ValueError(f"Export format must be one of {', '.join(FORMATS)}.")
+        if fields is not None and (not isinstance(fields, list) or not all(isinstance(f, str) for f in fields)):
+            raise TypeError("Fields must be list of strings.")
+
+        self.client = client
+        self.output = output
+        self.export_format = export_format
+        self.fields = fields
+        self.progress = progress
+
+        self.extra_fields = [field for field in fields or [] if field not in AzureClient.LIST_FIELDS]
+        self.rows = 0
+        self._buffered_rows = 0
+        self._buffer = io.StringIO()
+        self._csv_writer = csv.writer(self._buffer, lineterminator="\n")
+        self._started = None
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = time.monotonic() - self._started if self._started is not None else 0
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def export_project(self, project_name: str):
+        """ Export every work item of one project. """
+
+        if not isinstance(project_name, str):
+            raise TypeError("Project name must be string.")
+
+        self._start()
+        error = self._export_project(project_name)
+        self._flush()
+
+        if error is not None:
+            return error
+        return self._summary([project_name], [])
+
+    def export_organization(self):
+        """ Export the work items of every project, a project that fails is reported and skipped. """
+
+        projects = self.client.list_projects(priority=BULK)
+        if isinstance(projects, Error):
+            return projects
+
+        # listed projects are numbered, an empty organization answers with a message instead
+        project_names = [name for number, name in projects.response.items() if isinstance(number, int)]
+
+        self._start()
+        errors = []
+        for project_name in project_names:
+            error = self._export_project(project_name)
+            if error is not None:
+                errors.append({"project": project_name, "message": error.message})
+        self._flush()
+
+        return self._summary(project_names, errors)
+
+    def _start(self):
+        if self._started is not None:
+            return
+
+        self._started = time.monotonic()
+        if self.export_format == "csv":
+            self._csv_writer.writerow(CSV_COLUMNS + self.extra_fields)
+
+    def _export_project(self, project_name: str):
+        # batches are requested while the stream is read, so the reading runs at bulk priority too
+        with priority_scope(BULK):
+            stream = self.client.iter_work_items(project_name, self.fields)
+            if isinstance(stream, Error):
+                return stream
+
+            try:
+                for work_item in stream:
+                    self._write_row(project_name, work_item)
+            finally:
+                stream.close()
+
+        return stream.error
+
+    def _write_row(self, project_name: str, work_item: dict):
+        if self.export_format == "csv":
+            self._csv_writer.writerow(self.csv_row(project_name, work_item))
+        else:
+            self._buffer.write(json.dumps({"project": project_name, **work_item}, default=str))
+            self._buffer.write("\n")
+
+        self.rows += 1
+        self._buffered_rows += 1
+        if self._buffered_rows >= WRITE_CHUNK_ROWS:
+            self._flush()
+            print(f"{self.rows} work items exported, {self.rows_per_second:.0f} rows/s", file=self.progress)
+
+    def csv_row(self, project_name: str, work_item: dict):
+        extra_values = []
+        for field in self.extra_fields:
+            if field in AzureClient.SUMMARY_FIELDS:
+                value = work_item.get(AzureClient.SUMMARY_FIELDS[field])
+            else:
+                value = work_item.get("fields", {}).get(field)
+            extra_values.append(json.dumps(value) if isinstance(value, (dict, list)) else value)
+
+        return [project_name, work_item["id"], work_item.get("type"), work_item.get("title"), *extra_values]
+
+    def _flush(self):
+        if self._buffer.tell():
+            self.output.write(self._buffer.getvalue())
+            self.output.flush()
+            self._buffer.seek(0)
+            self._buffer.truncate()
+        self._buffered_rows = 0
+
+    def _summary(self, project_names: list, errors: list):
+        return Success(message=f"{self.rows} work items of {len(project_names)} projects exported, "
+                               f"{self.rows_per_second:.0f} rows/s.",
+                       response={"rows": self.rows, "projects": len(project_names),
+                                 "rows_per_second": self.rows_per_second, "errors": errors},
+                       status_code=AzureClient.OK_STATUS_CODE)
+
+
+def run_export(path: str, project_name: str = None, export_format: str = None, fields: list = None,
+               settings: dict = None):
+    """ Export project, or the whole organization when project_name is None, to the file at path. """
+    from solution.models.sync_azure_client import SyncAzureClient
+
+    client = SyncAzureClient(settings)
+    try:
+        with open(path, "w", encoding="utf-8", newline="") as output:
+            exporter = WorkItemExporter(client, output, export_format or export_format_of(path), fields)
+            if project_name is None:
+                return exporter.export_organization()
+            return exporter.export_project(project_name)
+    finally:
+        client.close()
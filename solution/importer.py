@@ -0,0 +1,285 @@
+""" Import module, creates work items from a CSV or NDJSON file through a bounded pipeline that can resume. """
+import asyncio
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+from httpx import TransportError
+
+from solution.exporter import export_format_of
+from solution.models.async_azure_client import AsyncAzureClient
+from solution.models.data_classes.data_classes import Success, Error
+from solution.models.scheduler import BULK
+
+# rows read ahead of the ones being created, per unit of concurrency
+QUEUE_SIZE = 10
+
+# a row is tried again this many times when Azure is busy or failing, waiting longer every time
+IMPORT_RETRIES = 3
+RETRY_DELAY = 1.0
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# the checkpoint is written after this many rows are done, and once more at the end
+CHECKPOINT_EVERY = 100
+
+END = object()
+
+
+def read_rows(path: str):
+    """ Yield (row number, row) from a CSV file with a header, or from an NDJSON file. """
+    with open(path, encoding="utf-8", newline="") as source:
+        if export_format_of(path) == "csv":
+            yield from enumerate(csv.DictReader(source), start=1)
+            return
+
+        row_number = 0
+        for line in source:
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                yield row_number, json.loads(line)
+            except json.JSONDecodeError:
+                yield row_number, None
+
+
+def validate_row(row):
+    """ Arguments of create_work_item for row, or Error explaining what is missing. """
+    if not isinstance(row, dict):
+        return Error(message="Row is not valid JSON object.")
+
+    values = [row.get(column) for column in ("project", "type", "title")]
+    if not all(isinstance(value, str) and value.strip() for value in values):
+        return Error(message="Row needs non empty project, type and title.")
+
+    return [value.strip() for value in values]
+
+
+class Checkpoint:
+    """ Rows done so far, everything up to done_through plus the rows finished out of order after it.
+
+    run_id names the import in the idempotency keys of its work items, and started_through is saved before
+    a row after it is handed to a worker, so an interrupted run started no row after it.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.done_through = 0
+        self.done_after = set()
+        self.run_id = uuid.uuid4().hex
+        self.started_through = 0
+
+        try:
+            with open(path, encoding="utf-8") as checkpoint_file:
+                state = json.load(checkpoint_file)
+            self.done_through = state["done_through"]
+            self.done_after = set(state["done_after"])
+            # checkpoints written before idempotency keys have neither
+            self.run_id = state.get("run_id", self.run_id)
+            self.started_through = state.get("started_through", 0)
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, TypeError) as error:
+            raise ValueError(f"Checkpoint file '{path}' is not valid ({type(error).__name__}: {error}), "
+                             f"remove it to import from the first row.") from error
+
+    def is_done(self, row_number: int):
+        return row_number <= self.done_through or row_number in self.done_after
+
+    def mark_done(self, row_number: int):
+        self.done_after.add(row_number)
+        while self.done_through + 1 in self.done_after:
+            self.done_through += 1
+            self.done_after.remove(self.done_through)
+
+    def save(self):
+        """ Replace the checkpoint file at once, so an interrupted save leaves the previous one. """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(descriptor, "w", encoding="utf-8") as checkpoint_file:
+            json.dump({"done_through": self.done_through, "done_after": sorted(self.done_after),
+                       "run_id": self.run_id, "started_through": self.started_through}, checkpoint_file)
+        os.replace(temporary_path, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class WorkItemImporter:
+    """ Create the work items of a file with at most concurrency creations running.
+
+    Rows are read in a worker thread into a queue of concurrency * QUEUE_SIZE rows, so a slow Azure
+    stops the reading instead of filling memory. Busy or failing requests are retried, rows that
+    still fail are printed as JSON lines to output, and the checkpoint lets a new run skip the
+    rows an interrupted one already did. Rows that failed are not done, a new run tries them again.
+    Work items are created at bulk priority.
+
+    Every work item is tagged with an idempotency key made of the run id and its row number. The rows an
+    interrupted run may have created without saving them as done are looked for by key first, in batches,
+    and a retry after a timeout or a server error checks its key, so no row is created twice.
+    """
+
+    def __init__(self, client: AsyncAzureClient, checkpoint: Checkpoint, concurrency: int = 10,
+                 output=sys.stdout, progress=sys.stderr) -> None:
+        if not isinstance(concurrency, int) or concurrency < 1:
+            raise ValueError("Concurrency must be positive integer.")
+
+        self.client = client
+        self.checkpoint = checkpoint
+        self.concurrency = concurrency
+        self.output = output
+        self.progress = progress
+        self.counts = {"created": 0, "failed": 0, "skipped": 0}
+        self._done_since_save = 0
+        self._started = None
+        # rows of the interrupted run that were not saved as done may have been created
+        self._in_doubt_through = checkpoint.started_through
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = time.monotonic() - self._started if self._started is not None else 0
+        return (self.counts["created"] + self.counts["failed"]) / elapsed if elapsed > 0 else 0.0
+
+    def idempotency_key(self, row_number: int):
+        return f"{self.checkpoint.run_id}:{row_number}"
+
+    async def run(self, rows):
+        self._started = time.monotonic()
+        queue = asyncio.Queue(maxsize=self.concurrency * QUEUE_SIZE)
+        workers = [asyncio.create_task(self._work(queue)) for _ in range(self.concurrency)]
+        reader = asyncio.create_task(self._read(rows, queue))
+
+        try:
+            # a worker that raises (it could not save the checkpoint) stops the import, the reader
+            # would otherwise wait for room in the queue forever
+            await asyncio.gather(reader, *workers)
+        finally:
+            for task in [reader, *workers]:
+                task.cancel()
+            self.checkpoint.save()
+
+        return self.counts
+
+    async def _read(self, rows, queue: asyncio.Queue):
+        rows = iter(rows)
+        loop = asyncio.get_running_loop()
+        in_doubt = []
+        while (row := await loop.run_in_executor(None, next, rows, END)) is not END:
+            row_number, row = row
+            if self.checkpoint.is_done(row_number):
+                self.counts["skipped"] += 1
+                continue
+            if row_number <= self._in_doubt_through:
+                in_doubt.append((row_number, row))
+                if len(in_doubt) >= AsyncAzureClient.KEYS_PER_QUERY:
+                    await self._recover(in_doubt, queue)
+                    in_doubt = []
+                continue
+            await self._queue_row(queue, row_number, row)
+        await self._recover(in_doubt, queue)
+
+        for _ in range(self.concurrency):
+            await queue.put(END)
+
+    async def _recover(self, rows: list, queue: asyncio.Queue):
+        """ Count the rows whose work item an interrupted run already created as skipped, queue the others. """
+        rows_by_project = {}
+        for row_number, row in rows:
+            arguments = validate_row(row)
+            if isinstance(arguments, Error):
+                await self._queue_row(queue, row_number, row)
+                continue
+            rows_by_project.setdefault(arguments[0], []).append((row_number, row))
+
+        for project, project_rows in rows_by_project.items():
+            keys = [self.idempotency_key(row_number) for row_number, _ in project_rows]
+            try:
+                result = await self.client.find_idempotency_keys(project, keys, priority=BULK)
+            except TransportError as error:
+                result = Error(message=f"{type(error).__name__}: {error}")
+
+            found = {}
+            if isinstance(result, Success):
+                found = result.response
+            else:
+                # every creation checks its own key then
+                self.client.mark_in_doubt(keys)
+
+            for row_number, row in project_rows:
+                if self.idempotency_key(row_number) in found:
+                    self.counts["skipped"] += 1
+                    self.checkpoint.mark_done(row_number)
+                else:
+                    await self._queue_row(queue, row_number, row)
+
+    async def _queue_row(self, queue: asyncio.Queue, row_number: int, row):
+        if row_number > self.checkpoint.started_through:
+            # saved ahead of the queue, one save covers the next concurrency * QUEUE_SIZE row numbers
+            self.checkpoint.started_through = row_number + self.concurrency * QUEUE_SIZE
+            self.checkpoint.save()
+        await queue.put((row_number, row))
+
+    async def _work(self, queue: asyncio.Queue):
+        while (item := await queue.get()) is not END:
+            row_number, row = item
+            arguments = validate_row(row)
+            if isinstance(arguments, Error):
+                result = arguments
+            else:
+                try:
+                    result = await self._import_row(row_number, arguments)
+                except Exception as exception:
+                    result = Error(message=f"{type(exception).__name__}: {exception}")
+
+            if isinstance(result, Success):
+                self.counts["created"] += 1
+            else:
+                self.counts["failed"] += 1
+                print(json.dumps({"row": row_number, "status_code": result.status_code, "message": result.message}),
+                      file=self.output, flush=True)
+
+            # a row that can never be imported is done, one that failed is tried again by the next run
+            if isinstance(result, Success) or isinstance(arguments, Error):
+                self.checkpoint.mark_done(row_number)
+            self._done_since_save += 1
+            if self._done_since_save >= CHECKPOINT_EVERY:
+                self._done_since_save = 0
+                self.checkpoint.save()
+                print(f"{self.counts['created']} work items created, {self.counts['failed']} failed, "
+                      f"{self.rows_per_second:.0f} rows/s", file=self.progress)
+
+    async def _import_row(self, row_number: int, arguments: list):
+        for attempt in range(IMPORT_RETRIES + 1):
+            try:
+                result = await self.client.create_work_item(
+                    *arguments, idempotency_key=self.idempotency_key(row_number), priority=BULK)
+            except TransportError as error:
+                result = Error(message=f"{type(error).__name__}: {error}")
+
+            if isinstance(result, Success) or (result.status_code is not None and
+                                               result.status_code not in RETRY_STATUS_CODES):
+                return result
+            if attempt < IMPORT_RETRIES:
+                await asyncio.sleep(RETRY_DELAY * 2 ** attempt)
+
+        return result
+
+
+async def run_import(path: str, concurrency: int = 10, checkpoint_path: str = None, settings: dict = None):
+    """ Import the rows of path, the checkpoint (path + '.checkpoint' by default) is removed once all are done,
+    it is kept when some rows failed so importing again tries them. """
+    checkpoint = Checkpoint(checkpoint_path or f"{path}.checkpoint")
+    client = AsyncAzureClient(settings)
+    try:
+        counts = await WorkItemImporter(client, checkpoint, concurrency).run(read_rows(path))
+    finally:
+        await client.close()
+
+    if counts["failed"] == 0:
+        checkpoint.remove()
+    return counts
@@ -1,12 +1,54 @@
 """Main module for the solution that has command line
  interface for the user to interact with the Azure organization. """
-import asyncio
-from solution.models.data_classes.data_classes import Success
-from solution.models.sync_azure_client import SyncAzureClient
-from solution.models.async_azure_client import AsyncAzureClient
-from typing import Union
+import argparse
+import sys
+from solution.models.data_classes.data_classes import Success, Error
+from typing import TYPE_CHECKING, Union
 
-from solution.telegram_bot import TelegramBot
+from solution.telegram_bot import LazyTelegramBot
+
+# clients are imported when the user picks one, so the menu shows without loading httpx or asyncio
+if TYPE_CHECKING:
+    from solution.models.sync_azure_client import SyncAzureClient
+    from solution.models.async_azure_client import AsyncAzureClient
+    from solution.models.async_backed_sync_azure_client import AsyncBackedSyncAzureClient
+
+
+class LazyClient:
+    """ Builds the client on its first use, so nothing is connected before the user asks for it. """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+
+    @property
+    def built(self):
+        """ Whether the client was built, only then it has to be closed. """
+        return self._client is not None
+
+    def __getattr__(self, name):
+        if self._client is None:
+            self._client = self._factory()
+        return getattr(self._client, name)
+
+
+def create_sync_client():
+    from solution.models.sync_azure_client import SyncAzureClient
+    return SyncAzureClient(telegram_bot=LazyTelegramBot())
+
+
+def create_async_client():
+    from solution.models.async_azure_client import AsyncAzureClient
+    return AsyncAzureClient(telegram_bot=LazyTelegramBot())
+
+
+def create_async_backed_sync_client():
+    from solution.models.async_backed_sync_azure_client import AsyncBackedSyncAzureClient
+    return AsyncBackedSyncAzureClient(telegram_bot=LazyTelegramBot())
+
+
+# work items printed before asking whether to show more
+WORK_ITEMS_PAGE_SIZE = 50
 
 
 def print_project_choices():
@@ -31,7 +73,7 @@ def print_work_item_choices(project_name: str):
     print("6. Return to main menu.")
 
 
-def work_item_operations(client: Union[AsyncAzureClient, SyncAzureClient],
+def work_item_operations(client: Union["AsyncAzureClient", "SyncAzureClient", "AsyncBackedSyncAzureClient"],
                          project_name: str, selected_project_id: str, project_choice: str):
     """ List all work item operations for async client. """
     match project_choice:
@@ -42,7 +84,7 @@ def work_item_operations(client: Union[AsyncAzureClient, SyncAzureClient],
                                            work_item_type, work_item_title)
 
         case "2":
-            return client.list_work_items(project_name)
+            return client.iter_work_items(project_name)
 
         case "3":
             work_item_title = input("Enter work item title to update title: ").strip()
@@ -88,25 +130,80 @@ def get_request(choice, client):
             print("Invalid choice. Please try again.")
 
 
+def print_work_items_header():
+    print("---------------------------------------------")
+    print("\t%-15s: %s" % ("Work Item Type", "Work Item Title"))
+    print("---------------------------------------------")
+
+
+def print_work_item_row(work_item):
+    print("\t%-15s: %-30s" % (work_item["type"], work_item["title"]))
+
+
+def print_stream_progress(stream):
+    print(f"\t... {stream.fetched}/{stream.total} work items, {stream.items_per_second:.0f} items/s")
+
+
+def wants_more_work_items(stream):
+    """ After every full page show the progress and ask whether to keep printing. """
+    if stream.fetched % WORK_ITEMS_PAGE_SIZE or stream.fetched >= stream.total:
+        return True
+
+    print_stream_progress(stream)
+    return input("Press Enter for more work items or q to stop: ").strip().lower() != "q"
+
+
+def print_stream_end(stream):
+    if stream.error:
+        print(stream.error.message)
+    print_stream_progress(stream)
+
+
+def print_work_item_stream(stream):
+    """ Print work items as they arrive, page by page. """
+    if isinstance(stream, Error):
+        print(stream.message)
+        return
+    if stream.total == 0:
+        print("No work items found.")
+        return
+
+    print_work_items_header()
+    for work_item in stream:
+        print_work_item_row(work_item)
+        if not wants_more_work_items(stream):
+            break
+
+    stream.close()
+    print_stream_end(stream)
+
+
+async def print_async_work_item_stream(stream):
+    """ Print work items as they arrive from the async client, page by page. """
+    if isinstance(stream, Error):
+        print(stream.message)
+        return
+    if stream.total == 0:
+        print("No work items found.")
+        return
+
+    print_work_items_header()
+    async for work_item in stream:
+        print_work_item_row(work_item)
+        if not wants_more_work_items(stream):
+            break
+
+    await stream.aclose()
+    print_stream_end(stream)
+
+
 def handle_work_item_response(work_item_response, project_choice):
     match project_choice:
         case "1":
             print(work_item_response.message)
 
         case "2":
-            if isinstance(work_item_response, Success):
-                if len(work_item_response.response) == 0:
-                    print("No work items found.")
-                    return
-
-                print("---------------------------------------------")
-                print("\t%-15s: %s" % ("Work Item Type", "Work Item Title"))
-                print("---------------------------------------------")
-                for work_item in work_item_response.response.values():
-                    print("\t%-15s: %-30s" % (
-                        work_item["type"], work_item["title"]))
-            else:
-                print(work_item_response.message)
+            print_work_item_stream(work_item_response)
         case "3":
             print(work_item_response.message)
 
@@ -159,10 +256,13 @@ def handle_response(response, choice):
 
 
 async def pick_async():
-    client = AsyncAzureClient(telegram_bot=TelegramBot())
+    import asyncio
+
+    client = LazyClient(create_async_client)
     while True:
         print_project_choices()
-        choice = input("Enter your choice: ").strip()
+        # read off the event loop, so the prefetch and other background tasks run while the user decides
+        choice = (await asyncio.to_thread(input, "Enter your choice: ")).strip()
 
         if choice.isnumeric() and 0 < int(choice) < 5:
             response = await get_request(choice, client)
@@ -170,29 +270,42 @@ async def pick_async():
             if choice != "4":
                 handle_response(response, choice)
             else:
-                project_id, project_name = handle_response(response, choice)
+                project = handle_response(response, choice)
+                if project is None:
+                    continue
+                project_id, project_name = project
+
+                # the user nearly always works on the items next, so start loading them now
+                await client.prefetch_work_items(project_name)
 
                 while True:
                     print_work_item_choices(project_name)
-                    project_choice = input("Enter your choice: ").strip()
+                    project_choice = (await asyncio.to_thread(input, "Enter your choice: ")).strip()
 
                     if project_choice.isnumeric() and 0 < int(project_choice) < 6:
                         response = await work_item_operations(client, project_name, project_id, project_choice)
                     elif project_choice == "6":
+                        client.stop_prefetch(project_name)
                         break
                     else:
                         print("Invalid choice. Please try again.")
 
-                    handle_work_item_response(response, project_choice)
+                    if project_choice == "2":
+                        await print_async_work_item_stream(response)
+                        print("------------------------------------------------------------")
+                    else:
+                        handle_work_item_response(response, project_choice)
 
         elif choice == "5":
+            if client.built:
+                await client.close()
             break
         else:
             print("Invalid choice. Please try again.")
 
 
-def pick_sync():
-    client = SyncAzureClient(telegram_bot=TelegramBot())
+def pick_sync(client_factory=create_sync_client):
+    client = LazyClient(client_factory)
     while True:
         print_project_choices()
         choice = input("Enter your choice: ").strip()
@@ -203,7 +316,13 @@ def pick_sync():
             if choice != "4":
                 handle_response(response, choice)
             else:
-                project_id, project_name = handle_response(response, choice)
+                project = handle_response(response, choice)
+                if project is None:
+                    continue
+                project_id, project_name = project
+
+                # the user nearly always works on the items next, so start loading them now
+                client.prefetch_work_items(project_name)
 
                 while True:
                     print_work_item_choices(project_name)
@@ -212,6 +331,7 @@ def pick_sync():
                     if project_choice.isnumeric() and 0 < int(project_choice) < 6:
                         response = work_item_operations(client, project_name, project_id, project_choice)
                     elif project_choice == "6":
+                        client.stop_prefetch(project_name)
                         break
                     else:
                         print("Invalid choice. Please try again.")
@@ -219,36 +339,107 @@ def pick_sync():
                     handle_work_item_response(response, project_choice)
 
         elif choice == "5":
+            # the async engine runs its event loop on a thread that only close stops
+            if client.built:
+                client.close()
             break
         else:
             print("Invalid choice. Please try again.")
 
 
-def project_operations(is_async: bool = False):
+def project_operations(is_async: bool = False, async_engine: bool = False):
     if is_async:
+        import asyncio
         asyncio.run(pick_async())
+    elif async_engine:
+        pick_sync(create_async_backed_sync_client)
     else:
         pick_sync()
 
 
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Manage your Azure DevOps organization.")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="run operations from a JSONL or YAML script without menus, '-' reads JSONL from stdin")
+    parser.add_argument("--import", dest="import_file", metavar="FILE",
+                        help="create the work items of a CSV or NDJSON file (project, type and title of each), "
+                             "an interrupted import resumes from FILE.checkpoint")
+    parser.add_argument("--concurrency", type=int, default=10,
+                        help="how many batch operations or imported work items may run at the same time (default 10)")
+    parser.add_argument("--export", metavar="FILE",
+                        help="export work items to FILE, CSV when it ends with .csv and NDJSON otherwise")
+    parser.add_argument("--project", metavar="NAME",
+                        help="project to export, every project of the organization when it is not given")
+    parser.add_argument("--fields", metavar="FIELDS",
+                        help="comma separated work item fields to export besides title and type")
+    return parser.parse_args()
+
+
+def run_batch_mode(path: str, concurrency: int):
+    import asyncio
+    from solution.batch_runner import run_batch
+
+    counts = asyncio.run(run_batch(path, concurrency))
+    print(f"{counts['ok']} operations succeeded, {counts['failed']} failed.", file=sys.stderr)
+    return counts["failed"] == 0
+
+
+def run_export_mode(path: str, project_name: str = None, fields: str = None):
+    from solution.exporter import run_export
+
+    fields = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    result = run_export(path, project_name, fields=fields)
+    print(result.message, file=sys.stderr)
+    for error in result.response["errors"] if isinstance(result, Success) else []:
+        print(f"\t{error['project']}: {error['message']}", file=sys.stderr)
+    return isinstance(result, Success) and not result.response["errors"]
+
+
+def run_import_mode(path: str, concurrency: int):
+    import asyncio
+    from solution.importer import run_import
+
+    try:
+        counts = asyncio.run(run_import(path, concurrency))
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return False
+    print(f"{counts['created']} work items created, {counts['failed']} failed, "
+          f"{counts['skipped']} skipped as already imported.", file=sys.stderr)
+    if counts["failed"]:
+        print(f"Importing {path} again tries the failed rows.", file=sys.stderr)
+    return counts["failed"] == 0
+
+
 if __name__ == "__main__":
+    arguments = parse_arguments()
+    if arguments.batch:
+        sys.exit(0 if run_batch_mode(arguments.batch, arguments.concurrency) else 1)
+    if arguments.import_file:
+        sys.exit(0 if run_import_mode(arguments.import_file, arguments.concurrency) else 1)
+    if arguments.export:
+        sys.exit(0 if run_export_mode(arguments.export, arguments.project, arguments.fields) else 1)
+
     print("Welcome to Azure API!")
     while True:
         print("*******************************************")
         print("How would you like to run?")
         print("1. Sync client.")
         print("2. Async client.")
-        print("3. Exit.")
+        print("3. Sync client on async engine.")
+        print("4. Exit.")
         client_type = input("Enter your choice: ").strip()
 
-        while client_type not in ["1", "2", "3"]:
-            print("Invalid choice. Please choose 1, 2 or 3.")
+        while client_type not in ["1", "2", "3", "4"]:
+            print("Invalid choice. Please choose 1, 2, 3 or 4.")
             client_type = input("Enter your choice: ").strip()
 
         if client_type == "1":
             project_operations(False)
         elif client_type == "2":
             project_operations(True)
+        elif client_type == "3":
+            project_operations(False, async_engine=True)
         else:
             print("Thank you for using Azure API!")
             break
@@ -1,11 +1,27 @@
 import os
+import threading
+import time
 from abc import ABC, abstractmethod
 
-from solution.models.data_classes.data_classes import Success, Error, AzureSettings
+from httpx import TimeoutException
+
+from solution.config import load_config
+from solution.models.cassette import REPLAY_TIMINGS
+from solution.models.circuit_breaker import CircuitBreakers
+from solution.models.data_classes.data_classes import Success, Error, AzureSettings, CircuitOpenError, \
+    DeadlineExceededError
+from solution.models.deadline import current_deadline
+from solution.models.detail_cache import WorkItemDetailCache
+from solution.models.disk_cache import DiskCache
+from solution.models.client_errors import ClientFailure
+from solution.models.latency_tracker import LatencyTracker
+from solution.models.metrics import Metrics
+from solution.models.prefetch_cache import PrefetchCache
+from solution.models.profiler import OperationProfiler, PROFILE_DIR_VARIABLE
+from solution.models.scheduler import PRIORITIES, BULK
+from solution.models.wiql import WorkItemQuery, escape_wiql_literal
 from solution.telegram_bot import TelegramBot
 
-from configparser import ConfigParser
-
 
 class AzureClient(ABC):
     OK_STATUS_CODE = 200
@@ -14,6 +30,24 @@ class AzureClient(ABC):
     PROJECT_ALREADY_EXIST_STATUS_CODE = 400
     NON_AUTHORIZED_STATUS_CODE = 401
     NOT_FOUND_STATUS_CODE = 404
+    SERVER_ERROR_STATUS_CODE = 500
+    SERVICE_UNAVAILABLE_STATUS_CODE = 503
+    REQUEST_TIMEOUT_STATUS_CODE = 408
+
+    # timeout of one request when the operation has no budget, or when its budget has more left
+    REQUEST_TIMEOUT = 15.0
+
+    # an endpoint circuit opens when half of its last 20 calls (at least 10) failed, and stays open for 30 seconds
+    CIRCUIT_FAILURE_RATE = 0.5
+    CIRCUIT_WINDOW = 20
+    CIRCUIT_MINIMUM_CALLS = 10
+    CIRCUIT_OPEN_SECONDS = 30.0
+
+    # idempotent reads that may be sent twice when hedge_reads is on
+    HEDGED_ENDPOINTS = {"list_projects", "get_project", "get_work_item", "get_work_items_batch"}
+    # duplicate is sent after the hedge_percentile latency of the endpoint, or this delay until enough calls are seen
+    HEDGE_DEFAULT_DELAY = 1.0
+    HEDGE_MIN_DELAY = 0.05
 
     END_POINTS = {
         "create_project": "/_apis/projects?api-version=7.0",
@@ -24,9 +58,39 @@ class AzureClient(ABC):
         "list_work_items": "/{project_name}/_apis/wit/wiql?api-version=7.0",
         "update_work_item": "/{project_name}/_apis/wit/workitems/{work_item_id}?api-version=7.0",
         "delete_work_item": "/{project_name}/_apis/wit/workitems/{work_item_id}?api-version=7.0",
-        "get_work_item": "/{project_name}/_apis/wit/workitems/{work_item_id}?api-version=7.0"
+        "get_work_item": "/{project_name}/_apis/wit/workitems/{work_item_id}?api-version=7.0",
+        "get_work_items_batch": "/{project_name}/_apis/wit/workitemsbatch?api-version=7.0",
+        "get_operation": "/_apis/operations/{operation_id}?api-version=7.0"
     }
 
+    # titles per WIQL "IN" query and ids per work items batch request (Azure allows at most 200 ids)
+    TITLES_PER_QUERY = 200
+    WORK_ITEMS_PER_BATCH = 200
+    # characters Azure accepts in one WIQL query, long titles end a titles query before TITLES_PER_QUERY
+    WIQL_MAX_LENGTH = 32768
+    WORK_ITEM_FIELDS = ["System.Title", "System.WorkItemType", "System.State"]
+    # only these fields are downloaded when listing work items
+    LIST_FIELDS = ["System.Title", "System.WorkItemType"]
+    # only these fields are downloaded to count work items, and org_stats results are kept this many seconds
+    STATS_FIELDS = ["System.WorkItemType", "System.State"]
+    ORG_STATS_TTL = 300.0
+    # only this field is downloaded to check whether cached work item details changed
+    REV_FIELDS = ["System.Rev"]
+    # a deletion operation is asked for every this many seconds, and waited for this long at most
+    OPERATION_POLL_INTERVAL = 1.0
+    OPERATION_WAIT_TIMEOUT = 300.0
+    OPERATION_FINISHED_STATUSES = ["succeeded", "failed", "cancelled"]
+    # a project listing returns pages of this many projects, the header of each page names the next one
+    PROJECTS_PER_PAGE = 100
+    CONTINUATION_TOKEN_HEADER = "x-ms-continuationtoken"
+    # an idempotency key is kept as a tag of the work item it created, keys are looked for this many per query
+    IDEMPOTENCY_TAG_PREFIX = "idempotency-key:"
+    IDEMPOTENCY_KEY_MAX_LENGTH = 100
+    KEYS_PER_QUERY = 50
+    IDEMPOTENCY_FIELDS = ["System.Title", "System.WorkItemType", "System.Tags"]
+    # fields that have their own key in a work item summary
+    SUMMARY_FIELDS = {"System.Title": "title", "System.WorkItemType": "type", "System.State": "state"}
+
     def __init__(self, settings: dict = None, telegram_bot: TelegramBot = None):
         if settings is None:
             settings = {}
@@ -34,22 +98,143 @@ class AzureClient(ABC):
             if not isinstance(settings, dict):
                 raise TypeError("Settings must be dictionary.")
 
-        config = ConfigParser()
-        config.read(os.path.dirname(__file__) + "\\..\\settings.init")
+        config = load_config()
 
+        self.settings = AzureSettings()
         if "DEFAULT" in config and "token" in config["DEFAULT"] and "organization" in config["DEFAULT"]:
             self.settings = AzureSettings(config["DEFAULT"]["token"], config["DEFAULT"]["organization"])
 
+            if "max_workers" in config["DEFAULT"]:
+                self.settings.max_workers = int(config["DEFAULT"]["max_workers"])
+            if "hedge_reads" in config["DEFAULT"]:
+                self.settings.hedge_reads = config["DEFAULT"].getboolean("hedge_reads")
+            if "hedge_percentile" in config["DEFAULT"]:
+                self.settings.hedge_percentile = float(config["DEFAULT"]["hedge_percentile"])
+            if "base_url" in config["DEFAULT"]:
+                self.settings.base_url = config["DEFAULT"]["base_url"]
+            if "cache_dir" in config["DEFAULT"]:
+                self.settings.cache_dir = config["DEFAULT"]["cache_dir"]
+            if "cache_ttl" in config["DEFAULT"]:
+                self.settings.cache_ttl = float(config["DEFAULT"]["cache_ttl"])
+            if "profile_dir" in config["DEFAULT"]:
+                self.settings.profile_dir = config["DEFAULT"]["profile_dir"]
+            if "record_cassette" in config["DEFAULT"]:
+                self.settings.record_cassette = config["DEFAULT"]["record_cassette"]
+            if "replay_cassette" in config["DEFAULT"]:
+                self.settings.replay_cassette = config["DEFAULT"]["replay_cassette"]
+            if "replay_timing" in config["DEFAULT"]:
+                self.settings.replay_timing = config["DEFAULT"]["replay_timing"]
+            if "detail_cache_items" in config["DEFAULT"]:
+                self.settings.detail_cache_items = int(config["DEFAULT"]["detail_cache_items"])
+            if "detail_cache_bytes" in config["DEFAULT"]:
+                self.settings.detail_cache_bytes = int(config["DEFAULT"]["detail_cache_bytes"])
+            if "detail_cache_ttl" in config["DEFAULT"]:
+                self.settings.detail_cache_ttl = float(config["DEFAULT"]["detail_cache_ttl"])
+            for priority in PRIORITIES:
+                if f"{priority}_max_requests" in config["DEFAULT"]:
+                    self.settings.priority_limits = self.settings.priority_limits or {}
+                    self.settings.priority_limits[priority] = int(config["DEFAULT"][f"{priority}_max_requests"])
+
+        if os.environ.get(PROFILE_DIR_VARIABLE):
+            self.settings.profile_dir = os.environ[PROFILE_DIR_VARIABLE]
+
         if settings.get("token"):
             self.settings.token = settings["token"]
         if settings.get("organization"):
             self.settings.organization = settings["organization"]
+        if settings.get("max_workers"):
+            self.settings.max_workers = settings["max_workers"]
+        if "hedge_reads" in settings:
+            self.settings.hedge_reads = bool(settings["hedge_reads"])
+        if settings.get("hedge_percentile"):
+            self.settings.hedge_percentile = settings["hedge_percentile"]
+        if settings.get("base_url"):
+            self.settings.base_url = settings["base_url"]
+        if settings.get("cache_dir"):
+            self.settings.cache_dir = settings["cache_dir"]
+        if "cache_ttl" in settings:
+            self.settings.cache_ttl = settings["cache_ttl"]
+        if settings.get("profile_dir"):
+            self.settings.profile_dir = settings["profile_dir"]
+        if settings.get("record_cassette"):
+            self.settings.record_cassette = settings["record_cassette"]
+        if settings.get("replay_cassette"):
+            self.settings.replay_cassette = settings["replay_cassette"]
+        if settings.get("replay_timing"):
+            self.settings.replay_timing = settings["replay_timing"]
+        if "detail_cache_items" in settings:
+            self.settings.detail_cache_items = settings["detail_cache_items"]
+        if "detail_cache_bytes" in settings:
+            self.settings.detail_cache_bytes = settings["detail_cache_bytes"]
+        if "detail_cache_ttl" in settings:
+            self.settings.detail_cache_ttl = settings["detail_cache_ttl"]
+        if settings.get("priority_limits"):
+            self.settings.priority_limits = {**(self.settings.priority_limits or {}), **settings["priority_limits"]}
 
         if not self.settings.token or not self.settings.organization:
             raise ValueError("Token and organization must be specified.")
+        if not self.settings.base_url:
+            self.settings.base_url = f"https://dev.azure.com/{self.settings.organization}/"
+        if not isinstance(self.settings.max_workers, int) or self.settings.max_workers < 1:
+            raise ValueError("Max workers must be positive integer.")
+        if not 0 < self.settings.hedge_percentile < 100:
+            raise ValueError("Hedge percentile must be between 0 and 100.")
+        if isinstance(self.settings.cache_ttl, bool) or not isinstance(self.settings.cache_ttl, (int, float)) \
+                or self.settings.cache_ttl < 0:
+            raise ValueError("Cache ttl must be non negative number of seconds.")
+        for limit in (self.settings.detail_cache_items, self.settings.detail_cache_bytes):
+            if isinstance(limit, bool) or not isinstance(limit, int) or limit < 0:
+                raise ValueError("Detail cache items and bytes must be non negative integers.")
+        if isinstance(self.settings.detail_cache_ttl, bool) \
+                or not isinstance(self.settings.detail_cache_ttl, (int, float)) or self.settings.detail_cache_ttl < 0:
+            raise ValueError("Detail cache ttl must be non negative number of seconds.")
+        if self.settings.record_cassette and self.settings.replay_cassette:
+            raise ValueError("Record cassette and replay cassette can not be used together.")
+        if self.settings.replay_timing not in REPLAY_TIMINGS:
+            raise ValueError(f"Replay timing must be one of {', '.join(REPLAY_TIMINGS)}.")
+
+        # bulk requests leave half of the connections to the other classes unless told otherwise
+        self.settings.priority_limits = {BULK: max(1, self.settings.max_workers // 2),
+                                         **(self.settings.priority_limits or {})}
+        for priority, limit in self.settings.priority_limits.items():
+            if priority not in PRIORITIES:
+                raise ValueError(f"Priority limits must be for {', '.join(PRIORITIES)}.")
+            if isinstance(limit, bool) or not isinstance(limit, int) or limit < 1:
+                raise ValueError("Priority limits must be positive integers.")
 
         self.telegram_bot = telegram_bot
 
+        self.metrics = Metrics()
+
+        # one breaker per END_POINTS key, so a failing endpoint is refused at once instead of waiting for timeouts
+        self.circuit_breakers = CircuitBreakers(failure_rate=self.CIRCUIT_FAILURE_RATE, window=self.CIRCUIT_WINDOW,
+                                                minimum_calls=self.CIRCUIT_MINIMUM_CALLS,
+                                                open_seconds=self.CIRCUIT_OPEN_SECONDS)
+
+        self.latencies = LatencyTracker()
+
+        # work items of projects opened with prefetch_work_items
+        self.prefetched = PrefetchCache()
+
+        # work item details already downloaded in this session, 0 items turns it off
+        self.detail_cache = WorkItemDetailCache(self.settings.detail_cache_items, self.settings.detail_cache_bytes,
+                                                self.settings.detail_cache_ttl)
+
+        # last org_stats result and when it expires
+        self._org_stats = None
+
+        # idempotency keys of creations whose outcome is unknown, a retry with one checks Azure first
+        self._keys_in_doubt = set()
+        self._keys_lock = threading.Lock()
+
+        # project reads kept on disk between sessions, only when cache_dir is set
+        self.disk_cache = None
+        if self.settings.cache_dir:
+            self.disk_cache = DiskCache(self.settings.cache_dir, self.settings.organization, self.settings.cache_ttl)
+
+        # every public operation is profiled into profile_dir, only when it is set
+        self.profiler = OperationProfiler(self.settings.profile_dir) if self.settings.profile_dir else None
+
         self.headers = {
             "Accept": "application/json",
             "Content-Type": "application/json",
@@ -101,6 +286,128 @@ class AzureClient(ABC):
     def close(self):
         pass
 
+    def stop_prefetch(self, project_name: str):
+        """ Forget prefetched work items of project, its lookups go to Azure again. """
+        self.prefetched.stop(project_name)
+
+    def get_metrics(self) -> dict:
+        """ Counters collected by this client, e.g. coalesced reads and downloaded bytes. """
+        return self.metrics.snapshot()
+
+    def circuit_breaker_states(self) -> dict:
+        """ State, calls in window and failure rate of every endpoint called so far. """
+        return self.circuit_breakers.states()
+
+    def detail_cache_stats(self) -> dict:
+        """ Work items and bytes in the detail cache, its hits, misses, revalidations, evictions and hit ratio. """
+        return self.detail_cache.stats()
+
+    def scheduler_stats(self) -> dict:
+        """ Limit, queue depth, running requests and waits for a connection of every priority class. """
+        return self.scheduler.stats()
+
+    def is_hedged(self, endpoint: str):
+        return self.settings.hedge_reads and endpoint in AzureClient.HEDGED_ENDPOINTS
+
+    def connection_limit(self):
+        """ Connections of the pool, a hedged read holds one request slot but may send two requests. """
+        return self.settings.max_workers * 2 if self.settings.hedge_reads else self.settings.max_workers
+
+    def hedge_delay(self, endpoint: str):
+        """ Seconds to wait for an answer before sending the duplicate request. """
+        latency = self.latencies.percentile(endpoint, self.settings.hedge_percentile)
+        if latency is None:
+            return AzureClient.HEDGE_DEFAULT_DELAY
+        return max(AzureClient.HEDGE_MIN_DELAY, latency)
+
+    def allow_request(self, endpoint: str):
+        """ Raise ClientFailure with CircuitOpenError when the endpoint circuit refuses the call. """
+        if not self.circuit_breakers.get(endpoint).allow():
+            self.metrics.increment("circuit_open_rejections")
+            raise ClientFailure(CircuitOpenError(
+                message=f"Azure DevOps endpoint '{endpoint}' is failing, request refused while its circuit is open.",
+                status_code=AzureClient.SERVICE_UNAVAILABLE_STATUS_CODE, endpoint=endpoint))
+
+    def cached_read(self, key: str):
+        """ Result of key from the disk cache and whether it must be revalidated, None when it must be fetched. """
+        if self.disk_cache is None:
+            return None
+
+        cached = self.disk_cache.load(key)
+        self.metrics.increment("disk_cache_hits" if cached is not None else "disk_cache_misses")
+        return cached
+
+    def cache_result(self, key: str, result, fetched_at: float):
+        """ Keep a fetched result, or forget key when Azure says it does not exist anymore. """
+        if self.disk_cache is None:
+            return
+
+        if isinstance(result, Success):
+            self.disk_cache.store(key, result, fetched_at)
+        elif result.status_code == AzureClient.NOT_FOUND_STATUS_CODE:
+            self.disk_cache.invalidate(key)
+
+    def invalidate_cached_project(self, project_name: str):
+        """ Forget the listing and the project after it was created or deleted. """
+        if self.disk_cache is not None:
+            self.disk_cache.invalidate("list_projects", AzureClient.project_cache_key(project_name))
+
+    @classmethod
+    def project_cache_key(cls, project_name: str):
+        # project names are case insensitive in Azure DevOps
+        return f"get_project:{project_name.casefold()}"
+
+    def request_timeout(self, endpoint: str):
+        """ Timeout of the next request of endpoint, shortened to what is left of the operation budget.
+
+        Raises ClientFailure with DeadlineExceededError when the budget ran out or is shorter than
+        the endpoint usually takes to answer.
+        """
+        deadline = current_deadline()
+        if deadline is None:
+            return AzureClient.REQUEST_TIMEOUT
+
+        remaining = deadline.remaining()
+        usual_latency = self.latencies.percentile(endpoint, 50) or 0.0
+        if remaining <= usual_latency:
+            raise ClientFailure(self.deadline_exceeded_error(endpoint, deadline))
+
+        return min(remaining, AzureClient.REQUEST_TIMEOUT)
+
+    @classmethod
+    def queue_timeout(cls):
+        """ Seconds a request may wait for a connection, None when the operation has no budget. """
+        deadline = current_deadline()
+        if deadline is None:
+            return None
+        return max(0.0, deadline.remaining())
+
+    def deadline_exceeded_error(self, endpoint: str, deadline):
+        self.metrics.increment("deadline_exceeded")
+        return DeadlineExceededError(
+            message=f"Operation did not finish within {deadline.seconds} seconds, stopped before '{endpoint}' answered.",
+            status_code=AzureClient.REQUEST_TIMEOUT_STATUS_CODE, timeout=deadline.seconds)
+
+    def record_transport_error(self, endpoint: str, error, timeout: float):
+        """ Count a failed request against the endpoint circuit, unless the operation budget cut it short. """
+        deadline = current_deadline()
+        if isinstance(error, TimeoutException) and deadline is not None and timeout < AzureClient.REQUEST_TIMEOUT:
+            self.circuit_breakers.get(endpoint).record_cancelled()
+            raise ClientFailure(self.deadline_exceeded_error(endpoint, deadline)) from error
+
+        self.circuit_breakers.get(endpoint).record_failure()
+
+    def record_response(self, endpoint: str, response):
+        if response.status_code >= AzureClient.SERVER_ERROR_STATUS_CODE:
+            self.circuit_breakers.get(endpoint).record_failure()
+        else:
+            self.circuit_breakers.get(endpoint).record_success()
+
+        self.metrics.increment("requests")
+        # bytes as they came over the wire, a gzip answer counts compressed
+        self.metrics.increment("payload_bytes", response.num_bytes_downloaded)
+        self.metrics.increment(f"payload_bytes.{endpoint}", response.num_bytes_downloaded)
+
     def handle_create_project_response(self, response, name: str):
         if response.status_code == AzureClient.ACCEPTED_STATUS_CODE:
             json_response = response.json()
@@ -130,17 +437,7 @@ class AzureClient(ABC):
     @classmethod
     def handle_list_projects_response(cls, get_response):
         if get_response.status_code == AzureClient.OK_STATUS_CODE:
-            json_response = get_response.json()
-            if json_response["count"] != 0:
-                result_response = {}
-                for i, response in enumerate(json_response["value"], start=1):
-                    result_response.update({i: response["name"]})
-
-                return Success(message="Projects listed successfully.", response=result_response,
-                               status_code=get_response.status_code)
-
-            return Success(message="There is no project in your organization.", response={"message": "empty"},
-                           status_code=get_response.status_code)
+            return cls.listed_projects_result(get_response.json()["value"])
         if get_response.status_code in AzureClient.NON_AUTHORIZED_STATUS_CODES:
             return Error(message="you have authorization problem, recheck your token.",
                          status_code=get_response.status_code)
@@ -148,6 +445,17 @@ class AzureClient(ABC):
         return Error(message=f"Error occurred with code {get_response.status_code}.",
                      status_code=get_response.status_code)
 
+    @classmethod
+    def listed_projects_result(cls, projects: list):
+        """ Project names numbered from one, an empty organization is listed with a message instead. """
+        if projects:
+            return Success(message="Projects listed successfully.",
+                           response={i: project["name"] for i, project in enumerate(projects, start=1)},
+                           status_code=AzureClient.OK_STATUS_CODE)
+
+        return Success(message="There is no project in your organization.", response={"message": "empty"},
+                       status_code=AzureClient.OK_STATUS_CODE)
+
     def handle_delete_project_response(self, response, project_name):
         if response.status_code == AzureClient.ACCEPTED_STATUS_CODE:
             if self.telegram_bot:
@@ -183,14 +491,15 @@ class AzureClient(ABC):
         return Error(f"Error occurred with code {response.status_code}.",
                      status_code=response.status_code)
 
-    def handle_create_work_item_response(self, response, project_id, work_item_type, work_item_value):
+    def handle_create_work_item_response(self, response, project_id, work_item_type, work_item_value,
+                                         notify: bool = True):
         if response.status_code == AzureClient.OK_STATUS_CODE:
             json_response = response.json()
             result_response = {"title": json_response["fields"]["System.Title"],
                                "id": json_response["id"],
                                "type": json_response["fields"]["System.WorkItemType"]}
 
-            if self.telegram_bot:
+            if self.telegram_bot and notify:
                 self.telegram_bot.send_message(
                     f"Work item '{work_item_value}' created on your Azure organization "
                     f"'{self.settings.organization}'.")
@@ -226,6 +535,210 @@ class AzureClient(ABC):
         return Error(message=f"Error occurred with code {response.status_code}.",
                      status_code=response.status_code)
 
+    def cached_org_stats(self):
+        """ Last org_stats result while it is younger than ORG_STATS_TTL, otherwise None. """
+        if self._org_stats is None or time.monotonic() >= self._org_stats[0]:
+            return None
+
+        self.metrics.increment("org_stats_cache_hits")
+        return self._org_stats[1]
+
+    def cache_org_stats(self, result):
+        if isinstance(result, Success):
+            self._org_stats = (time.monotonic() + AzureClient.ORG_STATS_TTL, result)
+
+    @classmethod
+    def count_work_items(cls, work_items):
+        """ Total and counts by type and by state of work items downloaded with STATS_FIELDS. """
+        stats = {"total": 0, "by_type": {}, "by_state": {}}
+        for item_json in work_items:
+            cls.add_counts(stats, {"total": 1,
+                                   "by_type": {item_json["fields"].get("System.WorkItemType"): 1},
+                                   "by_state": {item_json["fields"].get("System.State"): 1}})
+        return stats
+
+    @classmethod
+    def add_counts(cls, stats, other_stats):
+        stats["total"] += other_stats["total"]
+        for key in ("by_type", "by_state"):
+            for value, count in other_stats[key].items():
+                stats[key][value] = stats[key].get(value, 0) + count
+
+    @classmethod
+    def handle_org_stats(cls, project_stats: dict, errors: dict):
+        organization_stats = {"total": 0, "by_type": {}, "by_state": {}}
+        for stats in project_stats.values():
+            cls.add_counts(organization_stats, stats)
+
+        return Success(message=f"Work items of {len(project_stats)} projects counted, {len(errors)} failed.",
+                       response={**organization_stats, "projects": project_stats, "errors": errors},
+                       status_code=AzureClient.OK_STATUS_CODE)
+
+    @classmethod
+    def projects_page_params(cls, continuation_token: str = None):
+        params = {"$top": AzureClient.PROJECTS_PER_PAGE}
+        if continuation_token:
+            params["continuationToken"] = continuation_token
+        return params
+
+    @classmethod
+    def check_projects_selection(cls, projects, wait):
+        if not callable(projects) and (not isinstance(projects, list) or
+                                       not all(isinstance(project, str) for project in projects)):
+            raise TypeError("Projects must be list of project names or function of project name.")
+        if not isinstance(wait, bool):
+            raise TypeError("Wait must be boolean.")
+
+    @classmethod
+    def projects_to_delete(cls, listed_projects: list, projects):
+        """ Ids of the selected projects by name, and Error of every asked for name that is not listed. """
+        if callable(projects):
+            return {project["name"]: project["id"] for project in listed_projects if projects(project["name"])}, {}
+
+        # project names are case insensitive in Azure DevOps
+        listed = {project["name"].casefold(): project for project in listed_projects}
+        targets, results = {}, {}
+        for project_name in dict.fromkeys(projects):
+            project = listed.get(project_name.casefold())
+            if project is None:
+                results[project_name] = Error(message=f"Project '{project_name}' not found.",
+                                              status_code=AzureClient.NOT_FOUND_STATUS_CODE)
+            else:
+                targets[project["name"]] = project["id"]
+
+        return targets, results
+
+    @classmethod
+    def operation_result(cls, project_name, result, status):
+        """ Result of a deletion once its operation finished with status, or with Error when it was not known. """
+        if isinstance(status, Error):
+            return status
+        if status != "succeeded":
+            return Error(message=f"Deletion of project '{project_name}' {status}.",
+                         status_code=AzureClient.SERVER_ERROR_STATUS_CODE)
+        return result
+
+    @classmethod
+    def operation_status(cls, response):
+        """ Status of an operation, or Error when it could not be read. """
+        if response.status_code == AzureClient.OK_STATUS_CODE:
+            return response.json()["status"]
+        if response.status_code in AzureClient.NON_AUTHORIZED_STATUS_CODES:
+            return Error(message="you have authorization problem, recheck your token.",
+                         status_code=response.status_code)
+
+        return Error(message=f"Error occurred with code {response.status_code}.", status_code=response.status_code)
+
+    @classmethod
+    def handle_delete_projects(cls, results: dict):
+        deleted = sum(1 for result in results.values() if isinstance(result, Success))
+
+        return Success(message=f"{deleted} projects deleted, {len(results) - deleted} failed.",
+                       response={"deleted": deleted, "failed": len(results) - deleted,
+                                 "projects": {project_name: {"status_code": result.status_code,
+                                                             "message": result.message}
+                                              for project_name, result in results.items()}},
+                       status_code=AzureClient.OK_STATUS_CODE)
+
+    def mark_in_doubt(self, idempotency_keys: list):
+        """ Check Azure for these keys before creating with them, e.g. the keys of an interrupted run. """
+        with self._keys_lock:
+            self._keys_in_doubt.update(idempotency_keys)
+
+    def is_in_doubt(self, idempotency_key: str):
+        with self._keys_lock:
+            return idempotency_key in self._keys_in_doubt
+
+    def settle_key(self, idempotency_key: str, in_doubt: bool):
+        with self._keys_lock:
+            if in_doubt:
+                self._keys_in_doubt.add(idempotency_key)
+            else:
+                self._keys_in_doubt.discard(idempotency_key)
+
+    @classmethod
+    def creation_in_doubt(cls, response):
+        """ Whether the work item may have been created although the answer says otherwise. """
+        # a timeout or a server error may come after the work item was created
+        return response.status_code == AzureClient.REQUEST_TIMEOUT_STATUS_CODE \
+            or response.status_code >= AzureClient.SERVER_ERROR_STATUS_CODE
+
+    @classmethod
+    def check_idempotency_key(cls, idempotency_key):
+        if idempotency_key is None:
+            return
+        # tags of a work item are separated by ';'
+        if not isinstance(idempotency_key, str) or not idempotency_key or ";" in idempotency_key \
+                or len(idempotency_key) > AzureClient.IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise TypeError(f"Idempotency key must be string of 1 to {AzureClient.IDEMPOTENCY_KEY_MAX_LENGTH} "
+                            f"characters without ';'.")
+
+    @classmethod
+    def idempotency_tag(cls, idempotency_key: str):
+        return AzureClient.IDEMPOTENCY_TAG_PREFIX + idempotency_key
+
+    @classmethod
+    def idempotency_keys_body(cls, idempotency_keys: list):
+        tags = " or ".join(f"[System.Tags] CONTAINS {escape_wiql_literal(cls.idempotency_tag(key))}"
+                           for key in idempotency_keys)
+        return {"query": f"Select [System.Id] From WorkItems where [System.TeamProject] = @project and ({tags})"}
+
+    @classmethod
+    def work_items_by_key(cls, idempotency_keys: list, work_items: list):
+        """ Work item json of every key that tags one of work_items. """
+        tags = {cls.idempotency_tag(key): key for key in idempotency_keys}
+        found = {}
+        for item_json in work_items:
+            for tag in item_json["fields"].get("System.Tags", "").split(";"):
+                if tag.strip() in tags:
+                    found[tags[tag.strip()]] = item_json
+        return found
+
+    @classmethod
+    def existing_work_item_result(cls, item_json):
+        """ Result of a creation that Azure already did with the same idempotency key. """
+        title = item_json["fields"]["System.Title"]
+        return Success(message=f"Work item '{title}' already created.",
+                       response={"title": title, "id": item_json["id"],
+                                 "type": item_json["fields"]["System.WorkItemType"]},
+                       status_code=AzureClient.OK_STATUS_CODE)
+
+    @classmethod
+    def handle_found_keys(cls, found: dict):
+        return Success(message=f"{len(found)} idempotency keys found.",
+                       response={key: {"id": item_json["id"], "title": item_json["fields"]["System.Title"],
+                                       "type": item_json["fields"]["System.WorkItemType"]}
+                                 for key, item_json in found.items()},
+                       status_code=AzureClient.OK_STATUS_CODE)
+
+    @classmethod
+    def failure_error(cls, failure):
+        """ Error of a request that raised, ClientFailure carries one and network errors get a message. """
+        if isinstance(failure, ClientFailure):
+            return failure.error
+        return Error(message=f"{type(failure).__name__}: {failure}")
+
+    def handle_clone_result(self, source_project_name, target_project_name, created, errors, started):
+        elapsed = time.monotonic() - started
+        items_per_second = created / elapsed if elapsed > 0 else 0.0
+
+        if self.telegram_bot and created:
+            self.telegram_bot.send_message(f"{created} work items copied from project '{source_project_name}' to "
+                                           f"'{target_project_name}' on your Azure organization "
+                                           f"'{self.settings.organization}'.")
+
+        return Success(message=f"{created} work items copied from '{source_project_name}' to '{target_project_name}'"
+                               f", {len(errors)} failed.",
+                       response={"created": created, "failed": len(errors), "errors": errors,
+                                 "items_per_second": items_per_second},
+                       status_code=AzureClient.OK_STATUS_CODE)
+
+    @classmethod
+    def clone_error(cls, work_item, error):
+        """ Error entry of a work item that could not be copied, error is an Error or an exception. """
+        message = error.message if isinstance(error, Error) else f"{type(error).__name__}: {error}"
+        return {"id": work_item["id"], "title": work_item["title"], "message": message}
+
     def handle_update_work_item_response(self, response, work_item_title, new_work_item_title):
         if response.status_code == AzureClient.OK_STATUS_CODE:
             if self.telegram_bot:
@@ -260,22 +773,64 @@ class AzureClient(ABC):
         return Error(message=f"Error occurred with code {response.status_code}.",
                      status_code=response.status_code)
 
+    def revalidated_work_items(self, rev_items: list, stale: dict, fields: list, work_items: dict):
+        """ Add the stale work items whose revision did not change to work_items, return ids of the others. """
+        changed = []
+        for item_json in rev_items:
+            cached = self.detail_cache.revalidate(item_json["id"], item_json["rev"], fields)
+            if cached is None:
+                changed.append(item_json["id"])
+            else:
+                work_items[item_json["id"]] = cached
+
+        # a work item Azure did not answer for is gone
+        answered = {item_json["id"] for item_json in rev_items}
+        for work_item_id in stale:
+            if work_item_id not in answered:
+                self.detail_cache.remove(work_item_id)
+
+        return changed
+
+    @classmethod
+    def cached_work_item_result(cls, item_json):
+        return Success("Work item found.", {"id": item_json["id"], **cls.work_item_summary(item_json)},
+                       AzureClient.OK_STATUS_CODE)
+
     @classmethod
     def handle_get_work_item_response(cls, response):
         if response.status_code == AzureClient.OK_STATUS_CODE:
             result = response.json()
-
-            result_response = {
-                "title": result["fields"]["System.Title"],
-                "id": result["id"],
-                "type": result["fields"]["System.WorkItemType"],
-                "state": result["fields"]["System.State"]
-            }
+            result_response = {"id": result["id"], **cls.work_item_summary(result)}
 
             return Success("Work item found.", result_response, AzureClient.OK_STATUS_CODE)
 
         return Error(f"Error occurred with code {response.status_code}.", response.status_code)
 
+    @classmethod
+    def projected_fields(cls, default_fields: list, fields: list = None):
+        if fields is not None and (not isinstance(fields, list) or
+                                   not all(isinstance(field, str) for field in fields)):
+            raise TypeError("Fields must be list of strings.")
+
+        return list(dict.fromkeys(default_fields + (fields or [])))
+
+    @classmethod
+    def work_item_summary(cls, item_json):
+        """ Title, type and state of a work item, other downloaded fields are kept under 'fields'. """
+        summary = {}
+        other_fields = {}
+
+        for field, value in item_json.get("fields", {}).items():
+            if field in cls.SUMMARY_FIELDS:
+                summary[cls.SUMMARY_FIELDS[field]] = value
+            else:
+                other_fields[field] = value
+
+        if other_fields:
+            summary["fields"] = other_fields
+
+        return summary
+
     @classmethod
     def create_project_data(cls, name, description):
         return {"name": name,
@@ -298,12 +853,14 @@ class AzureClient(ABC):
         if project.message.startswith("Error occurred with code"):
             return Error(message=project.message,
                          status_code=project.status_code)
+        if isinstance(project, Error):
+            return project
 
         return project.response["id"]
 
     @classmethod
-    def create_work_item_data(cls, work_item_value):
-        return [
+    def create_work_item_data(cls, work_item_value, idempotency_key: str = None):
+        data = [
             {
                 "op": "add",
                 "path": "/fields/System.Title",
@@ -311,13 +868,77 @@ class AzureClient(ABC):
                 "value": work_item_value
             }
         ]
+        if idempotency_key is not None:
+            data.append({"op": "add", "path": "/fields/System.Tags", "from": None,
+                         "value": cls.idempotency_tag(idempotency_key)})
+        return data
+
+    @classmethod
+    def list_work_items_body(cls, project_name, query: WorkItemQuery = None):
+        return {"query": (query or WorkItemQuery()).to_wiql(project_name)}
 
     @classmethod
-    def list_work_items_body(cls, project_name):
+    def check_query(cls, query):
+        if query is not None and not isinstance(query, WorkItemQuery):
+            raise TypeError("Query must be WorkItemQuery.")
+
+    @classmethod
+    def work_items_by_titles_body(cls, project_name, titles):
+        titles_list = ", ".join(escape_wiql_literal(title) for title in titles)
         return {
-            "query": f"Select * From WorkItems where [System.TeamProject] = '{project_name}'"
+            "query": f"Select [System.Id] From WorkItems where [System.TeamProject] = "
+                     f"{escape_wiql_literal(project_name)} and [System.Title] IN ({titles_list})"
         }
 
+    @classmethod
+    def titles_chunks(cls, project_name: str, titles: list):
+        """ Titles split into work_items_by_titles_body queries of at most TITLES_PER_QUERY titles and
+        WIQL_MAX_LENGTH characters. """
+        query_length = len(cls.work_items_by_titles_body(project_name, [])["query"])
+        titles_chunks, titles_chunk, length = [], [], query_length
+        for title in titles:
+            # the quoted title and the separator before it
+            title_length = len(escape_wiql_literal(title)) + len(", ")
+            if titles_chunk and (len(titles_chunk) == AzureClient.TITLES_PER_QUERY or
+                                 length + title_length > AzureClient.WIQL_MAX_LENGTH):
+                titles_chunks.append(titles_chunk)
+                titles_chunk, length = [], query_length
+            titles_chunk.append(title)
+            length += title_length
+
+        if titles_chunk:
+            titles_chunks.append(titles_chunk)
+        return titles_chunks
+
+    @classmethod
+    def work_items_batch_body(cls, work_item_ids, fields):
+        return {"ids": work_item_ids, "fields": fields}
+
+    @classmethod
+    def chunks(cls, values: list, size: int):
+        return [values[i:i + size] for i in range(0, len(values), size)]
+
+    @classmethod
+    def handle_work_items_by_titles(cls, titles, work_items):
+        # WIQL compares titles case insensitively, so a match belongs to every title that equals it ignoring case
+        requested_titles = {}
+        for title in titles:
+            requested_titles.setdefault(title.casefold(), []).append(title)
+        result_response = {title: [] for title in titles}
+
+        for item_json in sorted(work_items, key=lambda item: item["id"]):
+            title = item_json["fields"]["System.Title"]
+            for requested_title in requested_titles.get(title.casefold(), [title]):
+                result_response.setdefault(requested_title, []).append({
+                    "title": title,
+                    "id": item_json["id"],
+                    "type": item_json["fields"]["System.WorkItemType"],
+                    "state": item_json["fields"]["System.State"]
+                })
+
+        return Success(message="Work items found.", response=result_response,
+                       status_code=AzureClient.OK_STATUS_CODE)
+
     @classmethod
     def update_work_item_body(cls, work_item, work_item_title, new_work_item_title):
         if work_item == "not found.":
@@ -1,7 +1,21 @@
 """ Async Azure Client module. """
-from httpx import AsyncClient, BasicAuth
+import asyncio
+import contextvars
+import inspect
+import itertools
+import time
+from collections import deque
+
+from httpx import AsyncClient, AsyncHTTPTransport, BasicAuth, Limits, TransportError
+from solution.models.cassette import AsyncRecordingTransport, AsyncReplayTransport
 from solution.models.data_classes.data_classes import Success, Error
+from solution.models.deadline import current_deadline, deadline_scope
+from solution.models.scheduler import AsyncRequestScheduler, current_priority
+from solution.models.wiql import WorkItemQuery
+from solution.models.single_flight import AsyncSingleFlight
+from solution.models.work_item_stream import AsyncWorkItemStream
 from solution.models.abstract_azure_client import AzureClient
+from solution.models.client_errors import ClientFailure, client_operation
 from solution.telegram_bot import TelegramBot
 
 
@@ -12,14 +26,125 @@ class AsyncAzureClient(AzureClient):
         super().__init__(settings, telegram_bot)
 
         self.client: AsyncClient = AsyncClient(
-            base_url=f"https://dev.azure.com/{self.settings.organization}/",
+            base_url=self.settings.base_url,
             auth=BasicAuth("", self.settings.token),
             headers=self.headers,
             follow_redirects=True,
             default_encoding="utf-8",
-            timeout=15.0,
+            timeout=AsyncAzureClient.REQUEST_TIMEOUT,
+            limits=self._limits(),
+            transport=self._transport(),
         )
 
+        # identical reads in flight at the same time share one request
+        self._single_flight = AsyncSingleFlight(self.metrics)
+
+        # requests wait here for one of the pool connections, the most urgent priority class first
+        self.scheduler = AsyncRequestScheduler(self.settings.max_workers, self.settings.priority_limits)
+
+        self._prefetch_tasks = {}
+        self._revalidations = {}
+
+    def _limits(self):
+        return Limits(max_connections=self.connection_limit(), max_keepalive_connections=self.connection_limit())
+
+    def _transport(self):
+        """ Transport that records to or replays from a cassette, None for the default httpx one. """
+        if self.settings.replay_cassette:
+            return AsyncReplayTransport(self.settings.replay_cassette, self.settings.replay_timing)
+        if self.settings.record_cassette:
+            return AsyncRecordingTransport(AsyncHTTPTransport(limits=self._limits()), self.settings.record_cassette)
+        return None
+
+    async def _send(self, endpoint: str, method: str, url: str, **kwargs):
+        """ Send one request within the operation budget, endpoint is the END_POINTS key used for metrics
+        and its circuit breaker. """
+
+        priority = current_priority()
+        if not await self.scheduler.acquire(priority, AsyncAzureClient.queue_timeout()):
+            raise ClientFailure(self.deadline_exceeded_error(endpoint, current_deadline()))
+
+        try:
+            timeout = self.request_timeout(endpoint)
+            self.allow_request(endpoint)
+
+            try:
+                if self.is_hedged(endpoint):
+                    response = await self._hedged_request(endpoint, method, url, timeout=timeout, **kwargs)
+                else:
+                    response = await self._timed_request(endpoint, method, url, timeout=timeout, **kwargs)
+            except TransportError as error:
+                self.record_transport_error(endpoint, error, timeout)
+                raise
+            except BaseException:
+                self.circuit_breakers.get(endpoint).record_cancelled()
+                raise
+        finally:
+            self.scheduler.release(priority)
+
+        self.record_response(endpoint, response)
+
+        return response
+
+    async def _timed_request(self, endpoint: str, method: str, url: str, **kwargs):
+        start = time.monotonic()
+        response = await self.client.request(method, url, **kwargs)
+        self.latencies.record(endpoint, time.monotonic() - start)
+        return response
+
+    async def _hedged_request(self, endpoint: str, method: str, url: str, **kwargs):
+        """ Send a duplicate when the first request is slower than usual, the first answer wins. """
+
+        first = asyncio.create_task(self._timed_request(endpoint, method, url, **kwargs))
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay(endpoint))
+            if done:
+                return first.result()
+
+            self.metrics.increment("hedged_requests")
+            second = asyncio.create_task(self._timed_request(endpoint, method, url, **kwargs))
+            tasks.append(second)
+
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            winner = first if first in done else second
+
+            # a request that failed does not win while the other one may still answer
+            if winner.exception() is not None:
+                winner = second if winner is first else first
+                await asyncio.wait([winner])
+
+            if winner is second:
+                self.metrics.increment("hedge_wins")
+            return winner.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _read_through_cache(self, key: str, fetch, *args):
+        """ Serve key from the disk cache when it is there, a stale entry is refreshed in a background task. """
+        cached = self.cached_read(key)
+        if cached is None:
+            return await self._fetch_and_cache(key, fetch, *args)
+
+        result, is_stale = cached
+        task = self._revalidations.get(key)
+        if is_stale and (task is None or task.done()):
+            # a fresh context, so the refresh is not bound to the budget of the operation that started it
+            self._revalidations[key] = asyncio.create_task(self._fetch_and_cache(key, fetch, *args),
+                                                           context=contextvars.Context())
+            # a failed refresh keeps the cached result, its error is dropped
+            self._revalidations[key].add_done_callback(lambda done: done.cancelled() or done.exception())
+
+        return result
+
+    async def _fetch_and_cache(self, key: str, fetch, *args):
+        fetched_at = time.time()
+        result = await fetch(*args)
+        self.cache_result(key, result, fetched_at)
+        return result
+
+    @client_operation
     async def create_project(self, name: str, description: str):
         """ Create project on Azure DevOps organization. """
 
@@ -28,25 +153,38 @@ class AsyncAzureClient(AzureClient):
 
         data = AsyncAzureClient.create_project_data(name, description)
 
-        response = await self.client.post(AsyncAzureClient.END_POINTS["create_project"],
-                                          json=data)
+        response = await self._send("create_project", "POST", AsyncAzureClient.END_POINTS["create_project"],
+                                    json=data)
 
-        return super().handle_create_project_response(response, name)
+        result = super().handle_create_project_response(response, name)
 
+        if isinstance(result, Success):
+            self.invalidate_cached_project(name)
+
+        return result
+
+    @client_operation
     async def list_projects(self) -> Success | Error:
         """ List all projects on Azure DevOps organization. """
 
-        get_response = await self.client.get(AsyncAzureClient.END_POINTS["list_projects"])
+        return await self._read_through_cache("list_projects", self._fetch_projects)
+
+    async def _fetch_projects(self):
+        failed_response, all_projects = await self._list_all_projects()
+        if failed_response is not None:
+            return AsyncAzureClient.handle_list_projects_response(failed_response)
 
-        return AsyncAzureClient.handle_list_projects_response(get_response)
+        return AsyncAzureClient.listed_projects_result(all_projects)
 
+    @client_operation
     async def delete_project(self, project_name: str):
         """ Delete project from Azure DevOps organization. """
 
         if not isinstance(project_name, str):
             raise TypeError("Project name must be string.")
 
-        project = await self.get_project(project_name)
+        # the project id must be current, so the disk cache is not asked
+        project = await self._coalesced_project(project_name)
 
         result = AsyncAzureClient.check_get_project_response(project, project_name)
 
@@ -55,82 +193,569 @@ class AsyncAzureClient(AzureClient):
         else:
             project_id = result
 
-        response = await self.client.delete(
-            AsyncAzureClient.END_POINTS['delete_project'].format(project_id=project_id))
+        response = await self._send("delete_project", "DELETE",
+                                    AsyncAzureClient.END_POINTS['delete_project'].format(project_id=project_id))
+
+        result = super().handle_delete_project_response(response, project_name)
+
+        if isinstance(result, Success):
+            self.invalidate_cached_project(project_name)
+
+        return result
+
+    @client_operation
+    async def delete_projects(self, projects, wait: bool = False):
+        """ Delete many projects, projects is a list of names or a function that picks names to delete.
+
+        Ids come from one listing of all pages, at most max_workers deletions run at a time, and with wait the deletion
+        operations are polled together until they finished. The result has one entry per project.
+        """
+
+        AsyncAzureClient.check_projects_selection(projects, wait)
+
+        # the ids must be current, so the disk cache is not asked
+        failed_response, all_projects = await self._list_all_projects()
+        if failed_response is not None:
+            return AsyncAzureClient.handle_list_projects_response(failed_response)
+
+        targets, results = AsyncAzureClient.projects_to_delete(all_projects, projects)
+
+        deletions = await self._gather_bounded(self._delete_project_by_id(project_name, project_id)
+                                               for project_name, project_id in targets.items())
+        operations = {}
+        for project_name, (result, operation_id) in zip(targets, deletions):
+            results[project_name] = result
+            if operation_id is not None:
+                operations[project_name] = operation_id
+
+        if wait and operations:
+            for project_name, status in (await self._wait_for_operations(operations)).items():
+                results[project_name] = AsyncAzureClient.operation_result(project_name, results[project_name], status)
+
+        return AsyncAzureClient.handle_delete_projects(results)
+
+    async def _list_all_projects(self):
+        """ Every project of the organization page by page, returns the response that failed, or None and them. """
+        all_projects, continuation_token = [], None
+        while True:
+            response = await self._send("list_projects", "GET", AsyncAzureClient.END_POINTS["list_projects"],
+                                        params=AsyncAzureClient.projects_page_params(continuation_token))
+            if response.status_code != AsyncAzureClient.OK_STATUS_CODE:
+                return response, None
+
+            all_projects.extend(response.json()["value"])
+            continuation_token = response.headers.get(AsyncAzureClient.CONTINUATION_TOKEN_HEADER)
+            if not continuation_token:
+                return None, all_projects
+
+    async def _delete_project_by_id(self, project_name: str, project_id: str):
+        """ Result of deleting one project and the id of its deletion operation, None when it failed. """
+        try:
+            response = await self._send("delete_project", "DELETE",
+                                        AsyncAzureClient.END_POINTS['delete_project'].format(project_id=project_id))
+        except (ClientFailure, TransportError) as failure:
+            return AsyncAzureClient.failure_error(failure), None
+
+        result = self.handle_delete_project_response(response, project_name)
+        if isinstance(result, Error):
+            return result, None
+
+        self.invalidate_cached_project(project_name)
+        return result, response.json()["id"]
+
+    async def _wait_for_operations(self, operations: dict):
+        """ Poll all operations at once until every one finished, status or Error of each by project name. """
+        statuses = {}
+        pending = dict(operations)
 
-        return super().handle_delete_project_response(response, project_name)
+        with deadline_scope(AsyncAzureClient.OPERATION_WAIT_TIMEOUT) as deadline:
+            while pending:
+                polled = await self._gather_bounded(self._get_operation_status(operation_id)
+                                                    for operation_id in pending.values())
+                for project_name, status in zip(list(pending), polled):
+                    if isinstance(status, Error) or status in AsyncAzureClient.OPERATION_FINISHED_STATUSES:
+                        statuses[project_name] = status
+                        del pending[project_name]
 
+                if pending:
+                    await asyncio.sleep(max(0.0, min(AsyncAzureClient.OPERATION_POLL_INTERVAL, deadline.remaining())))
+
+        return statuses
+
+    async def _get_operation_status(self, operation_id: str):
+        try:
+            response = await self._send("get_operation", "GET",
+                                        AsyncAzureClient.END_POINTS['get_operation'].format(operation_id=operation_id))
+        except (ClientFailure, TransportError) as failure:
+            return AsyncAzureClient.failure_error(failure)
+
+        return AsyncAzureClient.operation_status(response)
+
+    @client_operation
     async def get_project(self, project_name: str):
         """ Get project info from Azure DevOps organization. """
 
         if not isinstance(project_name, str):
             raise TypeError("Project name must be string.")
 
-        response = await self.client.get(
-            AsyncAzureClient.END_POINTS['get_project'].format(project_name=project_name))
+        return await self._read_through_cache(AsyncAzureClient.project_cache_key(project_name),
+                                              self._coalesced_project, project_name)
+
+    async def _coalesced_project(self, project_name: str):
+        return await self._single_flight.do(("get_project", project_name), self._fetch_project, project_name)
+
+    async def _fetch_project(self, project_name: str):
+        response = await self._send("get_project", "GET",
+                                    AsyncAzureClient.END_POINTS['get_project'].format(project_name=project_name))
 
         return AsyncAzureClient.handle_get_project_response(response, project_name)
 
-    async def create_work_item(self, project_id: str, work_item_type: str, work_item_value: str):
-        """ Create work item on Azure DevOps organization. """
+    @client_operation
+    async def create_work_item(self, project_id: str, work_item_type: str, work_item_value: str,
+                               idempotency_key: str = None):
+        """ Create work item on Azure DevOps organization.
+
+        With idempotency_key the work item is tagged with it, and a retry after a failure that may have
+        created it first looks for the key, returning the work item already created instead of another one.
+        """
 
         if not isinstance(project_id, str) or \
                 not isinstance(work_item_type, str) or not isinstance(work_item_value, str):
             raise TypeError("Project id, work item type and work item value must be strings.")
+        AsyncAzureClient.check_idempotency_key(idempotency_key)
+
+        return await self._create_work_item(project_id, work_item_type, work_item_value,
+                                            idempotency_key=idempotency_key)
+
+    async def _create_work_item(self, project_id: str, work_item_type: str, work_item_value: str,
+                                notify: bool = True, idempotency_key: str = None):
+        if idempotency_key is not None and self.is_in_doubt(idempotency_key):
+            found = await self._find_idempotency_keys(project_id, [idempotency_key])
+            if isinstance(found, Error):
+                return found
+            if idempotency_key in found:
+                self.settle_key(idempotency_key, False)
+                return AsyncAzureClient.existing_work_item_result(found[idempotency_key])
+
+        data = AsyncAzureClient.create_work_item_data(work_item_value, idempotency_key)
+
+        try:
+            response = await self._send(
+                "create_work_item", "POST",
+                AsyncAzureClient.END_POINTS['create_work_item'].format(project_id=project_id,
+                                                                       work_item_type=work_item_type),
+                json=data, headers=self._json_patch_headers)
+        except BaseException:
+            if idempotency_key is not None:
+                self.settle_key(idempotency_key, True)
+            raise
+
+        if idempotency_key is not None:
+            self.settle_key(idempotency_key, AsyncAzureClient.creation_in_doubt(response))
+
+        result = self.handle_create_work_item_response(response, project_id, work_item_type, work_item_value,
+                                                       notify)
+
+        if isinstance(result, Success):
+            self.prefetched.put(response.json()["fields"]["System.TeamProject"], result.response["id"],
+                                {"title": result.response["title"], "type": result.response["type"]})
+            self.detail_cache.store(response.json())
+
+        return result
+
+    async def _gather_bounded(self, coroutines):
+        """ Await all coroutines concurrently, running at most max_workers at a time. """
+        semaphore = asyncio.Semaphore(self.settings.max_workers)
+        coroutines = list(coroutines)
+
+        async def run(coroutine):
+            async with semaphore:
+                return await coroutine
+
+        try:
+            return await asyncio.gather(*(run(coroutine) for coroutine in coroutines))
+        finally:
+            # when cancelled, coroutines still waiting for the semaphore were never started
+            for coroutine in coroutines:
+                if inspect.getcoroutinestate(coroutine) == inspect.CORO_CREATED:
+                    coroutine.close()
+
+    @client_operation
+    async def find_idempotency_keys(self, project_name: str, idempotency_keys: list):
+        """ Work items created with any of the idempotency keys, by key. """
+
+        if not isinstance(project_name, str) or not isinstance(idempotency_keys, list):
+            raise TypeError("Project name must be string and idempotency keys must be list of strings.")
+        for idempotency_key in idempotency_keys:
+            AsyncAzureClient.check_idempotency_key(idempotency_key)
+
+        found = await self._find_idempotency_keys(project_name, list(dict.fromkeys(idempotency_keys)))
+        if isinstance(found, Error):
+            return found
+
+        return AsyncAzureClient.handle_found_keys(found)
+
+    async def _find_idempotency_keys(self, project_name: str, idempotency_keys: list):
+        """ Work item json by key of the keys found, KEYS_PER_QUERY keys per query, or Error. """
+
+        chunks = await self._gather_bounded(
+            self._find_keys_chunk(project_name, keys_chunk)
+            for keys_chunk in AsyncAzureClient.chunks(idempotency_keys, AsyncAzureClient.KEYS_PER_QUERY))
+
+        found = {}
+        for failed_response, keys_found in chunks:
+            if failed_response is not None:
+                return AsyncAzureClient.handle_falied_list_work_items_response(failed_response, project_name)
+            found.update(keys_found)
+
+        return found
+
+    async def _find_keys_chunk(self, project_name: str, idempotency_keys: list):
+        """ Returns the response that failed, or None and the work item json by key of the keys found. """
+
+        response = await self._send(
+            "list_work_items", "POST",
+            AsyncAzureClient.END_POINTS['list_work_items'].format(project_name=project_name),
+            json=AsyncAzureClient.idempotency_keys_body(idempotency_keys))
+        if response.status_code != AsyncAzureClient.OK_STATUS_CODE:
+            return response, None
+
+        work_item_ids = [work_item["id"] for work_item in response.json()["workItems"]]
+        if not work_item_ids:
+            return None, {}
+
+        # CONTAINS matches parts of tags too, so the tags of the work items found are checked again
+        work_items = []
+        for ids_chunk in AsyncAzureClient.chunks(work_item_ids, AsyncAzureClient.WORK_ITEMS_PER_BATCH):
+            response = await self._get_work_items_batch(project_name, ids_chunk, AsyncAzureClient.IDEMPOTENCY_FIELDS)
+            if response.status_code != AsyncAzureClient.OK_STATUS_CODE:
+                return response, None
+            work_items.extend(response.json()["value"])
+
+        return None, AsyncAzureClient.work_items_by_key(idempotency_keys, work_items)
 
-        data = AsyncAzureClient.create_work_item_data(work_item_value)
+    @client_operation
+    async def get_work_item_details(self, url, fields: list = None):
+        """ Get one work item by its url, only with the given fields. """
 
-        response = await self.client.post(
-            AsyncAzureClient.END_POINTS['create_work_item'].format(project_id=project_id,
-                                                                   work_item_type=work_item_type),
-            json=data, headers=self._json_patch_headers)
+        response = await self._send("get_work_item", "GET", url,
+                                    params={"fields": ",".join(fields or AsyncAzureClient.LIST_FIELDS)})
+        item_json = response.json()
+        return {item_json["id"]: AsyncAzureClient.work_item_summary(item_json)}
 
-        return super().handle_create_work_item_response(response, project_id, work_item_type,
-                                                        work_item_value)
+    @client_operation
+    async def list_work_items(self, project_name: str, fields: list = None, query: WorkItemQuery = None):
+        """ List work items on Azure DevOps organization.
 
-    async def list_work_items(self, project_name: str):
-        """ List work items on Azure DevOps organization. """
+        Only title and type are downloaded, fields adds more of them to each work item and query
+        keeps only the work items matching its filters.
+        """
 
         if not isinstance(project_name, str):
             raise TypeError("Project id must be string.")
+        AsyncAzureClient.check_query(query)
 
-        body = AsyncAzureClient.list_work_items_body(project_name)
+        if fields is None and query is None and self.prefetched.is_started(project_name):
+            return await self._list_prefetched_work_items(project_name)
 
-        response = await self.client.post(
+        return await self._list_work_items(project_name, fields, query)
+
+    async def _list_work_items(self, project_name: str, fields: list = None, query: WorkItemQuery = None):
+        fields = AsyncAzureClient.projected_fields(AsyncAzureClient.LIST_FIELDS, fields)
+
+        body = AsyncAzureClient.list_work_items_body(project_name, query)
+
+        response = await self._send(
+            "list_work_items", "POST",
             AsyncAzureClient.END_POINTS['list_work_items'].format(project_name=project_name),
             json=body)
 
         if response.status_code == AsyncAzureClient.OK_STATUS_CODE:
-            work_items = response.json()["workItems"]
+            work_item_ids = [work_item["id"] for work_item in response.json()["workItems"]]
             result_response = {}
-            for work_item in work_items:
-                # Query By Wiql just get the url of work item
-                # So I use Get on the url to get the details of work item
-                item = await self.client.get(work_item["url"])
 
-                item_json = item.json()
-                result_response.update(
-                    {item_json["id"]: {"title": item_json["fields"]["System.Title"],
-                                       "type": item_json["fields"]["System.WorkItemType"]}})
+            # Query By Wiql just get the ids of work items, so get their details in batches of 200
+            batches = await self._gather_bounded(
+                self._get_cached_work_items(project_name, ids_chunk, fields)
+                for ids_chunk in AsyncAzureClient.chunks(work_item_ids, AsyncAzureClient.WORK_ITEMS_PER_BATCH))
+
+            for failed_response, work_items in batches:
+                if failed_response is not None:
+                    return AsyncAzureClient.handle_falied_list_work_items_response(failed_response, project_name)
+                for item_json in work_items:
+                    if query is None or query.matches(item_json):
+                        result_response[item_json["id"]] = AsyncAzureClient.work_item_summary(item_json)
 
             return Success(message="Work items listed successfully.", response=result_response,
                            status_code=AsyncAzureClient.OK_STATUS_CODE)
 
         return AsyncAzureClient.handle_falied_list_work_items_response(response, project_name)
 
+    @client_operation
+    async def iter_work_items(self, project_name: str, fields: list = None, query: WorkItemQuery = None):
+        """ Stream work items of project while they are fetched.
+
+        Returns an AsyncWorkItemStream that yields work items in id order, or Error when the query failed.
+        """
+
+        if not isinstance(project_name, str):
+            raise TypeError("Project id must be string.")
+        AsyncAzureClient.check_query(query)
+
+        if fields is None and query is None and self.prefetched.listing(project_name) is not None:
+            work_items = (await self.list_work_items(project_name)).response
+            return AsyncWorkItemStream(len(work_items), AsyncAzureClient._iterate_listing(work_items))
+
+        fields = AsyncAzureClient.projected_fields(AsyncAzureClient.LIST_FIELDS, fields)
+
+        response = await self._send(
+            "list_work_items", "POST",
+            AsyncAzureClient.END_POINTS['list_work_items'].format(project_name=project_name),
+            json=AsyncAzureClient.list_work_items_body(project_name, query))
+
+        if response.status_code != AsyncAzureClient.OK_STATUS_CODE:
+            return AsyncAzureClient.handle_falied_list_work_items_response(response, project_name)
+
+        work_item_ids = [work_item["id"] for work_item in response.json()["workItems"]]
+        stream = AsyncWorkItemStream(len(work_item_ids))
+        # the batches are fetched while the stream is read, after this operation returned, so they keep its
+        # deadline and priority
+        stream.work_items = self._stream_work_items(project_name, work_item_ids, fields, stream, query,
+                                                    contextvars.copy_context())
+
+        return stream
+
+    @staticmethod
+    async def _iterate_listing(work_items: dict):
+        for work_item_id, work_item in sorted(work_items.items()):
+            yield {"id": work_item_id, **work_item}
+
+    async def _stream_work_items(self, project_name: str, work_item_ids: list, fields: list,
+                                 stream: AsyncWorkItemStream, query: WorkItemQuery, context: contextvars.Context):
+        """ Yield work items batch by batch, keeping at most max_workers batches in flight, each fetched in
+        context. """
+        def fetch(ids_chunk):
+            # a task runs in a copy of the context it is created in
+            return context.run(asyncio.create_task, self._get_work_items_batch(project_name, ids_chunk, fields))
+
+        ids_chunks = iter(AsyncAzureClient.chunks(work_item_ids, AsyncAzureClient.WORK_ITEMS_PER_BATCH))
+        pending = deque(fetch(ids_chunk) for ids_chunk in itertools.islice(ids_chunks, self.settings.max_workers))
+
+        try:
+            while pending:
+                try:
+                    response = await pending.popleft()
+                except ClientFailure as failure:
+                    stream.error = failure.error
+                    return
+
+                next_chunk = next(ids_chunks, None)
+                if next_chunk is not None:
+                    pending.append(fetch(next_chunk))
+
+                if response.status_code != AsyncAzureClient.OK_STATUS_CODE:
+                    stream.error = AsyncAzureClient.handle_falied_list_work_items_response(response, project_name)
+                    return
+
+                for item_json in response.json()["value"]:
+                    if query is None or query.matches(item_json):
+                        yield {"id": item_json["id"], **AsyncAzureClient.work_item_summary(item_json)}
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @client_operation
+    async def org_stats(self, refresh: bool = False):
+        """ Work item counts by type and by state of every project and of the whole organization.
+
+        Only type and state of each work item are downloaded, all projects at the same time. The result is
+        kept for ORG_STATS_TTL seconds, refresh asks Azure again before that.
+        """
+
+        if not isinstance(refresh, bool):
+            raise TypeError("Refresh must be boolean.")
+
+        cached = None if refresh else self.cached_org_stats()
+        if cached is not None:
+            return cached
+
+        result = await self._single_flight.do(("org_stats",), self._collect_org_stats)
+        self.cache_org_stats(result)
+        return result
+
+    async def _collect_org_stats(self):
+        failed_response, all_projects = await self._list_all_projects()
+        if failed_response is not None:
+            return AsyncAzureClient.handle_list_projects_response(failed_response)
+
+        project_names = [project["name"] for project in all_projects]
+        queries = await self._gather_bounded(self._query_stats_ids(project_name) for project_name in project_names)
+
+        errors = {project_name: work_item_ids.message for project_name, work_item_ids in zip(project_names, queries)
+                  if isinstance(work_item_ids, Error)}
+        chunks = [(project_name, ids_chunk) for project_name, work_item_ids in zip(project_names, queries)
+                  if not isinstance(work_item_ids, Error)
+                  for ids_chunk in AsyncAzureClient.chunks(work_item_ids, AsyncAzureClient.WORK_ITEMS_PER_BATCH)]
+        batches = await self._gather_bounded(self._get_stats_batch(project_name, ids_chunk)
+                                             for project_name, ids_chunk in chunks)
+
+        project_items = {project_name: [] for project_name, work_item_ids in zip(project_names, queries)
+                         if not isinstance(work_item_ids, Error)}
+        for (project_name, _), batch in zip(chunks, batches):
+            if isinstance(batch, Error):
+                errors[project_name] = batch.message
+            elif project_name not in errors:
+                project_items[project_name].extend(batch)
+
+        project_stats = {project_name: AsyncAzureClient.count_work_items(work_items)
+                         for project_name, work_items in project_items.items() if project_name not in errors}
+
+        return AsyncAzureClient.handle_org_stats(project_stats, errors)
+
+    async def _query_stats_ids(self, project_name: str):
+        """ Ids of every work item of project, or Error. """
+        try:
+            response = await self._send(
+                "list_work_items", "POST",
+                AsyncAzureClient.END_POINTS['list_work_items'].format(project_name=project_name),
+                json=AsyncAzureClient.list_work_items_body(project_name))
+        except (ClientFailure, TransportError) as failure:
+            return AsyncAzureClient.failure_error(failure)
+
+        if response.status_code != AsyncAzureClient.OK_STATUS_CODE:
+            return AsyncAzureClient.handle_falied_list_work_items_response(response, project_name)
+        return [work_item["id"] for work_item in response.json()["workItems"]]
+
+    async def _get_stats_batch(self, project_name: str, work_item_ids: list):
+        """ Type and state of up to 200 work items, or Error. """
+        try:
+            response = await self._get_work_items_batch(project_name, work_item_ids, AsyncAzureClient.STATS_FIELDS)
+        except (ClientFailure, TransportError) as failure:
+            return AsyncAzureClient.failure_error(failure)
+
+        if response.status_code != AsyncAzureClient.OK_STATUS_CODE:
+            return AsyncAzureClient.handle_falied_list_work_items_response(response, project_name)
+        return response.json()["value"]
+
+    @client_operation
+    async def clone_project_work_items(self, source_project_name: str, target_project_name: str):
+        """ Copy title and type of every work item of source project into target project.
+
+        Work items are created while the source is still streamed, at most max_workers at a time,
+        and the ones that fail are reported in the result instead of stopping the copy.
+        """
+
+        if not isinstance(source_project_name, str) or not isinstance(target_project_name, str):
+            raise TypeError("Source and target project names must be strings.")
+
+        target_project_id = AsyncAzureClient.check_get_project_response(
+            await self._coalesced_project(target_project_name), target_project_name)
+        if isinstance(target_project_id, Error):
+            return target_project_id
+
+        stream = await self.iter_work_items(source_project_name)
+        if isinstance(stream, Error):
+            return stream
+
+        started = time.monotonic()
+        created = 0
+        errors = []
+        pending = deque()
+        try:
+            async for work_item in stream:
+                pending.append((work_item, asyncio.create_task(self._create_work_item(
+                    target_project_id, work_item["type"], work_item["title"], False))))
+                if len(pending) >= self.settings.max_workers:
+                    created += await self._collect_clone(*pending.popleft(), errors)
+
+            while pending:
+                created += await self._collect_clone(*pending.popleft(), errors)
+        finally:
+            await stream.aclose()
+            for _, task in pending:
+                task.cancel()
+            await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
+
+        if stream.error:
+            return stream.error
+
+        return self.handle_clone_result(source_project_name, target_project_name, created, errors, started)
+
+    @staticmethod
+    async def _collect_clone(work_item, task: asyncio.Task, errors: list):
+        """ Wait for the copy of one work item, 1 when it was created and 0 when its error was added. """
+        try:
+            result = await task
+        except ClientFailure as failure:
+            result = failure.error
+        except TransportError as error:
+            result = error
+
+        if isinstance(result, Success):
+            return 1
+
+        errors.append(AsyncAzureClient.clone_error(work_item, result))
+        return 0
+
+    async def prefetch_work_items(self, project_name: str):
+        """ Start listing work items of project in a background task.
+
+        Until stop_prefetch, listings and title lookups of the project are served from the result
+        and every listing refreshes it in the background.
+        """
+
+        if not isinstance(project_name, str):
+            raise TypeError("Project name must be string.")
+
+        self.prefetched.start(project_name)
+
+        task = self._prefetch_tasks.get(project_name)
+        if task is None or task.done():
+            task = asyncio.create_task(self._refresh_prefetch(project_name))
+            self._prefetch_tasks[project_name] = task
+
+        return task
+
+    async def _refresh_prefetch(self, project_name: str):
+        result = await self._list_work_items(project_name)
+
+        if isinstance(result, Success):
+            self.prefetched.store(project_name, result.response)
+
+        return result
+
+    async def _list_prefetched_work_items(self, project_name: str):
+        work_items = self.prefetched.listing(project_name)
+        task = await self.prefetch_work_items(project_name)
+
+        if work_items is None:
+            # first prefetch still running, wait for it instead of sending the same listing again
+            return await asyncio.shield(task)
+
+        self.metrics.increment("prefetch_hits")
+        return Success(message="Work items listed successfully.", response=work_items,
+                       status_code=AsyncAzureClient.OK_STATUS_CODE)
+
     async def _get_work_item_id(self, project_name: str, work_item_title: str):
         """ Get work item id by name from Azure DevOps organization. """
 
         if not isinstance(project_name, str) or not isinstance(work_item_title, str):
             raise TypeError("Project id and work item title must be strings.")
 
-        body = {
-            "query": "Select id From WorkItems where System.Title = '" + work_item_title +
-                     f"' and [System.TeamProject] = '{project_name}'"
-        }
+        work_item_id = self.prefetched.work_item_id(project_name, work_item_title)
+        if work_item_id is not None:
+            self.metrics.increment("prefetch_hits")
+            return work_item_id
+
+        return await self._single_flight.do(("get_work_item_id", project_name, work_item_title),
+                                            self._query_work_item_id, project_name, work_item_title)
 
-        response = await self.client.post(
-            format(AsyncAzureClient.END_POINTS['list_work_items'].format(project_name=project_name)), json=body)
+    async def _query_work_item_id(self, project_name: str, work_item_title: str):
+        body = AsyncAzureClient.list_work_items_body(project_name, WorkItemQuery().title(work_item_title))
+
+        response = await self._send(
+            "list_work_items", "POST",
+            AsyncAzureClient.END_POINTS['list_work_items'].format(project_name=project_name), json=body)
 
         if response.status_code == AsyncAzureClient.OK_STATUS_CODE:
             if response.json()["workItems"]:
@@ -142,6 +767,71 @@ class AsyncAzureClient(AzureClient):
 
         return "not found."
 
+    async def _get_cached_work_items(self, project_name: str, work_item_ids: list, fields: list):
+        """ Details of up to 200 work items, fresh cached ones are not downloaded and stale ones only when their
+        revision changed. Returns the response that failed, or None and the work items in the order of the ids. """
+
+        work_items, stale, missing = self.detail_cache.lookup(work_item_ids, fields)
+
+        if stale:
+            response = await self._get_work_items_batch(project_name, list(stale), AsyncAzureClient.REV_FIELDS)
+            if response.status_code != AsyncAzureClient.OK_STATUS_CODE:
+                return response, None
+            missing.extend(self.revalidated_work_items(response.json()["value"], stale, fields, work_items))
+
+        if missing:
+            response = await self._get_work_items_batch(project_name, missing, fields)
+            if response.status_code != AsyncAzureClient.OK_STATUS_CODE:
+                return response, None
+            for item_json in response.json()["value"]:
+                self.detail_cache.store(item_json, fields)
+                work_items[item_json["id"]] = item_json
+
+        return None, [work_items[work_item_id] for work_item_id in work_item_ids if work_item_id in work_items]
+
+    async def _get_work_items_batch(self, project_name: str, work_item_ids: list, fields: list):
+        """ Get details of up to 200 work items in one request. """
+
+        return await self._send(
+            "get_work_items_batch", "POST",
+            AsyncAzureClient.END_POINTS['get_work_items_batch'].format(project_name=project_name),
+            json=AsyncAzureClient.work_items_batch_body(work_item_ids, fields))
+
+    @client_operation
+    async def get_work_items_by_titles(self, project_name: str, titles: list):
+        """ Get all work items matching any of the titles, grouped by title. """
+
+        if not isinstance(project_name, str) or not isinstance(titles, list) or \
+                not all(isinstance(title, str) for title in titles):
+            raise TypeError("Project name must be string and titles must be list of strings.")
+
+        titles = list(dict.fromkeys(titles))
+        url = AsyncAzureClient.END_POINTS['list_work_items'].format(project_name=project_name)
+
+        responses = await self._gather_bounded(
+            self._send("list_work_items", "POST", url,
+                       json=AsyncAzureClient.work_items_by_titles_body(project_name, titles_chunk))
+            for titles_chunk in AsyncAzureClient.titles_chunks(project_name, titles))
+
+        work_item_ids = []
+        for response in responses:
+            if response.status_code != AsyncAzureClient.OK_STATUS_CODE:
+                return AsyncAzureClient.handle_falied_list_work_items_response(response, project_name)
+            work_item_ids.extend(work_item["id"] for work_item in response.json()["workItems"])
+
+        responses = await self._gather_bounded(
+            self._get_work_items_batch(project_name, ids_chunk, AsyncAzureClient.WORK_ITEM_FIELDS)
+            for ids_chunk in AsyncAzureClient.chunks(work_item_ids, AsyncAzureClient.WORK_ITEMS_PER_BATCH))
+
+        work_items = []
+        for response in responses:
+            if response.status_code != AsyncAzureClient.OK_STATUS_CODE:
+                return AsyncAzureClient.handle_falied_list_work_items_response(response, project_name)
+            work_items.extend(response.json()["value"])
+
+        return AsyncAzureClient.handle_work_items_by_titles(titles, work_items)
+
+    @client_operation
     async def update_work_item(self, project_name: str, work_item_title: str,
                                new_work_item_title: str):
         """ Update work item on Azure DevOps organization. """
@@ -159,13 +849,20 @@ class AsyncAzureClient(AzureClient):
         else:
             body = result
 
-        response = await self.client.patch(AsyncAzureClient.END_POINTS['update_work_item']
-                                           .format(project_name=project_name, work_item_id=work_item),
-                                           json=body, headers=self._json_patch_headers)
+        response = await self._send("update_work_item", "PATCH",
+                                    AsyncAzureClient.END_POINTS['update_work_item']
+                                    .format(project_name=project_name, work_item_id=work_item),
+                                    json=body, headers=self._json_patch_headers)
+
+        result = super().handle_update_work_item_response(response, work_item_title, new_work_item_title)
+
+        if isinstance(result, Success):
+            self.prefetched.rename(project_name, work_item, new_work_item_title)
+            self.detail_cache.store(response.json())
 
-        return super().handle_update_work_item_response(response, work_item_title,
-                                                        new_work_item_title)
+        return result
 
+    @client_operation
     async def delete_work_item(self, project_name: str, work_item_title: str):
         """ Delete work item on Azure DevOps organization."""
 
@@ -179,13 +876,24 @@ class AsyncAzureClient(AzureClient):
         if isinstance(result, Error):
             return result
 
-        response = await self.client.delete(AsyncAzureClient.END_POINTS['delete_work_item']
-                                            .format(project_name=project_name, work_item_id=work_item_id))
+        response = await self._send("delete_work_item", "DELETE",
+                                    AsyncAzureClient.END_POINTS['delete_work_item']
+                                    .format(project_name=project_name, work_item_id=work_item_id))
+
+        result = super().handle_delete_work_item_response(response, project_name, work_item_title)
+
+        if isinstance(result, Success):
+            self.prefetched.remove(project_name, work_item_id)
+            self.detail_cache.remove(work_item_id)
 
-        return super().handle_delete_work_item_response(response, project_name, work_item_title)
+        return result
 
-    async def get_work_item(self, project_name: str, work_item_title: str):
-        """ Get work item from Azure DevOps organization."""
+    @client_operation
+    async def get_work_item(self, project_name: str, work_item_title: str, fields: list = None):
+        """ Get work item from Azure DevOps organization.
+
+        Only title, type and state are downloaded, fields adds more of them to the work item.
+        """
 
         if not isinstance(project_name, str) or not isinstance(work_item_title, str):
             raise TypeError("Project id and work item title must be strings.")
@@ -197,11 +905,29 @@ class AsyncAzureClient(AzureClient):
         if isinstance(result, Error):
             return result
 
-        response = await self.client.get(AsyncAzureClient.END_POINTS['get_work_item']
-                                         .format(project_name=project_name, work_item_id=work_item_id))
+        fields = AsyncAzureClient.projected_fields(AsyncAzureClient.WORK_ITEM_FIELDS, fields)
+
+        # checking the revision of a stale work item takes a request as well, so it is downloaded again
+        cached, _, _ = self.detail_cache.lookup([work_item_id], fields, revalidate=False)
+        if cached:
+            return AsyncAzureClient.cached_work_item_result(cached[work_item_id])
+
+        response = await self._send("get_work_item", "GET",
+                                    AsyncAzureClient.END_POINTS['get_work_item']
+                                    .format(project_name=project_name, work_item_id=work_item_id),
+                                    params={"fields": ",".join(fields)})
 
-        return AsyncAzureClient.handle_get_work_item_response(response)
+        result = AsyncAzureClient.handle_get_work_item_response(response)
+        if isinstance(result, Success):
+            self.detail_cache.store(response.json(), fields)
+
+        return result
 
     async def close(self):
         """ Close connection to Azure DevOps organization."""
+        background_tasks = [*self._prefetch_tasks.values(), *self._revalidations.values()]
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+
         await self.client.aclose()
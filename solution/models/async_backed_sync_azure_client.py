@@ -0,0 +1,112 @@
+""" Sync facade over the async azure client module. """
+import asyncio
+import contextvars
+import functools
+import threading
+
+from solution.models.async_azure_client import AsyncAzureClient
+from solution.models.wiql import WorkItemQuery
+from solution.models.work_item_stream import AsyncWorkItemStream, WorkItemStream
+from solution.telegram_bot import TelegramBot
+
+
+class AsyncBackedSyncAzureClient:
+    """ Sync Azure Client that runs one AsyncAzureClient on a background event loop thread.
+
+    Every call is submitted to the loop and waited for, so sync callers share the async
+    client's fan-out and any method added to AsyncAzureClient is available here as well.
+    Calls run in a copy of the caller's context, so deadline_scope and priority_scope of the
+    caller apply on the loop too.
+    """
+
+    def __init__(self, settings: dict = None, telegram_bot: TelegramBot = None) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="azure-client-loop", daemon=True)
+        self._thread.start()
+
+        try:
+            self.async_client: AsyncAzureClient = self._run(self._create_async_client(settings, telegram_bot))
+        except Exception:
+            self._stop_loop()
+            raise
+
+    @staticmethod
+    async def _create_async_client(settings, telegram_bot):
+        # build the client inside the loop so everything it creates belongs to that loop
+        return AsyncAzureClient(settings, telegram_bot)
+
+    def _submit(self, coroutine):
+        """ Schedule coroutine on the background loop in a copy of the caller's context, returns its
+        concurrent.futures.Future. """
+        # the loop runs the callback that creates the task in the context it was scheduled from
+        return contextvars.copy_context().run(asyncio.run_coroutine_threadsafe, coroutine, self._loop)
+
+    def _run(self, coroutine):
+        """ Run coroutine on the background loop and wait for its result. """
+        return self._submit(coroutine).result()
+
+    def _stop_loop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __getattr__(self, name):
+        # only called for names missing on the facade, e.g. every public client operation
+        if name == "async_client":
+            raise AttributeError(name)
+
+        attribute = getattr(self.async_client, name)
+
+        if not asyncio.iscoroutinefunction(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        def wrapper(*args, **kwargs):
+            return self._run(attribute(*args, **kwargs))
+
+        return wrapper
+
+    def iter_work_items(self, project_name: str, fields: list = None, query: WorkItemQuery = None, **kwargs):
+        """ Stream work items of project, each batch is pulled through the background loop. timeout and
+        priority keywords apply as on the async client. """
+        async_stream = self._run(self.async_client.iter_work_items(project_name, fields, query, **kwargs))
+
+        if not isinstance(async_stream, AsyncWorkItemStream):
+            return async_stream
+
+        stream = WorkItemStream(async_stream.total)
+        stream.work_items = self._pull(async_stream, stream)
+        return stream
+
+    def prefetch_work_items(self, project_name: str):
+        """ Start listing work items of project on the background loop.
+
+        Returns a concurrent.futures.Future of the listing, the task itself belongs to the loop thread.
+        """
+        task = self._run(self.async_client.prefetch_work_items(project_name))
+        return self._submit(AsyncBackedSyncAzureClient._result_of(task))
+
+    @staticmethod
+    async def _result_of(task: asyncio.Task):
+        # shielded, cancelling the returned future leaves the prefetch running for the listings that use it
+        return await asyncio.shield(task)
+
+    def _pull(self, async_stream: AsyncWorkItemStream, stream: WorkItemStream):
+        work_items = async_stream.__aiter__()
+        try:
+            while True:
+                try:
+                    yield self._run(work_items.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            stream.error = async_stream.error
+            self._run(work_items.aclose())
+            self._run(async_stream.aclose())
+
+    def close(self):
+        """ Close connection to Azure DevOps organization and stop the background loop."""
+        try:
+            self._run(self.async_client.close())
+        finally:
+            self._stop_loop()
@@ -0,0 +1,189 @@
+""" Cassette module, httpx transports that record real traffic to a file and replay it later. """
+import asyncio
+import base64
+import json
+import threading
+import time
+from collections import defaultdict, deque
+
+import httpx
+
+REPLAY_TIMINGS = ["original", "none"]
+
+# response headers kept in a cassette, nothing that identifies the caller is written
+RECORDED_HEADERS = ["content-type"]
+
+# headers about the body on the wire, wrong once the body was read and decoded
+WIRE_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+class CassetteMissError(LookupError):
+    """ Raised when a replayed client sends a request that the cassette never recorded. """
+
+
+def request_key(request: httpx.Request):
+    """ Method, path with query and body of request, the host is left out so a cassette replays behind any base_url. """
+    return request.method, request.url.raw_path.decode("ascii"), request.content.decode("utf-8", errors="replace")
+
+
+def decoded_response(response: httpx.Response, content: bytes, request: httpx.Request):
+    """ Response with the decoded content that was read from response, so it is not decoded again. """
+    headers = [(name, value) for name, value in response.headers.multi_items() if name.lower() not in WIRE_HEADERS]
+    # streamed, so the client counts the content as downloaded
+    return httpx.Response(response.status_code, headers=headers, stream=httpx.ByteStream(content), request=request)
+
+
+def encode_content(content: bytes):
+    try:
+        return {"content": content.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"content_base64": base64.b64encode(content).decode("ascii")}
+
+
+def decode_content(interaction: dict):
+    if "content_base64" in interaction:
+        return base64.b64decode(interaction["content_base64"])
+    return interaction["content"].encode("utf-8")
+
+
+class CassetteWriter:
+    """ Append interactions to a cassette file, one JSON line each. """
+
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, request: httpx.Request, response: httpx.Response, content: bytes, elapsed: float):
+        # the request headers carry the token, so only method, url and body are kept
+        interaction = {
+            "method": request.method,
+            "url": str(request.url),
+            "path": request.url.raw_path.decode("ascii"),
+            "request_content": request.content.decode("utf-8", errors="replace"),
+            "status_code": response.status_code,
+            "headers": {name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers},
+            "elapsed": elapsed,
+            **encode_content(content),
+        }
+        with self._lock:
+            self._file.write(json.dumps(interaction) + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class RecordingTransport(httpx.BaseTransport):
+    """ Send requests through transport and record every answer with how long it took. """
+
+    def __init__(self, transport: httpx.BaseTransport, path: str) -> None:
+        self._transport = transport
+        self._writer = CassetteWriter(path)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        response = self._transport.handle_request(request)
+        try:
+            content = response.read()
+        finally:
+            response.close()
+        elapsed = time.perf_counter() - started
+
+        recorded = decoded_response(response, content, request)
+        self._writer.write(request, recorded, content, elapsed)
+        return recorded
+
+    def close(self):
+        self._transport.close()
+        self._writer.close()
+
+
+class AsyncRecordingTransport(httpx.AsyncBaseTransport):
+    """ Send requests through transport and record every answer with how long it took. """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, path: str) -> None:
+        self._transport = transport
+        self._writer = CassetteWriter(path)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self._transport.handle_async_request(request)
+        try:
+            content = await response.aread()
+        finally:
+            await response.aclose()
+        elapsed = time.perf_counter() - started
+
+        recorded = decoded_response(response, content, request)
+        self._writer.write(request, recorded, content, elapsed)
+        return recorded
+
+    async def aclose(self):
+        await self._transport.aclose()
+        self._writer.close()
+
+
+class Cassette:
+    """ Recorded interactions by method, path and body, served in the order they were recorded.
+
+    Once the interactions of a request are used up the last one is served again, so a cassette
+    recorded once can be replayed any number of times.
+    """
+
+    def __init__(self, path: str, timing: str = "original") -> None:
+        if timing not in REPLAY_TIMINGS:
+            raise ValueError(f"Replay timing must be one of {', '.join(REPLAY_TIMINGS)}.")
+
+        self.timing = timing
+        self._lock = threading.Lock()
+        self._interactions = defaultdict(deque)
+
+        with open(path, encoding="utf-8") as cassette_file:
+            for line in cassette_file:
+                if line.strip():
+                    interaction = json.loads(line)
+                    key = (interaction["method"], interaction["path"], interaction["request_content"])
+                    self._interactions[key].append(interaction)
+
+    def next_interaction(self, request: httpx.Request):
+        key = request_key(request)
+        with self._lock:
+            interactions = self._interactions.get(key)
+            if not interactions:
+                raise CassetteMissError(f"No recorded answer for {request.method} {request.url}.")
+
+            interaction = interactions[0]
+            if len(interactions) > 1:
+                interactions.popleft()
+
+        delay = interaction["elapsed"] if self.timing == "original" else 0.0
+        response = httpx.Response(interaction["status_code"], headers=interaction["headers"],
+                                  stream=httpx.ByteStream(decode_content(interaction)), request=request)
+        return response, delay
+
+
+class ReplayTransport(httpx.BaseTransport):
+    """ Answer requests from a cassette, after the recorded time or at once. """
+
+    def __init__(self, path: str, timing: str = "original") -> None:
+        self.cassette = Cassette(path, timing)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        response, delay = self.cassette.next_interaction(request)
+        if delay:
+            time.sleep(delay)
+        return response
+
+
+class AsyncReplayTransport(httpx.AsyncBaseTransport):
+    """ Answer requests from a cassette, after the recorded time or at once. """
+
+    def __init__(self, path: str, timing: str = "original") -> None:
+        self.cassette = Cassette(path, timing)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response, delay = self.cassette.next_interaction(request)
+        if delay:
+            await asyncio.sleep(delay)
+        return response
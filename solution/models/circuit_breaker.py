@@ -0,0 +1,114 @@
+""" Circuit breaker module, stops calling an endpoint that keeps failing. """
+import threading
+import time
+from collections import deque
+
+
+class CircuitBreaker:
+    """ Breaker of one endpoint.
+
+    closed: calls go through and their outcome is kept for the last window calls.
+    open: when at least failure_rate of the window failed, calls are refused for open_seconds.
+    half_open: after that a few probe calls go through, a success closes the circuit and a failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_rate: float = 0.5, window: int = 20, minimum_calls: int = 10,
+                 open_seconds: float = 30.0, half_open_calls: int = 1) -> None:
+        self.failure_rate = failure_rate
+        self.minimum_calls = minimum_calls
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window)
+        self._state = CircuitBreaker.CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._update_state()
+            return self._state
+
+    def allow(self) -> bool:
+        """ Whether a call may be sent now, every allowed call must be followed by record_success or record_failure. """
+        with self._lock:
+            self._update_state()
+
+            if self._state == CircuitBreaker.CLOSED:
+                return True
+            if self._state == CircuitBreaker.HALF_OPEN and self._probes < self.half_open_calls:
+                self._probes += 1
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state == CircuitBreaker.HALF_OPEN:
+                self._state = CircuitBreaker.CLOSED
+                self._outcomes.clear()
+                self._probes = 0
+            self._outcomes.append(True)
+
+    def record_failure(self):
+        with self._lock:
+            if self._state == CircuitBreaker.HALF_OPEN:
+                self._open()
+                return
+
+            self._outcomes.append(False)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.minimum_calls and failures / len(self._outcomes) >= self.failure_rate:
+                self._open()
+
+    def record_cancelled(self):
+        """ Allowed call ended without an outcome, e.g. it was cancelled, so its probe is free again. """
+        with self._lock:
+            if self._state == CircuitBreaker.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._update_state()
+            calls = len(self._outcomes)
+            return {
+                "state": self._state,
+                "calls": calls,
+                "failure_rate": self._outcomes.count(False) / calls if calls else 0.0,
+            }
+
+    def _open(self):
+        self._state = CircuitBreaker.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self._probes = 0
+
+    def _update_state(self):
+        if self._state == CircuitBreaker.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = CircuitBreaker.HALF_OPEN
+            self._probes = 0
+
+
+class CircuitBreakers:
+    """ One CircuitBreaker per endpoint, created on the first call to it. """
+
+    def __init__(self, **breaker_settings) -> None:
+        self._breaker_settings = breaker_settings
+        self._lock = threading.Lock()
+        self._breakers = {}
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker(**self._breaker_settings)
+            return self._breakers[endpoint]
+
+    def states(self) -> dict:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {endpoint: breaker.snapshot() for endpoint, breaker in breakers.items()}
@@ -0,0 +1,58 @@
+""" Client errors module, failures raised deep in a client and returned as Error by its public methods. """
+import functools
+import inspect
+
+from solution.models.data_classes.data_classes import Error
+from solution.models.deadline import deadline_scope
+from solution.models.profiler import operation_profile
+from solution.models.scheduler import check_priority, priority_scope
+
+
+class ClientFailure(Exception):
+    """ Stops a client operation, the public method that was called returns error instead. """
+
+    def __init__(self, error: Error) -> None:
+        super().__init__(error.message)
+        self.error = error
+
+
+def check_timeout(timeout):
+    if timeout is None:
+        return
+    if isinstance(timeout, bool) or not isinstance(timeout, (int, float)):
+        raise TypeError("Timeout must be number of seconds.")
+    if timeout <= 0:
+        raise ValueError("Timeout must be positive.")
+
+
+def client_operation(method):
+    """ Decorate public client methods so a ClientFailure becomes their returned Error.
+
+    The decorated method also accepts timeout, seconds the whole operation may take with all its requests,
+    and priority, the class its requests wait for a connection in. It is profiled when the client has profiling on.
+    """
+
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(*args, timeout: float = None, priority: str = None, **kwargs):
+            check_timeout(timeout)
+            check_priority(priority)
+            try:
+                with deadline_scope(timeout), priority_scope(priority), operation_profile(args[0], method.__name__):
+                    return await method(*args, **kwargs)
+            except ClientFailure as failure:
+                return failure.error
+
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(*args, timeout: float = None, priority: str = None, **kwargs):
+        check_timeout(timeout)
+        check_priority(priority)
+        try:
+            with deadline_scope(timeout), priority_scope(priority), operation_profile(args[0], method.__name__):
+                return method(*args, **kwargs)
+        except ClientFailure as failure:
+            return failure.error
+
+    return wrapper
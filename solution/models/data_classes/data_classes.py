@@ -16,10 +16,36 @@ class Error:
     status_code: int = None
 
 
+# error returned without calling Azure because the endpoint circuit is open
+@dataclass
+class CircuitOpenError(Error):
+    endpoint: str = None
+
+
+# error returned when the operation timeout ran out before all its requests were done
+@dataclass
+class DeadlineExceededError(Error):
+    timeout: float = None
+
+
 @dataclass
 class AzureSettings:
     token: str = None
     organization: str = None
+    base_url: str = None
+    max_workers: int = 20
+    hedge_reads: bool = False
+    hedge_percentile: float = 95.0
+    cache_dir: str = None
+    cache_ttl: float = 300.0
+    profile_dir: str = None
+    record_cassette: str = None
+    replay_cassette: str = None
+    replay_timing: str = "original"
+    priority_limits: dict = None
+    detail_cache_items: int = 10000
+    detail_cache_bytes: int = 64 * 1024 * 1024
+    detail_cache_ttl: float = 60.0
 
 
 @dataclass
@@ -0,0 +1,41 @@
+""" Deadline module, one time budget shared by every request of an operation. """
+import contextvars
+import time
+from contextlib import contextmanager
+
+_current_deadline = contextvars.ContextVar("azure_client_deadline", default=None)
+
+
+class Deadline:
+    """ Point in time an operation must be done by. """
+
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+
+def current_deadline():
+    """ Deadline of the operation running in this context, None when it has no budget. """
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(timeout: float = None):
+    """ Run the block under a budget of timeout seconds, an outer budget that ends sooner still wins. """
+    if timeout is None:
+        yield current_deadline()
+        return
+
+    deadline = Deadline(timeout)
+    outer = current_deadline()
+    if outer is not None and outer.expires_at < deadline.expires_at:
+        deadline = outer
+
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
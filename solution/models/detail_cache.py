@@ -0,0 +1,144 @@
+""" Work item detail cache module, details kept in memory by id and checked against Azure by revision. """
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class DetailEntry:
+    """ Work item json as downloaded, the fields asked for (None when it has all of them) and its size. """
+
+    def __init__(self, item_json: dict, fields, size: int, checked_at: float) -> None:
+        self.item_json = item_json
+        self.fields = fields
+        self.size = size
+        self.checked_at = checked_at
+
+    def has_fields(self, fields: list):
+        # Azure leaves empty fields out of a work item, so what was asked for counts, not what came back
+        return self.fields is None or self.fields.issuperset(fields)
+
+
+class WorkItemDetailCache:
+    """ Least recently used work item details, at most max_items of them taking at most max_bytes.
+
+    An entry younger than ttl seconds is served as it is, an older one has to be revalidated: its revision is asked
+    for, and it is served again when the revision did not change. Every entry keeps its revision, so an answer that
+    arrives late never replaces a newer one.
+    """
+
+    def __init__(self, max_items: int, max_bytes: int, ttl: float) -> None:
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._counts = {"hits": 0, "misses": 0, "revalidated": 0, "changed": 0, "evictions": 0}
+
+    @property
+    def enabled(self):
+        return self.max_items > 0 and self.max_bytes > 0
+
+    def lookup(self, work_item_ids: list, fields: list, revalidate: bool = True):
+        """ Fresh work items with the fields by id, revisions of the stale ones by id and the ids that must be
+        downloaded, stale ones included when they are not revalidated. """
+        if not self.enabled:
+            return {}, {}, list(work_item_ids)
+
+        fresh, stale, missing = {}, {}, []
+        now = time.monotonic()
+
+        with self._lock:
+            for work_item_id in work_item_ids:
+                entry = self._entries.get(work_item_id)
+                if entry is None or not entry.has_fields(fields):
+                    self._counts["misses"] += 1
+                    missing.append(work_item_id)
+                    continue
+
+                self._entries.move_to_end(work_item_id)
+                if now - entry.checked_at < self.ttl:
+                    self._counts["hits"] += 1
+                    fresh[work_item_id] = projected(entry.item_json, fields)
+                elif revalidate:
+                    stale[work_item_id] = entry.item_json["rev"]
+                else:
+                    self._counts["misses"] += 1
+                    missing.append(work_item_id)
+
+        return fresh, stale, missing
+
+    def revalidate(self, work_item_id: int, rev: int, fields: list):
+        """ Cached work item with the fields when its revision is still rev, otherwise None and it is forgotten. """
+        with self._lock:
+            entry = self._entries.get(work_item_id)
+            if entry is None:
+                self._counts["misses"] += 1
+                return None
+
+            if entry.item_json["rev"] != rev:
+                self._counts["changed"] += 1
+                self._remove(work_item_id)
+                return None
+
+            self._counts["revalidated"] += 1
+            entry.checked_at = time.monotonic()
+            return projected(entry.item_json, fields)
+
+    def store(self, item_json: dict, fields: list = None):
+        """ Keep a downloaded work item, fields are the ones asked for and None means all of them. """
+        if not self.enabled or "rev" not in item_json:
+            return
+
+        work_item_id = item_json["id"]
+        fields = frozenset(fields) if fields is not None else None
+
+        with self._lock:
+            entry = self._entries.get(work_item_id)
+            if entry is not None:
+                if entry.item_json["rev"] > item_json["rev"]:
+                    return
+                if entry.item_json["rev"] == item_json["rev"] and entry.fields is None:
+                    entry.checked_at = time.monotonic()
+                    return
+                if entry.item_json["rev"] == item_json["rev"] and fields is not None:
+                    # same revision, the fields asked for before are still right
+                    item_json = {**item_json, "fields": {**entry.item_json.get("fields", {}),
+                                                         **item_json.get("fields", {})}}
+                    fields = entry.fields | fields
+                self._remove(work_item_id)
+
+            size = len(json.dumps(item_json))
+            if size > self.max_bytes:
+                return
+
+            self._entries[work_item_id] = DetailEntry(item_json, fields, size, time.monotonic())
+            self._bytes += size
+
+            while len(self._entries) > self.max_items or self._bytes > self.max_bytes:
+                oldest_id = next(iter(self._entries))
+                self._remove(oldest_id)
+                self._counts["evictions"] += 1
+
+    def remove(self, work_item_id: int):
+        with self._lock:
+            self._remove(work_item_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            served = self._counts["hits"] + self._counts["revalidated"]
+            asked = served + self._counts["misses"] + self._counts["changed"]
+            return {"items": len(self._entries), "bytes": self._bytes, **self._counts,
+                    "hit_ratio": served / asked if asked else 0.0}
+
+    def _remove(self, work_item_id: int):
+        entry = self._entries.pop(work_item_id, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+
+def projected(item_json: dict, fields: list):
+    """ Work item json with only the fields asked for, as Azure answers when asked for them. """
+    item_fields = item_json.get("fields", {})
+    return {**item_json, "fields": {field: item_fields[field] for field in fields if field in item_fields}}
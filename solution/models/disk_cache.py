@@ -0,0 +1,72 @@
+""" Disk cache module, project reads kept between sessions and shared by processes. """
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from solution.models.data_classes.data_classes import Success
+
+
+class DiskCache:
+    """ Successful project reads of one organization, one JSON file per key.
+
+    Files are replaced atomically so processes sharing the directory never read a half written entry,
+    and an invalidated key refuses results that were fetched before the invalidation.
+    """
+
+    def __init__(self, directory: str, organization: str, ttl: float) -> None:
+        self.directory = os.path.join(directory, organization)
+        self.ttl = ttl
+
+    def load(self, key: str):
+        """ Cached result of key and whether it is older than ttl, or None when nothing usable is stored. """
+        entry = self._read(key)
+        if entry is None or "result" not in entry:
+            return None
+
+        result = entry["result"]
+        success = Success(message=result["message"], response=dict(result["response"]),
+                          status_code=result["status_code"])
+        return success, time.time() - entry["fetched_at"] > self.ttl
+
+    def store(self, key: str, result: Success, fetched_at: float):
+        """ Keep result of key, unless key was invalidated after the result was fetched. """
+        entry = self._read(key)
+        if entry is not None and entry.get("invalidated_at", 0) > fetched_at:
+            return
+
+        # response is kept as pairs, so keys that are not strings come back unchanged
+        self._write(key, {"fetched_at": fetched_at,
+                          "result": {"message": result.message, "response": list(result.response.items()),
+                                     "status_code": result.status_code}})
+
+    def invalidate(self, *keys: str):
+        now = time.time()
+        for key in keys:
+            self._write(key, {"invalidated_at": now})
+
+    def _path(self, key: str):
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def _read(self, key: str):
+        try:
+            with open(self._path(key), encoding="utf-8") as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, key: str, entry: dict):
+        """ Write entry next to its file and swap it in, a cache that can not be written is only skipped. """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        except OSError:
+            return
+
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as cache_file:
+                json.dump(entry, cache_file)
+            os.replace(temporary_path, self._path(key))
+        except OSError:
+            os.remove(temporary_path)
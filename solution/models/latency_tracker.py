@@ -0,0 +1,30 @@
+""" Latency tracker module, recent response times per endpoint. """
+import threading
+from collections import deque
+
+
+class LatencyTracker:
+    """ Keeps the last window latencies of every endpoint to answer percentile questions. """
+
+    def __init__(self, window: int = 200, minimum_samples: int = 20) -> None:
+        self.window = window
+        self.minimum_samples = minimum_samples
+        self._lock = threading.Lock()
+        self._latencies = {}
+
+    def record(self, endpoint: str, seconds: float):
+        with self._lock:
+            if endpoint not in self._latencies:
+                self._latencies[endpoint] = deque(maxlen=self.window)
+            self._latencies[endpoint].append(seconds)
+
+    def percentile(self, endpoint: str, percentile: float):
+        """ Latency in seconds under which percentile % of the recent calls answered, None without enough calls. """
+        with self._lock:
+            latencies = sorted(self._latencies.get(endpoint, ()))
+
+        if len(latencies) < self.minimum_samples:
+            return None
+
+        index = min(len(latencies) - 1, int(len(latencies) * percentile / 100))
+        return latencies[index]
@@ -0,0 +1,20 @@
+""" Client metrics module. """
+import threading
+from collections import defaultdict
+
+
+class Metrics:
+    """ Thread safe counters shared by everything a client does. """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters = defaultdict(int)
+
+    def increment(self, name: str, value: int = 1):
+        with self._lock:
+            self._counters[name] += value
+
+    def snapshot(self) -> dict:
+        """ Copy of all counters at this moment. """
+        with self._lock:
+            return dict(self._counters)
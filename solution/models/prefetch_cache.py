@@ -0,0 +1,90 @@
+""" Prefetched work items module, listings of opened projects with an index by title. """
+import threading
+
+
+class PrefetchCache:
+    """ Work items of the projects being prefetched, kept by id and indexed by title. """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._work_items = {}
+        self._titles = {}
+
+    def start(self, project_name: str):
+        """ Mark project as prefetched, it is served from here once a listing is stored. """
+        with self._lock:
+            self._work_items.setdefault(project_name, None)
+            self._titles.setdefault(project_name, {})
+
+    def stop(self, project_name: str):
+        with self._lock:
+            self._work_items.pop(project_name, None)
+            self._titles.pop(project_name, None)
+
+    def is_started(self, project_name: str):
+        with self._lock:
+            return project_name in self._titles
+
+    def store(self, project_name: str, work_items: dict):
+        """ Replace the listing of a project that is still prefetched. """
+        with self._lock:
+            if project_name not in self._titles:
+                return
+
+            self._work_items[project_name] = dict(work_items)
+            titles = {}
+            for work_item_id, work_item in work_items.items():
+                titles.setdefault(work_item["title"], set()).add(work_item_id)
+            self._titles[project_name] = titles
+
+    def listing(self, project_name: str):
+        """ Copy of the stored listing, None until the first prefetch finished. """
+        with self._lock:
+            work_items = self._work_items.get(project_name)
+            return dict(work_items) if work_items is not None else None
+
+    def work_item_id(self, project_name: str, work_item_title: str):
+        """ Lowest id with that title, like the first WIQL match, or None when unknown. """
+        with self._lock:
+            if self._work_items.get(project_name) is None:
+                return None
+            ids = self._titles[project_name].get(work_item_title)
+            return min(ids) if ids else None
+
+    def put(self, project_name: str, work_item_id: int, work_item: dict):
+        with self._lock:
+            work_items = self._work_items.get(project_name)
+            if work_items is None:
+                return
+
+            self._remove_title(project_name, work_item_id)
+            work_items[work_item_id] = work_item
+            self._titles[project_name].setdefault(work_item["title"], set()).add(work_item_id)
+
+    def rename(self, project_name: str, work_item_id: int, new_title: str):
+        with self._lock:
+            work_items = self._work_items.get(project_name)
+            if work_items is None or work_item_id not in work_items:
+                return
+
+            self._remove_title(project_name, work_item_id)
+            work_items[work_item_id] = {**work_items[work_item_id], "title": new_title}
+            self._titles[project_name].setdefault(new_title, set()).add(work_item_id)
+
+    def remove(self, project_name: str, work_item_id: int):
+        with self._lock:
+            if self._work_items.get(project_name) is None:
+                return
+
+            self._remove_title(project_name, work_item_id)
+            self._work_items[project_name].pop(work_item_id, None)
+
+    def _remove_title(self, project_name, work_item_id):
+        old_work_item = self._work_items[project_name].get(work_item_id)
+        if old_work_item is None:
+            return
+
+        ids = self._titles[project_name].get(old_work_item["title"], set())
+        ids.discard(work_item_id)
+        if not ids:
+            self._titles[project_name].pop(old_work_item["title"], None)
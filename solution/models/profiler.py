@@ -0,0 +1,131 @@
+""" Profiling module, opt-in cProfile of client operations written to one file per call. """
+import contextlib
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import threading
+import time
+
+# environment variable that switches profiling on when the profile_dir setting is not given
+PROFILE_DIR_VARIABLE = "AZURE_CLIENT_PROFILE_DIR"
+
+# builtins the profiled thread sits in while it waits for the network
+NETWORK_WAIT_FUNCTIONS = ("recv", "send", "select", "poll", "connect", "getaddrinfo", "do_handshake",
+                          "of '_ssl._SSLSocket' objects")
+
+# builtins it sits in while it waits for a lock, a connection slot or the futures of worker threads
+LOCK_WAIT_FUNCTIONS = ("'acquire' of '_thread.lock' objects", "'acquire' of '_thread.RLock' objects")
+
+# cProfile sees only the thread that enabled it, the report says so
+SCOPE_NOTE = ("calling thread only: work done in fan-out worker threads is not included (the wait for it is "
+              "under lock wait), and an async operation includes other tasks the event loop ran meanwhile")
+
+# functions printed under the breakdown, ordered by cumulative time
+TOP_FUNCTIONS = 25
+
+# numbers the files of one process, clients of the same process share the directory
+_profile_numbers = itertools.count(1)
+
+# one profiler can be enabled per process from Python 3.12, so one operation of all threads is profiled at a time
+_profiling_lock = threading.Lock()
+
+
+class OperationProfiler:
+    """ Profile public client operations and write each one to directory as .prof and .txt files.
+
+    The .prof file loads in pstats or snakeviz, the .txt file starts with the time spent waiting on the
+    network, waiting on locks and worker threads, parsing JSON and in the handle_*_response functions. Both
+    cover the calling thread only, see SCOPE_NOTE. Only one operation of the process is
+    profiled at a time, an operation started while another one is profiled (in any thread, an async one too)
+    runs unprofiled, and a failure to profile or to write the files never fails the operation.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self._active = threading.local()
+
+    @contextlib.contextmanager
+    def profile(self, operation_name: str):
+        profile = self._start()
+        if profile is None:
+            yield
+            return
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            profile.disable()
+            elapsed = time.perf_counter() - started
+            self._active.profiling = False
+            _profiling_lock.release()
+            try:
+                self.write(operation_name, profile, elapsed)
+            except OSError:
+                pass
+
+    def _start(self):
+        """ Enabled profile, or None when this thread or another one is profiled already. """
+        if getattr(self._active, "profiling", False) or not _profiling_lock.acquire(blocking=False):
+            return None
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # another profiling tool (a debugger, coverage) is active
+            _profiling_lock.release()
+            return None
+
+        self._active.profiling = True
+        return profile
+
+    def write(self, operation_name: str, profile: cProfile.Profile, elapsed: float):
+        os.makedirs(self.directory, exist_ok=True)
+        file_name = f"{operation_name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_profile_numbers)}"
+        path = os.path.join(self.directory, file_name)
+
+        profile.dump_stats(f"{path}.prof")
+
+        report = io.StringIO()
+        stats = pstats.Stats(profile, stream=report)
+        breakdown = time_breakdown(stats)
+        report.write(f"operation: {operation_name}\n")
+        report.write(f"wall time: {elapsed * 1000:.1f} ms\n")
+        report.write(f"scope: {SCOPE_NOTE}\n")
+        for category, seconds in breakdown.items():
+            report.write(f"{category}: {seconds * 1000:.1f} ms\n")
+        report.write("\n")
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
+
+        with open(f"{path}.txt", "w", encoding="utf-8") as report_file:
+            report_file.write(report.getvalue())
+
+
+def time_breakdown(stats: pstats.Stats):
+    """ Seconds spent waiting on the network, waiting on locks and worker threads, parsing JSON and in
+    handle_*_response (which includes its parsing). """
+    network_wait = lock_wait = json_parsing = response_handling = 0.0
+
+    for (filename, _, function_name), (_, _, total_time, cumulative_time, _) in stats.stats.items():
+        if filename == "~" and any(name in function_name for name in NETWORK_WAIT_FUNCTIONS):
+            network_wait += total_time
+        elif filename == "~" and any(name in function_name for name in LOCK_WAIT_FUNCTIONS):
+            lock_wait += total_time
+        elif function_name == "loads" and filename.endswith(os.path.join("json", "__init__.py")):
+            json_parsing += cumulative_time
+        elif function_name.startswith("handle_") and function_name.endswith("_response"):
+            response_handling += cumulative_time
+
+    return {"network wait": network_wait, "lock wait": lock_wait, "json parsing": json_parsing,
+            "handle_*_response": response_handling}
+
+
+def operation_profile(client, operation_name: str):
+    """ Profile of one operation when the client has profiling on, otherwise nothing. """
+    profiler = getattr(client, "profiler", None)
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.profile(operation_name)
@@ -0,0 +1,267 @@
+""" Scheduler module, requests of a client wait for a connection by priority class. """
+import asyncio
+import contextvars
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+
+# priority classes, most urgent first
+INTERACTIVE = "interactive"
+NORMAL = "normal"
+BULK = "bulk"
+PRIORITIES = [INTERACTIVE, NORMAL, BULK]
+
+_current_priority = contextvars.ContextVar("azure_client_priority", default=NORMAL)
+
+
+def current_priority():
+    """ Priority class of the operation running in this context. """
+    return _current_priority.get()
+
+
+def check_priority(priority):
+    if priority is not None and priority not in PRIORITIES:
+        raise ValueError(f"Priority must be one of {', '.join(PRIORITIES)}.")
+
+
+@contextmanager
+def priority_scope(priority: str = None):
+    """ Run the block with every request sent at priority, None keeps the priority of the caller. """
+    check_priority(priority)
+    if priority is None:
+        yield current_priority()
+        return
+
+    token = _current_priority.set(priority)
+    try:
+        yield priority
+    finally:
+        _current_priority.reset(token)
+
+
+class PriorityQueues:
+    """ Waiting requests and running ones of every priority class, shared by the sync and async schedulers.
+
+    A request starts when fewer than capacity requests run, fewer than the cap of its class run, it is the first
+    waiting one of its class and no more urgent class has a first waiting request that may start. So interactive
+    requests go ahead of queued bulk ones, and bulk ones never take more than their cap of the connections.
+    """
+
+    def __init__(self, capacity: int, limits: dict) -> None:
+        self.capacity = capacity
+        self.limits = {priority: min(capacity, limits.get(priority, capacity)) for priority in PRIORITIES}
+        self._tickets = itertools.count()
+        self._waiting = {priority: deque() for priority in PRIORITIES}
+        self._running = {priority: 0 for priority in PRIORITIES}
+        self._started = {priority: 0 for priority in PRIORITIES}
+        self._wait_total = {priority: 0.0 for priority in PRIORITIES}
+        self._wait_max = {priority: 0.0 for priority in PRIORITIES}
+
+    def enqueue(self, priority: str):
+        ticket = next(self._tickets)
+        self._waiting[priority].append(ticket)
+        return ticket
+
+    def can_start(self, priority: str, ticket: int):
+        if sum(self._running.values()) >= self.capacity:
+            return False
+        if self._waiting[priority][0] != ticket or self._running[priority] >= self.limits[priority]:
+            return False
+
+        for urgent_priority in PRIORITIES[:PRIORITIES.index(priority)]:
+            if self._waiting[urgent_priority] and self._running[urgent_priority] < self.limits[urgent_priority]:
+                return False
+        return True
+
+    def start(self, priority: str, waited: float):
+        self._waiting[priority].popleft()
+        self._running[priority] += 1
+        self._started[priority] += 1
+        self._wait_total[priority] += waited
+        self._wait_max[priority] = max(self._wait_max[priority], waited)
+
+    def next_start(self):
+        """ Priority class and ticket of the first waiting request that may start now, None when none may. """
+        for priority in PRIORITIES:
+            if self._waiting[priority] and self.can_start(priority, self._waiting[priority][0]):
+                return priority, self._waiting[priority][0]
+        return None
+
+    def give_up(self, priority: str, ticket: int):
+        self._waiting[priority].remove(ticket)
+
+    def waiting(self, priority: str):
+        return tuple(self._waiting[priority])
+
+    def finish(self, priority: str):
+        self._running[priority] -= 1
+
+    def stats(self):
+        return {priority: {
+            "limit": self.limits[priority],
+            "queued": len(self._waiting[priority]),
+            "running": self._running[priority],
+            "started": self._started[priority],
+            "mean_wait_ms": self._wait_total[priority] / self._started[priority] * 1000
+            if self._started[priority] else 0.0,
+            "max_wait_ms": self._wait_max[priority] * 1000,
+        } for priority in PRIORITIES}
+
+
+class RequestScheduler:
+    """ Slots of the connection pool handed to threads by priority class. """
+
+    def __init__(self, capacity: int, limits: dict) -> None:
+        self._queues = PriorityQueues(capacity, limits)
+        self._condition = threading.Condition()
+
+    def acquire(self, priority: str, timeout: float = None):
+        """ Wait for a slot, False when timeout seconds passed first. """
+        started = time.monotonic()
+        with self._condition:
+            ticket = self._queues.enqueue(priority)
+            if not self._condition.wait_for(lambda: self._queues.can_start(priority, ticket), timeout):
+                self._queues.give_up(priority, ticket)
+                # the first request of the class is gone, the one behind it may start now
+                self._condition.notify_all()
+                return False
+            self._queues.start(priority, time.monotonic() - started)
+            # the next request of the class is first now, it may start as well
+            self._condition.notify_all()
+            return True
+
+    def release(self, priority: str):
+        with self._condition:
+            self._queues.finish(priority)
+            self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            return self._queues.stats()
+
+
+class AsyncRequestScheduler:
+    """ Slots of the connection pool handed to coroutines by priority class. """
+
+    def __init__(self, capacity: int, limits: dict) -> None:
+        self._queues = PriorityQueues(capacity, limits)
+        # one future per waiting coroutine, set when a slot may have become free
+        self._wakeups = {}
+
+    async def acquire(self, priority: str, timeout: float = None):
+        """ Wait for a slot, False when timeout seconds passed first. """
+        started = time.monotonic()
+        ticket = self._queues.enqueue(priority)
+        try:
+            while not self._queues.can_start(priority, ticket):
+                wakeup = asyncio.get_running_loop().create_future()
+                self._wakeups[ticket] = wakeup
+                try:
+                    await asyncio.wait_for(wakeup, None if timeout is None else
+                                           timeout - (time.monotonic() - started))
+                finally:
+                    del self._wakeups[ticket]
+        except BaseException as exception:
+            # timed out or cancelled, the one behind it may start now
+            self._queues.give_up(priority, ticket)
+            self._wake()
+            if isinstance(exception, asyncio.TimeoutError):
+                return False
+            raise
+
+        self._queues.start(priority, time.monotonic() - started)
+        # the next request of the class is first now, it may start as well
+        self._wake()
+        return True
+
+    def release(self, priority: str):
+        self._queues.finish(priority)
+        self._wake()
+
+    def stats(self):
+        return self._queues.stats()
+
+    def _wake(self):
+        for wakeup in self._wakeups.values():
+            if not wakeup.done():
+                wakeup.set_result(None)
+
+
+class PriorityExecutor(Executor):
+    """ Threads that run submitted functions by the priority class of the context that submitted them.
+
+    Functions start in the order of PriorityQueues, so a function of an interactive fan-out goes ahead of the
+    queued bulk ones, and bulk functions never take more than their cap of the threads: they would wait there
+    for a connection while an interactive fan-out waits for a thread.
+    """
+
+    def __init__(self, max_workers: int, limits: dict, thread_name_prefix: str = "") -> None:
+        self._max_workers = max_workers
+        self._thread_name_prefix = thread_name_prefix
+        self._queues = PriorityQueues(max_workers, limits)
+        self._condition = threading.Condition()
+        # waiting functions by ticket
+        self._work = {}
+        self._threads = []
+        self._shutdown = False
+
+    def submit(self, fn, /, *args, **kwargs):
+        priority = current_priority()
+        future = Future()
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("Cannot schedule new futures after shutdown.")
+
+            ticket = self._queues.enqueue(priority)
+            self._work[ticket] = (future, fn, args, kwargs, time.monotonic())
+            if len(self._threads) < self._max_workers:
+                thread = threading.Thread(target=self._run_worker, daemon=True,
+                                          name=f"{self._thread_name_prefix}_{len(self._threads)}")
+                thread.start()
+                self._threads.append(thread)
+            self._condition.notify_all()
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        with self._condition:
+            self._shutdown = True
+            if cancel_futures:
+                for priority in PRIORITIES:
+                    for ticket in list(self._queues.waiting(priority)):
+                        self._queues.give_up(priority, ticket)
+                        self._work.pop(ticket)[0].cancel()
+            self._condition.notify_all()
+
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def stats(self):
+        with self._condition:
+            return self._queues.stats()
+
+    def _run_worker(self):
+        while True:
+            with self._condition:
+                while (next_start := self._queues.next_start()) is None:
+                    if self._shutdown and not self._work:
+                        return
+                    self._condition.wait()
+
+                priority, ticket = next_start
+                future, fn, args, kwargs, submitted = self._work.pop(ticket)
+                self._queues.start(priority, time.monotonic() - submitted)
+
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args, **kwargs))
+                    except BaseException as exception:
+                        future.set_exception(exception)
+            finally:
+                with self._condition:
+                    self._queues.finish(priority)
+                    self._condition.notify_all()
@@ -0,0 +1,81 @@
+""" Request coalescing module, identical in-flight reads share one request. """
+import asyncio
+import threading
+from concurrent.futures import Future
+
+from solution.models.deadline import current_deadline
+from solution.models.metrics import Metrics
+
+
+class SingleFlight:
+    """ Concurrent calls with the same key in different threads share one execution and its result.
+
+    A call made under a deadline runs on its own, the shared execution would otherwise fail the other
+    callers when that deadline passes.
+    """
+
+    def __init__(self, metrics: Metrics) -> None:
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, function, *args, **kwargs):
+        if current_deadline() is not None:
+            return function(*args, **kwargs)
+
+        with self._lock:
+            future = self._calls.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not is_leader:
+            self.metrics.increment("single_flight_hits")
+            return future.result()
+
+        self.metrics.increment("single_flight_calls")
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as exception:
+            future.set_exception(exception)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+        return result
+
+
+class AsyncSingleFlight:
+    """ Concurrent coroutines with the same key share one task and its result.
+
+    A coroutine awaited under a deadline runs on its own, as in SingleFlight.
+    """
+
+    def __init__(self, metrics: Metrics) -> None:
+        self.metrics = metrics
+        self._calls = {}
+
+    async def do(self, key, function, *args, **kwargs):
+        if current_deadline() is not None:
+            return await function(*args, **kwargs)
+
+        task = self._calls.get(key)
+
+        if task is None:
+            self.metrics.increment("single_flight_calls")
+            task = asyncio.ensure_future(function(*args, **kwargs))
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.metrics.increment("single_flight_hits")
+
+        # shield so a cancelled caller does not cancel the request the others are waiting for
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
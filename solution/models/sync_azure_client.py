@@ -1,11 +1,23 @@
 """ sync azure client module. """
 import concurrent
-from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
 
-from httpx import Client, BasicAuth
+from httpx import Client, HTTPTransport, BasicAuth, Limits, TransportError
 
 from solution.models.abstract_azure_client import AzureClient
+from solution.models.cassette import RecordingTransport, ReplayTransport
+from solution.models.client_errors import ClientFailure, client_operation
 from solution.models.data_classes.data_classes import Success, Error
+from solution.models.deadline import current_deadline, deadline_scope
+from solution.models.wiql import WorkItemQuery
+from solution.models.scheduler import PriorityExecutor, RequestScheduler, current_priority
+from solution.models.single_flight import SingleFlight
+from solution.models.work_item_stream import WorkItemStream
 from solution.telegram_bot import TelegramBot
 
 
@@ -16,14 +28,135 @@ class SyncAzureClient(AzureClient):
         super().__init__(settings, telegram_bot)
 
         self.client: Client = Client(
-            base_url=f"https://dev.azure.com/{self.settings.organization}/",
+            base_url=self.settings.base_url,
             auth=BasicAuth("", self.settings.token),
             headers=self.headers,
             follow_redirects=True,
             default_encoding="utf-8",
-            timeout=15.0,
+            timeout=SyncAzureClient.REQUEST_TIMEOUT,
+            limits=self._limits(),
+            transport=self._transport(),
         )
 
+        # identical reads in flight at the same time share one request
+        self._single_flight = SingleFlight(self.metrics)
+
+        # requests wait here for one of the pool connections, the most urgent priority class first
+        self.scheduler = RequestScheduler(self.settings.max_workers, self.settings.priority_limits)
+
+        # one long-lived pool shared by every fan-out, sized to the connection pool, that runs the functions
+        # of the most urgent priority class first and lets no class hold more threads than its cap
+        self.executor = PriorityExecutor(self.settings.max_workers, self.settings.priority_limits,
+                                         thread_name_prefix="azure-client")
+
+        # hedged reads run here so the caller can wait for whichever of the two answers first, a thread
+        # for every connection of the pool
+        self._hedge_executor = ThreadPoolExecutor(max_workers=self.connection_limit(),
+                                                  thread_name_prefix="azure-client-hedge")
+
+        # background jobs wait on the fan-out pool, so they get their own threads
+        self._background = ThreadPoolExecutor(max_workers=2, thread_name_prefix="azure-client-background")
+        self._prefetch_lock = threading.Lock()
+        self._prefetch_futures = {}
+        self._revalidation_lock = threading.Lock()
+        self._revalidations = {}
+
+    def _limits(self):
+        return Limits(max_connections=self.connection_limit(), max_keepalive_connections=self.connection_limit())
+
+    def _transport(self):
+        """ Transport that records to or replays from a cassette, None for the default httpx one. """
+        if self.settings.replay_cassette:
+            return ReplayTransport(self.settings.replay_cassette, self.settings.replay_timing)
+        if self.settings.record_cassette:
+            return RecordingTransport(HTTPTransport(limits=self._limits()), self.settings.record_cassette)
+        return None
+
+    def _send(self, endpoint: str, method: str, url: str, **kwargs):
+        """ Send one request within the operation budget, endpoint is the END_POINTS key used for metrics
+        and its circuit breaker. """
+
+        priority = current_priority()
+        if not self.scheduler.acquire(priority, SyncAzureClient.queue_timeout()):
+            raise ClientFailure(self.deadline_exceeded_error(endpoint, current_deadline()))
+
+        try:
+            timeout = self.request_timeout(endpoint)
+            self.allow_request(endpoint)
+
+            try:
+                if self.is_hedged(endpoint):
+                    response = self._hedged_request(endpoint, method, url, timeout=timeout, **kwargs)
+                else:
+                    response = self._timed_request(endpoint, method, url, timeout=timeout, **kwargs)
+            except TransportError as error:
+                self.record_transport_error(endpoint, error, timeout)
+                raise
+            except BaseException:
+                self.circuit_breakers.get(endpoint).record_cancelled()
+                raise
+        finally:
+            self.scheduler.release(priority)
+
+        self.record_response(endpoint, response)
+
+        return response
+
+    @staticmethod
+    def _submit(executor: Executor, function, *args, **kwargs):
+        """ Submit function to executor, running it with the caller's context so its deadline still applies. """
+        return executor.submit(contextvars.copy_context().run, function, *args, **kwargs)
+
+    def _timed_request(self, endpoint: str, method: str, url: str, **kwargs):
+        start = time.monotonic()
+        response = self.client.request(method, url, **kwargs)
+        self.latencies.record(endpoint, time.monotonic() - start)
+        return response
+
+    def _hedged_request(self, endpoint: str, method: str, url: str, **kwargs):
+        """ Send a duplicate when the first request is slower than usual, the first answer wins. """
+
+        first = self._submit(self._hedge_executor, self._timed_request, endpoint, method, url, **kwargs)
+        if concurrent.futures.wait([first], timeout=self.hedge_delay(endpoint)).done:
+            return first.result()
+
+        self.metrics.increment("hedged_requests")
+        second = self._submit(self._hedge_executor, self._timed_request, endpoint, method, url, **kwargs)
+
+        done, _ = concurrent.futures.wait([first, second], return_when=concurrent.futures.FIRST_COMPLETED)
+        winner = first if first in done else second
+        other = second if winner is first else first
+
+        # a request that failed does not win while the other one may still answer
+        if winner.exception() is not None:
+            winner, other = other, winner
+
+        if winner is second:
+            self.metrics.increment("hedge_wins")
+        return winner.result()
+
+    def _read_through_cache(self, key: str, fetch, *args):
+        """ Serve key from the disk cache when it is there, a stale entry is refreshed in the background. """
+        cached = self.cached_read(key)
+        if cached is None:
+            return self._fetch_and_cache(key, fetch, *args)
+
+        result, is_stale = cached
+        if is_stale:
+            with self._revalidation_lock:
+                future = self._revalidations.get(key)
+                if future is None or future.done():
+                    self._revalidations[key] = self._background.submit(self._fetch_and_cache, key, fetch, *args)
+
+        return result
+
+    def _fetch_and_cache(self, key: str, fetch, *args):
+        fetched_at = time.time()
+        result = fetch(*args)
+        self.cache_result(key, result, fetched_at)
+        return result
+
+    @client_operation
     def create_project(self, name: str, description: str):
         """ Create project on Azure DevOps organization. """
 
@@ -32,25 +165,38 @@ class SyncAzureClient(AzureClient):
 
         data = SyncAzureClient.create_project_data(name, description)
 
-        response = self.client.post(SyncAzureClient.END_POINTS["list_projects"],
-                                    json=data)
+        response = self._send("create_project", "POST", SyncAzureClient.END_POINTS["create_project"],
+                              json=data)
 
-        return super().handle_create_project_response(response, name)
+        result = super().handle_create_project_response(response, name)
 
+        if isinstance(result, Success):
+            self.invalidate_cached_project(name)
+
+        return result
+
+    @client_operation
     def list_projects(self) -> Success | Error:
         """ List all projects on Azure DevOps organization. """
 
-        response = self.client.get(SyncAzureClient.END_POINTS["list_projects"])
+        return self._read_through_cache("list_projects", self._fetch_projects)
+
+    def _fetch_projects(self):
+        failed_response, all_projects = self._list_all_projects()
+        if failed_response is not None:
+            return SyncAzureClient.handle_list_projects_response(failed_response)
 
-        return SyncAzureClient.handle_list_projects_response(response)
+        return SyncAzureClient.listed_projects_result(all_projects)
 
+    @client_operation
     def delete_project(self, project_name: str):
         """ Delete project from Azure DevOps organization. """
 
         if not isinstance(project_name, str):
             raise TypeError("Project name must be string.")
 
-        project = self.get_project(project_name)
+        # the project id must be current, so the disk cache is not asked
+        project = self._coalesced_project(project_name)
 
         result = SyncAzureClient.check_get_project_response(project, project_name)
 
@@ -59,87 +205,555 @@ class SyncAzureClient(AzureClient):
         else:
             project_id = result
 
-        response = self.client.delete(
-            SyncAzureClient.END_POINTS['delete_project'].format(project_id=project_id))
+        response = self._send("delete_project", "DELETE",
+                              SyncAzureClient.END_POINTS['delete_project'].format(project_id=project_id))
+
+        result = super().handle_delete_project_response(response, project_name)
+
+        if isinstance(result, Success):
+            self.invalidate_cached_project(project_name)
+
+        return result
+
+    @client_operation
+    def delete_projects(self, projects, wait: bool = False):
+        """ Delete many projects, projects is a list of names or a function that picks names to delete.
+
+        Ids come from one listing of all pages, at most max_workers deletions run at a time, and with wait the deletion
+        operations are polled together until they finished. The result has one entry per project.
+        """
+
+        SyncAzureClient.check_projects_selection(projects, wait)
 
-        return super().handle_delete_project_response(response, project_name)
+        # the ids must be current, so the disk cache is not asked
+        failed_response, all_projects = self._list_all_projects()
+        if failed_response is not None:
+            return SyncAzureClient.handle_list_projects_response(failed_response)
 
+        targets, results = SyncAzureClient.projects_to_delete(all_projects, projects)
+
+        futures = {project_name: self._submit(self.executor, self._delete_project_by_id, project_name, project_id)
+                   for project_name, project_id in targets.items()}
+        operations = {}
+        for project_name, future in futures.items():
+            results[project_name], operation_id = future.result()
+            if operation_id is not None:
+                operations[project_name] = operation_id
+
+        if wait and operations:
+            for project_name, status in self._wait_for_operations(operations).items():
+                results[project_name] = SyncAzureClient.operation_result(project_name, results[project_name], status)
+
+        return SyncAzureClient.handle_delete_projects(results)
+
+    def _list_all_projects(self):
+        """ Every project of the organization page by page, returns the response that failed, or None and them. """
+        all_projects, continuation_token = [], None
+        while True:
+            response = self._send("list_projects", "GET", SyncAzureClient.END_POINTS["list_projects"],
+                                  params=SyncAzureClient.projects_page_params(continuation_token))
+            if response.status_code != SyncAzureClient.OK_STATUS_CODE:
+                return response, None
+
+            all_projects.extend(response.json()["value"])
+            continuation_token = response.headers.get(SyncAzureClient.CONTINUATION_TOKEN_HEADER)
+            if not continuation_token:
+                return None, all_projects
+
+    def _delete_project_by_id(self, project_name: str, project_id: str):
+        """ Result of deleting one project and the id of its deletion operation, None when it failed. """
+        try:
+            response = self._send("delete_project", "DELETE",
+                                  SyncAzureClient.END_POINTS['delete_project'].format(project_id=project_id))
+        except (ClientFailure, TransportError) as failure:
+            return SyncAzureClient.failure_error(failure), None
+
+        result = self.handle_delete_project_response(response, project_name)
+        if isinstance(result, Error):
+            return result, None
+
+        self.invalidate_cached_project(project_name)
+        return result, response.json()["id"]
+
+    def _wait_for_operations(self, operations: dict):
+        """ Poll all operations at once until every one finished, status or Error of each by project name. """
+        statuses = {}
+        pending = dict(operations)
+
+        with deadline_scope(SyncAzureClient.OPERATION_WAIT_TIMEOUT) as deadline:
+            while pending:
+                futures = {project_name: self._submit(self.executor, self._get_operation_status, operation_id)
+                           for project_name, operation_id in pending.items()}
+                for project_name, future in futures.items():
+                    status = future.result()
+                    if isinstance(status, Error) or status in SyncAzureClient.OPERATION_FINISHED_STATUSES:
+                        statuses[project_name] = status
+                        del pending[project_name]
+
+                if pending:
+                    time.sleep(max(0.0, min(SyncAzureClient.OPERATION_POLL_INTERVAL, deadline.remaining())))
+
+        return statuses
+
+    def _get_operation_status(self, operation_id: str):
+        try:
+            response = self._send("get_operation", "GET",
+                                  SyncAzureClient.END_POINTS['get_operation'].format(operation_id=operation_id))
+        except (ClientFailure, TransportError) as failure:
+            return SyncAzureClient.failure_error(failure)
+
+        return SyncAzureClient.operation_status(response)
+
+    @client_operation
     def get_project(self, project_name: str):
         """ Get project info from Azure DevOps organization. """
 
         if not isinstance(project_name, str):
             raise TypeError("Project name must be string.")
 
-        response = self.client.get(
-            SyncAzureClient.END_POINTS['get_project'].format(project_name=project_name))
+        return self._read_through_cache(SyncAzureClient.project_cache_key(project_name),
+                                        self._coalesced_project, project_name)
+
+    def _coalesced_project(self, project_name: str):
+        return self._single_flight.do(("get_project", project_name), self._fetch_project, project_name)
+
+    def _fetch_project(self, project_name: str):
+        response = self._send("get_project", "GET",
+                              SyncAzureClient.END_POINTS['get_project'].format(project_name=project_name))
 
         return SyncAzureClient.handle_get_project_response(response, project_name)
 
-    def create_work_item(self, project_id: str, work_item_type: str, work_item_value: str):
-        """ Create work item on Azure DevOps organization. """
+    @client_operation
+    def create_work_item(self, project_id: str, work_item_type: str, work_item_value: str,
+                         idempotency_key: str = None):
+        """ Create work item on Azure DevOps organization.
+
+        With idempotency_key the work item is tagged with it, and a retry after a failure that may have
+        created it first looks for the key, returning the work item already created instead of another one.
+        """
 
         if not isinstance(project_id, str) or \
                 not isinstance(work_item_type, str) or not isinstance(work_item_value, str):
             raise TypeError("Project id, work item type and work item value must be strings.")
+        SyncAzureClient.check_idempotency_key(idempotency_key)
+
+        return self._create_work_item(project_id, work_item_type, work_item_value, idempotency_key=idempotency_key)
+
+    def _create_work_item(self, project_id: str, work_item_type: str, work_item_value: str, notify: bool = True,
+                          idempotency_key: str = None):
+        if idempotency_key is not None and self.is_in_doubt(idempotency_key):
+            found = self._find_idempotency_keys(project_id, [idempotency_key])
+            if isinstance(found, Error):
+                return found
+            if idempotency_key in found:
+                self.settle_key(idempotency_key, False)
+                return SyncAzureClient.existing_work_item_result(found[idempotency_key])
+
+        data = SyncAzureClient.create_work_item_data(work_item_value, idempotency_key)
+
+        try:
+            response = self._send(
+                "create_work_item", "POST",
+                SyncAzureClient.END_POINTS['create_work_item'].format(project_id=project_id,
+                                                                      work_item_type=work_item_type),
+                json=data, headers=self._json_patch_headers)
+        except BaseException:
+            if idempotency_key is not None:
+                self.settle_key(idempotency_key, True)
+            raise
+
+        if idempotency_key is not None:
+            self.settle_key(idempotency_key, SyncAzureClient.creation_in_doubt(response))
+
+        result = self.handle_create_work_item_response(response, project_id, work_item_type, work_item_value, notify)
+
+        if isinstance(result, Success):
+            self.prefetched.put(response.json()["fields"]["System.TeamProject"], result.response["id"],
+                                {"title": result.response["title"], "type": result.response["type"]})
+            self.detail_cache.store(response.json())
+
+        return result
+
+    @client_operation
+    def find_idempotency_keys(self, project_name: str, idempotency_keys: list):
+        """ Work items created with any of the idempotency keys, by key. """
+
+        if not isinstance(project_name, str) or not isinstance(idempotency_keys, list):
+            raise TypeError("Project name must be string and idempotency keys must be list of strings.")
+        for idempotency_key in idempotency_keys:
+            SyncAzureClient.check_idempotency_key(idempotency_key)
+
+        found = self._find_idempotency_keys(project_name, list(dict.fromkeys(idempotency_keys)))
+        if isinstance(found, Error):
+            return found
+
+        return SyncAzureClient.handle_found_keys(found)
+
+    def _find_idempotency_keys(self, project_name: str, idempotency_keys: list):
+        """ Work item json by key of the keys found, KEYS_PER_QUERY keys per query, or Error. """
+
+        keys_chunks = SyncAzureClient.chunks(idempotency_keys, SyncAzureClient.KEYS_PER_QUERY)
+        if len(keys_chunks) == 1:
+            # a creation checking its key may itself run on the executor, waiting there for a thread could hang
+            chunk_results = [self._find_keys_chunk(project_name, keys_chunks[0])]
+        else:
+            futures = [self._submit(self.executor, self._find_keys_chunk, project_name, keys_chunk)
+                       for keys_chunk in keys_chunks]
+            chunk_results = [future.result() for future in futures]
 
-        data = SyncAzureClient.create_work_item_data(work_item_value)
+        found = {}
+        for failed_response, keys_found in chunk_results:
+            if failed_response is not None:
+                return SyncAzureClient.handle_falied_list_work_items_response(failed_response, project_name)
+            found.update(keys_found)
 
-        response = self.client.post(
-            SyncAzureClient.END_POINTS['create_work_item'].format(project_id=project_id, work_item_type=work_item_type),
-            json=data, headers=self._json_patch_headers)
+        return found
 
-        return super().handle_create_work_item_response(response, project_id, work_item_type, work_item_value)
+    def _find_keys_chunk(self, project_name: str, idempotency_keys: list):
+        """ Returns the response that failed, or None and the work item json by key of the keys found. """
 
-    def get_work_item_details(self, url):
-        response = self.client.get(url)
+        response = self._send(
+            "list_work_items", "POST",
+            SyncAzureClient.END_POINTS['list_work_items'].format(project_name=project_name),
+            json=SyncAzureClient.idempotency_keys_body(idempotency_keys))
+        if response.status_code != SyncAzureClient.OK_STATUS_CODE:
+            return response, None
+
+        work_item_ids = [work_item["id"] for work_item in response.json()["workItems"]]
+        if not work_item_ids:
+            return None, {}
+
+        # CONTAINS matches parts of tags too, so the tags of the work items found are checked again
+        work_items = []
+        for ids_chunk in SyncAzureClient.chunks(work_item_ids, SyncAzureClient.WORK_ITEMS_PER_BATCH):
+            response = self._get_work_items_batch(project_name, ids_chunk, SyncAzureClient.IDEMPOTENCY_FIELDS)
+            if response.status_code != SyncAzureClient.OK_STATUS_CODE:
+                return response, None
+            work_items.extend(response.json()["value"])
+
+        return None, SyncAzureClient.work_items_by_key(idempotency_keys, work_items)
+
+    @client_operation
+    def get_work_item_details(self, url, fields: list = None):
+        """ Get one work item by its url, only with the given fields. """
+
+        response = self._send("get_work_item", "GET", url,
+                              params={"fields": ",".join(fields or SyncAzureClient.LIST_FIELDS)})
         item_json = response.json()
-        return {
-            item_json["id"]: {
-                "title": item_json["fields"]["System.Title"],
-                "type": item_json["fields"]["System.WorkItemType"]
-            }
-        }
+        return {item_json["id"]: SyncAzureClient.work_item_summary(item_json)}
+
+    @client_operation
+    def list_work_items(self, project_name: str, fields: list = None, query: WorkItemQuery = None):
+        """ List work items on Azure DevOps organization.
 
-    def list_work_items(self, project_name: str):
-        """ List work items on Azure DevOps organization. """
+        Only title and type are downloaded, fields adds more of them to each work item and query
+        keeps only the work items matching its filters.
+        """
 
         if not isinstance(project_name, str):
             raise TypeError("Project id must be string.")
+        SyncAzureClient.check_query(query)
+
+        if fields is None and query is None and self.prefetched.is_started(project_name):
+            return self._list_prefetched_work_items(project_name)
+
+        return self._list_work_items(project_name, fields, query)
 
-        body = SyncAzureClient.list_work_items_body(project_name)
+    def _list_work_items(self, project_name: str, fields: list = None, query: WorkItemQuery = None):
+        fields = SyncAzureClient.projected_fields(SyncAzureClient.LIST_FIELDS, fields)
 
-        response = self.client.post(
+        body = SyncAzureClient.list_work_items_body(project_name, query)
+
+        response = self._send(
+            "list_work_items", "POST",
             SyncAzureClient.END_POINTS['list_work_items'].format(project_name=project_name),
             json=body)
 
         if response.status_code == SyncAzureClient.OK_STATUS_CODE:
-            work_items = response.json()["workItems"]
+            work_item_ids = [work_item["id"] for work_item in response.json()["workItems"]]
             result_response = {}
-            with ThreadPoolExecutor(max_workers=5) as executor:
-                futures = [executor.submit(self.get_work_item_details, work_item["url"]) for work_item in work_items]
 
-                for future in concurrent.futures.as_completed(futures):
-                    item_data = future.result()
-                    result_response.update(item_data)
+            # Query By Wiql just get the ids of work items, so get their details in batches of 200
+            futures = [self._submit(self.executor, self._get_cached_work_items, project_name, ids_chunk, fields)
+                       for ids_chunk in SyncAzureClient.chunks(work_item_ids, SyncAzureClient.WORK_ITEMS_PER_BATCH)]
+
+            for future in concurrent.futures.as_completed(futures):
+                failed_response, work_items = future.result()
+                if failed_response is not None:
+                    return SyncAzureClient.handle_falied_list_work_items_response(failed_response, project_name)
+                for item_json in work_items:
+                    if query is None or query.matches(item_json):
+                        result_response[item_json["id"]] = SyncAzureClient.work_item_summary(item_json)
 
             return Success(message="Work items listed successfully.", response=result_response,
                            status_code=SyncAzureClient.OK_STATUS_CODE)
 
         return SyncAzureClient.handle_falied_list_work_items_response(response, project_name)
 
+    @client_operation
+    def iter_work_items(self, project_name: str, fields: list = None, query: WorkItemQuery = None):
+        """ Stream work items of project while they are fetched.
+
+        Returns a WorkItemStream that yields work items in id order, or Error when the query failed.
+        """
+
+        if not isinstance(project_name, str):
+            raise TypeError("Project id must be string.")
+        SyncAzureClient.check_query(query)
+
+        if fields is None and query is None and self.prefetched.listing(project_name) is not None:
+            work_items = self.list_work_items(project_name).response
+            return WorkItemStream(len(work_items), ({"id": work_item_id, **work_item}
+                                                    for work_item_id, work_item in sorted(work_items.items())))
+
+        fields = SyncAzureClient.projected_fields(SyncAzureClient.LIST_FIELDS, fields)
+
+        response = self._send(
+            "list_work_items", "POST",
+            SyncAzureClient.END_POINTS['list_work_items'].format(project_name=project_name),
+            json=SyncAzureClient.list_work_items_body(project_name, query))
+
+        if response.status_code != SyncAzureClient.OK_STATUS_CODE:
+            return SyncAzureClient.handle_falied_list_work_items_response(response, project_name)
+
+        work_item_ids = [work_item["id"] for work_item in response.json()["workItems"]]
+        stream = WorkItemStream(len(work_item_ids))
+        # the batches are fetched while the stream is read, after this operation returned, so they keep its
+        # deadline and priority
+        stream.work_items = self._stream_work_items(project_name, work_item_ids, fields, stream, query,
+                                                    contextvars.copy_context())
+
+        return stream
+
+    def _stream_work_items(self, project_name: str, work_item_ids: list, fields: list, stream: WorkItemStream,
+                           query: WorkItemQuery, context: contextvars.Context):
+        """ Yield work items batch by batch, keeping at most max_workers batches in flight, each fetched in
+        context. """
+        def fetch(ids_chunk):
+            return context.run(self._submit, self.executor, self._get_work_items_batch, project_name, ids_chunk,
+                               fields)
+
+        ids_chunks = iter(SyncAzureClient.chunks(work_item_ids, SyncAzureClient.WORK_ITEMS_PER_BATCH))
+        pending = deque(fetch(ids_chunk) for ids_chunk in itertools.islice(ids_chunks, self.settings.max_workers))
+
+        try:
+            while pending:
+                try:
+                    response = pending.popleft().result()
+                except ClientFailure as failure:
+                    stream.error = failure.error
+                    return
+
+                next_chunk = next(ids_chunks, None)
+                if next_chunk is not None:
+                    pending.append(fetch(next_chunk))
+
+                if response.status_code != SyncAzureClient.OK_STATUS_CODE:
+                    stream.error = SyncAzureClient.handle_falied_list_work_items_response(response, project_name)
+                    return
+
+                for item_json in response.json()["value"]:
+                    if query is None or query.matches(item_json):
+                        yield {"id": item_json["id"], **SyncAzureClient.work_item_summary(item_json)}
+        finally:
+            for future in pending:
+                future.cancel()
+
+    @client_operation
+    def org_stats(self, refresh: bool = False):
+        """ Work item counts by type and by state of every project and of the whole organization.
+
+        Only type and state of each work item are downloaded, all projects at the same time. The result is
+        kept for ORG_STATS_TTL seconds, refresh asks Azure again before that.
+        """
+
+        if not isinstance(refresh, bool):
+            raise TypeError("Refresh must be boolean.")
+
+        cached = None if refresh else self.cached_org_stats()
+        if cached is not None:
+            return cached
+
+        result = self._single_flight.do(("org_stats",), self._collect_org_stats)
+        self.cache_org_stats(result)
+        return result
+
+    def _collect_org_stats(self):
+        failed_response, all_projects = self._list_all_projects()
+        if failed_response is not None:
+            return SyncAzureClient.handle_list_projects_response(failed_response)
+
+        # all queries first and then all batches, so no worker waits for another one
+        query_futures = {project["name"]: self._submit(self.executor, self._query_stats_ids, project["name"])
+                         for project in all_projects}
+
+        errors = {}
+        batch_futures = []
+        for project_name, future in query_futures.items():
+            work_item_ids = future.result()
+            if isinstance(work_item_ids, Error):
+                errors[project_name] = work_item_ids.message
+                continue
+            batch_futures.append((project_name, [
+                self._submit(self.executor, self._get_stats_batch, project_name, ids_chunk)
+                for ids_chunk in SyncAzureClient.chunks(work_item_ids, SyncAzureClient.WORK_ITEMS_PER_BATCH)]))
+
+        project_stats = {}
+        for project_name, futures in batch_futures:
+            batches = [future.result() for future in futures]
+            error = next((batch for batch in batches if isinstance(batch, Error)), None)
+            if error is not None:
+                errors[project_name] = error.message
+                continue
+            project_stats[project_name] = SyncAzureClient.count_work_items(
+                item_json for batch in batches for item_json in batch)
+
+        return SyncAzureClient.handle_org_stats(project_stats, errors)
+
+    def _query_stats_ids(self, project_name: str):
+        """ Ids of every work item of project, or Error. """
+        try:
+            response = self._send(
+                "list_work_items", "POST",
+                SyncAzureClient.END_POINTS['list_work_items'].format(project_name=project_name),
+                json=SyncAzureClient.list_work_items_body(project_name))
+        except (ClientFailure, TransportError) as failure:
+            return SyncAzureClient.failure_error(failure)
+
+        if response.status_code != SyncAzureClient.OK_STATUS_CODE:
+            return SyncAzureClient.handle_falied_list_work_items_response(response, project_name)
+        return [work_item["id"] for work_item in response.json()["workItems"]]
+
+    def _get_stats_batch(self, project_name: str, work_item_ids: list):
+        """ Type and state of up to 200 work items, or Error. """
+        try:
+            response = self._get_work_items_batch(project_name, work_item_ids, SyncAzureClient.STATS_FIELDS)
+        except (ClientFailure, TransportError) as failure:
+            return SyncAzureClient.failure_error(failure)
+
+        if response.status_code != SyncAzureClient.OK_STATUS_CODE:
+            return SyncAzureClient.handle_falied_list_work_items_response(response, project_name)
+        return response.json()["value"]
+
+    @client_operation
+    def clone_project_work_items(self, source_project_name: str, target_project_name: str):
+        """ Copy title and type of every work item of source project into target project.
+
+        Work items are created while the source is still streamed, at most max_workers at a time,
+        and the ones that fail are reported in the result instead of stopping the copy.
+        """
+
+        if not isinstance(source_project_name, str) or not isinstance(target_project_name, str):
+            raise TypeError("Source and target project names must be strings.")
+
+        target_project_id = SyncAzureClient.check_get_project_response(
+            self._coalesced_project(target_project_name), target_project_name)
+        if isinstance(target_project_id, Error):
+            return target_project_id
+
+        stream = self.iter_work_items(source_project_name)
+        if isinstance(stream, Error):
+            return stream
+
+        started = time.monotonic()
+        created = 0
+        errors = []
+        pending = deque()
+        try:
+            for work_item in stream:
+                pending.append((work_item, self._submit(self.executor, self._create_work_item, target_project_id,
+                                                        work_item["type"], work_item["title"], False)))
+                if len(pending) >= self.settings.max_workers:
+                    created += self._collect_clone(*pending.popleft(), errors)
+
+            while pending:
+                created += self._collect_clone(*pending.popleft(), errors)
+        finally:
+            stream.close()
+            for _, future in pending:
+                future.cancel()
+
+        if stream.error:
+            return stream.error
+
+        return self.handle_clone_result(source_project_name, target_project_name, created, errors, started)
+
+    @staticmethod
+    def _collect_clone(work_item, future, errors: list):
+        """ Wait for the copy of one work item, 1 when it was created and 0 when its error was added. """
+        try:
+            result = future.result()
+        except ClientFailure as failure:
+            result = failure.error
+        except TransportError as error:
+            result = error
+
+        if isinstance(result, Success):
+            return 1
+
+        errors.append(SyncAzureClient.clone_error(work_item, result))
+        return 0
+
+    def prefetch_work_items(self, project_name: str):
+        """ Start listing work items of project in the background.
+
+        Until stop_prefetch, listings and title lookups of the project are served from the result
+        and every listing refreshes it in the background.
+        """
+
+        if not isinstance(project_name, str):
+            raise TypeError("Project name must be string.")
+
+        self.prefetched.start(project_name)
+
+        with self._prefetch_lock:
+            future = self._prefetch_futures.get(project_name)
+            if future is None or future.done():
+                future = self._background.submit(self._refresh_prefetch, project_name)
+                self._prefetch_futures[project_name] = future
+
+        return future
+
+    def _refresh_prefetch(self, project_name: str):
+        result = self._list_work_items(project_name)
+
+        if isinstance(result, Success):
+            self.prefetched.store(project_name, result.response)
+
+        return result
+
+    def _list_prefetched_work_items(self, project_name: str):
+        work_items = self.prefetched.listing(project_name)
+        future = self.prefetch_work_items(project_name)
+
+        if work_items is None:
+            # first prefetch still running, wait for it instead of sending the same listing again
+            return future.result()
+
+        self.metrics.increment("prefetch_hits")
+        return Success(message="Work items listed successfully.", response=work_items,
+                       status_code=SyncAzureClient.OK_STATUS_CODE)
+
     def _get_work_item_id(self, project_name: str, work_item_title: str):
         """ Get work item id by name from Azure DevOps organization. """
 
         if not isinstance(project_name, str) or not isinstance(work_item_title, str):
             raise TypeError("Project id and work item title must be strings.")
 
-        body = {
-            "query": "Select id From WorkItems where System.Title = '" + work_item_title +
-                     f"' and [System.TeamProject] = '{project_name}'"
-        }
+        work_item_id = self.prefetched.work_item_id(project_name, work_item_title)
+        if work_item_id is not None:
+            self.metrics.increment("prefetch_hits")
+            return work_item_id
+
+        return self._single_flight.do(("get_work_item_id", project_name, work_item_title),
+                                      self._query_work_item_id, project_name, work_item_title)
+
+    def _query_work_item_id(self, project_name: str, work_item_title: str):
+        body = SyncAzureClient.list_work_items_body(project_name, WorkItemQuery().title(work_item_title))
 
-        response = self.client.post(
-            format(SyncAzureClient.END_POINTS['list_work_items'].format(project_name=project_name)), json=body)
+        response = self._send(
+            "list_work_items", "POST",
+            SyncAzureClient.END_POINTS['list_work_items'].format(project_name=project_name), json=body)
 
         if response.status_code == AzureClient.OK_STATUS_CODE:
             if response.json()["workItems"]:
@@ -151,6 +765,74 @@ class SyncAzureClient(AzureClient):
 
         return "not found."
 
+    def _get_cached_work_items(self, project_name: str, work_item_ids: list, fields: list):
+        """ Details of up to 200 work items, fresh cached ones are not downloaded and stale ones only when their
+        revision changed. Returns the response that failed, or None and the work items in the order of the ids. """
+
+        work_items, stale, missing = self.detail_cache.lookup(work_item_ids, fields)
+
+        if stale:
+            response = self._get_work_items_batch(project_name, list(stale), SyncAzureClient.REV_FIELDS)
+            if response.status_code != SyncAzureClient.OK_STATUS_CODE:
+                return response, None
+            missing.extend(self.revalidated_work_items(response.json()["value"], stale, fields, work_items))
+
+        if missing:
+            response = self._get_work_items_batch(project_name, missing, fields)
+            if response.status_code != SyncAzureClient.OK_STATUS_CODE:
+                return response, None
+            for item_json in response.json()["value"]:
+                self.detail_cache.store(item_json, fields)
+                work_items[item_json["id"]] = item_json
+
+        return None, [work_items[work_item_id] for work_item_id in work_item_ids if work_item_id in work_items]
+
+    def _get_work_items_batch(self, project_name: str, work_item_ids: list, fields: list):
+        """ Get details of up to 200 work items in one request. """
+
+        return self._send(
+            "get_work_items_batch", "POST",
+            SyncAzureClient.END_POINTS['get_work_items_batch'].format(project_name=project_name),
+            json=SyncAzureClient.work_items_batch_body(work_item_ids, fields))
+
+    @client_operation
+    def get_work_items_by_titles(self, project_name: str, titles: list):
+        """ Get all work items matching any of the titles, grouped by title. """
+
+        if not isinstance(project_name, str) or not isinstance(titles, list) or \
+                not all(isinstance(title, str) for title in titles):
+            raise TypeError("Project name must be string and titles must be list of strings.")
+
+        titles = list(dict.fromkeys(titles))
+        url = SyncAzureClient.END_POINTS['list_work_items'].format(project_name=project_name)
+
+        query_futures = [
+            self._submit(self.executor, self._send, "list_work_items", "POST", url,
+                                 json=SyncAzureClient.work_items_by_titles_body(project_name, titles_chunk))
+            for titles_chunk in SyncAzureClient.titles_chunks(project_name, titles)]
+
+        work_item_ids = []
+        for future in query_futures:
+            response = future.result()
+            if response.status_code != SyncAzureClient.OK_STATUS_CODE:
+                return SyncAzureClient.handle_falied_list_work_items_response(response, project_name)
+            work_item_ids.extend(work_item["id"] for work_item in response.json()["workItems"])
+
+        batch_futures = [
+            self._submit(self.executor, self._get_work_items_batch, project_name, ids_chunk,
+                                 SyncAzureClient.WORK_ITEM_FIELDS)
+            for ids_chunk in SyncAzureClient.chunks(work_item_ids, SyncAzureClient.WORK_ITEMS_PER_BATCH)]
+
+        work_items = []
+        for future in batch_futures:
+            response = future.result()
+            if response.status_code != SyncAzureClient.OK_STATUS_CODE:
+                return SyncAzureClient.handle_falied_list_work_items_response(response, project_name)
+            work_items.extend(response.json()["value"])
+
+        return SyncAzureClient.handle_work_items_by_titles(titles, work_items)
+
+    @client_operation
     def update_work_item(self, project_name: str, work_item_title: str, new_work_item_title: str):
         """ Update work item on Azure DevOps organization. """
 
@@ -168,12 +850,20 @@ class SyncAzureClient(AzureClient):
         else:
             body = result
 
-        response = self.client.patch(SyncAzureClient.END_POINTS['update_work_item']
-                                     .format(project_name=project_name, work_item_id=work_item),
-                                     json=body, headers=self._json_patch_headers)
+        response = self._send("update_work_item", "PATCH",
+                              SyncAzureClient.END_POINTS['update_work_item']
+                              .format(project_name=project_name, work_item_id=work_item),
+                              json=body, headers=self._json_patch_headers)
 
-        return super().handle_update_work_item_response(response, work_item_title, new_work_item_title)
+        result = super().handle_update_work_item_response(response, work_item_title, new_work_item_title)
 
+        if isinstance(result, Success):
+            self.prefetched.rename(project_name, work_item, new_work_item_title)
+            self.detail_cache.store(response.json())
+
+        return result
+
+    @client_operation
     def delete_work_item(self, project_name: str, work_item_title: str):
         """ Delete work item on Azure DevOps organization."""
 
@@ -187,13 +877,24 @@ class SyncAzureClient(AzureClient):
         if isinstance(result, Error):
             return result
 
-        response = self.client.delete(SyncAzureClient.END_POINTS['delete_work_item']
-                                      .format(project_name=project_name, work_item_id=work_item_id))
+        response = self._send("delete_work_item", "DELETE",
+                              SyncAzureClient.END_POINTS['delete_work_item']
+                              .format(project_name=project_name, work_item_id=work_item_id))
+
+        result = super().handle_delete_work_item_response(response, project_name, work_item_title)
+
+        if isinstance(result, Success):
+            self.prefetched.remove(project_name, work_item_id)
+            self.detail_cache.remove(work_item_id)
 
-        return super().handle_delete_work_item_response(response, project_name, work_item_title)
+        return result
 
-    def get_work_item(self, project_name: str, work_item_title: str):
-        """ Get work item from Azure DevOps organization."""
+    @client_operation
+    def get_work_item(self, project_name: str, work_item_title: str, fields: list = None):
+        """ Get work item from Azure DevOps organization.
+
+        Only title, type and state are downloaded, fields adds more of them to the work item.
+        """
 
         if not isinstance(project_name, str) or not isinstance(work_item_title, str):
             raise TypeError("Project id and work item title must be strings.")
@@ -205,11 +906,27 @@ class SyncAzureClient(AzureClient):
         if isinstance(result, Error):
             return result
 
-        response = self.client.get(SyncAzureClient.END_POINTS['get_work_item']
-                                   .format(project_name=project_name, work_item_id=work_item_id))
+        fields = SyncAzureClient.projected_fields(SyncAzureClient.WORK_ITEM_FIELDS, fields)
+
+        # checking the revision of a stale work item takes a request as well, so it is downloaded again
+        cached, _, _ = self.detail_cache.lookup([work_item_id], fields, revalidate=False)
+        if cached:
+            return SyncAzureClient.cached_work_item_result(cached[work_item_id])
+
+        response = self._send("get_work_item", "GET",
+                              SyncAzureClient.END_POINTS['get_work_item']
+                              .format(project_name=project_name, work_item_id=work_item_id),
+                              params={"fields": ",".join(fields)})
+
+        result = SyncAzureClient.handle_get_work_item_response(response)
+        if isinstance(result, Success):
+            self.detail_cache.store(response.json(), fields)
 
-        return SyncAzureClient.handle_get_work_item_response(response)
+        return result
 
     def close(self):
         """ Close connection to Azure DevOps organization."""
+        self._background.shutdown(wait=True)
+        self.executor.shutdown(wait=True)
+        self._hedge_executor.shutdown(wait=True)
         self.client.close()
@@ -0,0 +1,100 @@
+""" WIQL module, work item queries built from filters with every literal escaped. """
+import datetime
+
+# WIQL macro for the user of the token, usable as assignee
+ME = "@Me"
+
+
+def escape_wiql_literal(value: str):
+    """ Quote value as a WIQL string literal, a quote inside it is doubled. """
+    return "'" + value.replace("'", "''") + "'"
+
+
+class WorkItemQuery:
+    """ Filters of a work item query, Azure applies them so only matching work items are downloaded.
+
+    Every filter method returns the query, so filters chain:
+    WorkItemQuery().types("Bug").states("New", "Active").changed_within_days(7)
+    """
+
+    def __init__(self) -> None:
+        self._conditions = []
+        # casefolded title prefixes, Azure only narrows the work items down to titles containing them
+        self._title_prefixes = []
+
+    def types(self, *work_item_types: str):
+        """ Work items of any of the types. """
+        return self._add_in("System.WorkItemType", work_item_types)
+
+    def states(self, *states: str):
+        """ Work items in any of the states. """
+        return self._add_in("System.State", states)
+
+    def assigned_to(self, assignee: str):
+        """ Work items assigned to assignee, a display name, an email or ME. """
+        if not isinstance(assignee, str) or not assignee:
+            raise TypeError("Assignee must be non empty string.")
+
+        value = ME if assignee == ME else escape_wiql_literal(assignee)
+        self._conditions.append(f"[System.AssignedTo] = {value}")
+        return self
+
+    def changed_since(self, day: datetime.date):
+        """ Work items changed on day or later, WIQL compares dates by day. """
+        if not isinstance(day, datetime.date):
+            raise TypeError("Day must be date or datetime.")
+
+        if isinstance(day, datetime.datetime):
+            day = day.date()
+        self._conditions.append(f"[System.ChangedDate] >= {escape_wiql_literal(day.isoformat())}")
+        return self
+
+    def changed_within_days(self, days: int):
+        """ Work items changed today or in the days before it. """
+        if isinstance(days, bool) or not isinstance(days, int) or days < 0:
+            raise TypeError("Days must be non negative integer.")
+
+        self._conditions.append(f"[System.ChangedDate] >= @Today - {days}")
+        return self
+
+    def title(self, title: str):
+        """ Work items with exactly this title, ignoring case like every WIQL comparison. """
+        if not isinstance(title, str):
+            raise TypeError("Title must be string.")
+
+        self._conditions.append(f"[System.Title] = {escape_wiql_literal(title)}")
+        return self
+
+    def title_starts_with(self, prefix: str):
+        """ Work items whose title starts with prefix, ignoring case.
+
+        WIQL has no "starts with" and a range of titles depends on the collation of the server, so Azure
+        returns the ids of the titles containing prefix anywhere and matches() keeps the ones starting with it.
+        Those ids are all downloaded, and the case of non ASCII letters is compared by Python's casefold.
+        """
+        if not isinstance(prefix, str) or not prefix:
+            raise TypeError("Title prefix must be non empty string.")
+
+        self._conditions.append(f"[System.Title] CONTAINS {escape_wiql_literal(prefix)}")
+        self._title_prefixes.append(prefix.casefold())
+        return self
+
+    def matches(self, item_json: dict):
+        """ Whether a work item returned for the query passes the filters Azure could not apply exactly. """
+        title = item_json.get("fields", {}).get("System.Title", "").casefold()
+        return all(title.startswith(prefix) for prefix in self._title_prefixes)
+
+    def to_wiql(self, project_name: str):
+        """ Query for the ids of the matching work items of project. """
+        conditions = [f"[System.TeamProject] = {escape_wiql_literal(project_name)}", *self._conditions]
+        return "Select [System.Id] From WorkItems where " + " and ".join(conditions)
+
+    def _add_in(self, field: str, values: tuple):
+        if not values or not all(isinstance(value, str) for value in values):
+            raise TypeError("Filter values must be strings.")
+
+        self._conditions.append(f"[{field}] IN ({', '.join(escape_wiql_literal(value) for value in values)})")
+        return self
+
+    def __repr__(self):
+        return f"WorkItemQuery({' and '.join(self._conditions)})"
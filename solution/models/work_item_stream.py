@@ -0,0 +1,47 @@
+""" Work item stream module, work items delivered while they are still being fetched. """
+import time
+
+
+class WorkItemStream:
+    """ Work items of a project, yielded batch by batch as the client fetches them.
+
+    total is known from the query up front (at most that many with a title prefix filter, which
+    is checked as work items arrive), fetched counts the work items yielded so far and
+    error is set when a batch failed and the stream stopped early.
+    """
+
+    def __init__(self, total: int, work_items=None) -> None:
+        self.total = total
+        self.fetched = 0
+        self.error = None
+        self.work_items = work_items if work_items is not None else iter(())
+        self._started = time.monotonic()
+
+    @property
+    def items_per_second(self) -> float:
+        elapsed = time.monotonic() - self._started
+        return self.fetched / elapsed if elapsed > 0 else 0.0
+
+    def __iter__(self):
+        for work_item in self.work_items:
+            self.fetched += 1
+            yield work_item
+
+    def close(self):
+        """ Stop fetching, batches still in flight are dropped. """
+        if hasattr(self.work_items, "close"):
+            self.work_items.close()
+
+
+class AsyncWorkItemStream(WorkItemStream):
+    """ Work items of a project, yielded batch by batch as the async client fetches them. """
+
+    async def __aiter__(self):
+        async for work_item in self.work_items:
+            self.fetched += 1
+            yield work_item
+
+    async def aclose(self):
+        """ Stop fetching, batches still in flight are cancelled. """
+        if hasattr(self.work_items, "aclose"):
+            await self.work_items.aclose()
@@ -1,17 +1,15 @@
-import os.path
-
-import httpx
-from configparser import ConfigParser
+import threading
 
+from solution.config import load_config
 from solution.models.data_classes.data_classes import Success, Error, TelegramBotSettings
 
 
 class TelegramBot:
 
     def __init__(self, settings: dict = None):
-        config = ConfigParser()
-        config.read(os.path.dirname(__file__) + "\\settings.init")
+        config = load_config()
 
+        self.settings = None
         if "telegram_bot_token" in config["DEFAULT"] and \
                 "telegram_chat_id" in config["DEFAULT"]:
             self.settings = TelegramBotSettings(config["DEFAULT"]["telegram_bot_token"],
@@ -27,6 +25,8 @@ class TelegramBot:
         if not isinstance(message, str):
             raise ValueError("message must be string")
 
+        import httpx
+
         url = f"https://api.telegram.org/bot{self.settings.token}/sendMessage"
         data = {
             "chat_id": self.settings.chat_id,
@@ -40,3 +40,19 @@ class TelegramBot:
                 return Success(message="Message sent successfully.")
             else:
                 return Error(message="Error occurred while sending message.")
+
+
+class LazyTelegramBot:
+    """ Telegram bot that reads its settings and builds the real bot on the first message. """
+
+    def __init__(self, settings: dict = None):
+        self._settings = settings
+        self._bot = None
+        self._lock = threading.Lock()
+
+    def send_message(self, message: str):
+        with self._lock:
+            if self._bot is None:
+                self._bot = TelegramBot(self._settings)
+
+        return self._bot.send_message(message)
@@ -6,6 +6,7 @@ import string
 
 from solution.models.async_azure_client import AsyncAzureClient
 from solution.models.abstract_azure_client import AzureClient
+from solution.models.wiql import WorkItemQuery
 from solution.telegram_bot import TelegramBot
 
 
@@ -208,3 +209,184 @@ async def test_update_not_exist_work_item(get_client):
 
     assert response.status_code == AzureClient.NOT_FOUND_STATUS_CODE
     assert response.message == "Work item 'not exist work item' not found."
+
+
+@pytest.mark.asyncio
+async def test_concurrent_get_project_is_coalesced(get_client):
+    """ Test identical get project calls in flight together share one request """
+    hits_before = get_client.get_metrics().get("single_flight_hits", 0)
+
+    responses = await asyncio.gather(*(get_client.get_project("salaht321") for _ in range(5)))
+
+    assert all(response.response["name"] == "salaht321" for response in responses)
+    assert get_client.get_metrics().get("single_flight_hits", 0) == hits_before + 4
+
+
+@pytest.mark.asyncio
+async def test_get_work_items_by_titles(get_client):
+    """ Test bulk title lookup returns every match grouped by title """
+    response = await get_client.get_work_items_by_titles("salaht321", ["exist work item", "not exist work item"])
+
+    assert response.status_code == AzureClient.OK_STATUS_CODE
+    assert response.message == "Work items found."
+    assert len(response.response["exist work item"]) > EMPTY_LEN
+    assert response.response["not exist work item"] == []
+
+
+@pytest.mark.asyncio
+async def test_list_work_items_with_fields(get_client):
+    """ Test list work items with extra projected fields """
+    response = await get_client.list_work_items("salaht321", fields=["System.State"])
+
+    assert response.status_code == AzureClient.OK_STATUS_CODE
+    assert all("state" in work_item for work_item in response.response.values())
+    assert get_client.get_metrics()["payload_bytes.get_work_items_batch"] > EMPTY_LEN
+
+
+@pytest.mark.asyncio
+async def test_prefetched_work_items(get_client):
+    """ Test work items listing is served from the prefetch once it finished """
+    await (await get_client.prefetch_work_items("salaht321"))
+    hits_before = get_client.get_metrics().get("prefetch_hits", 0)
+
+    response = await get_client.list_work_items("salaht321")
+    get_client.stop_prefetch("salaht321")
+
+    assert response.status_code == AzureClient.OK_STATUS_CODE
+    assert len(response.response) > EMPTY_LEN
+    assert get_client.get_metrics()["prefetch_hits"] == hits_before + 1
+
+
+@pytest.mark.asyncio
+async def test_iter_work_items(get_client):
+    """ Test work items stream yields every work item of the query """
+    stream = await get_client.iter_work_items("salaht321")
+    work_items = [work_item async for work_item in stream]
+
+    assert stream.error is None
+    assert len(work_items) == stream.total == stream.fetched
+    assert len(work_items) > EMPTY_LEN
+
+
+@pytest.mark.asyncio
+async def test_iter_work_items_not_exist_project(get_client):
+    """ Test work items stream of not existed project """
+    response = await get_client.iter_work_items("not exist project")
+
+    assert response.status_code == AzureClient.NOT_FOUND_STATUS_CODE
+    assert response.message == "Project 'not exist project' not found."
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_states(get_client):
+    """ Test circuit of a healthy endpoint stays closed """
+    await get_client.get_project("salaht321")
+
+    assert get_client.circuit_breaker_states()["get_project"]["state"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_get_work_item_timeout(get_client):
+    """ Test operation that can not finish within its budget """
+    response = await get_client.get_work_item("salaht321", "test", timeout=0.001)
+
+    assert response.status_code == AzureClient.REQUEST_TIMEOUT_STATUS_CODE
+
+
+@pytest.mark.asyncio
+async def test_clone_project_work_items_not_exist_target(get_client):
+    """ Test clone into not existed project """
+    response = await get_client.clone_project_work_items("salaht321", "not exist project")
+
+    assert response.status_code == AzureClient.NOT_FOUND_STATUS_CODE
+    assert response.message == "Project 'not exist project' not found."
+
+
+@pytest.mark.asyncio
+async def test_org_stats(get_client):
+    """ Test organization counts are the sum of the project counts and are cached """
+    response = await get_client.org_stats(refresh=True)
+
+    assert response.status_code == AzureClient.OK_STATUS_CODE
+    assert response.response["total"] == sum(stats["total"] for stats in response.response["projects"].values())
+    assert await get_client.org_stats() is response
+
+
+@pytest.mark.asyncio
+async def test_list_work_items_with_query(get_client):
+    """ Test only work items matching the query are listed """
+    response = await get_client.list_work_items("salaht321", query=WorkItemQuery().types("Task"))
+
+    assert response.status_code == AzureClient.OK_STATUS_CODE
+    assert all(work_item["type"] == "Task" for work_item in response.response.values())
+
+
+@pytest.mark.asyncio
+async def test_replay_cassette(get_client, tmp_path):
+    """ Test a replayed client answers like the recorded one without reaching Azure """
+    cassette = str(tmp_path / "cassette.jsonl")
+    recording_client = AsyncAzureClient({"token": get_client.settings.token,
+                                         "organization": get_client.settings.organization,
+                                         "record_cassette": cassette})
+    recorded_response = await recording_client.get_project("salaht321")
+    await recording_client.close()
+
+    replaying_client = AsyncAzureClient({"token": "no token", "organization": get_client.settings.organization,
+                                         "replay_cassette": cassette, "replay_timing": "none"})
+    replayed_response = await replaying_client.get_project("salaht321")
+    await replaying_client.close()
+
+    assert replayed_response == recorded_response
+    assert get_client.settings.token not in (tmp_path / "cassette.jsonl").read_text()
+
+
+@pytest.mark.asyncio
+async def test_interactive_priority(get_client):
+    """ Test an interactive call is counted in its own priority class """
+    started = get_client.scheduler_stats()["interactive"]["started"]
+    response = await get_client.get_project("salaht321", priority="interactive")
+
+    assert response.status_code == AzureClient.OK_STATUS_CODE
+    assert get_client.scheduler_stats()["interactive"]["started"] == started + 1
+    assert get_client.scheduler_stats()["interactive"]["queued"] == EMPTY_LEN
+
+
+@pytest.mark.asyncio
+async def test_work_item_detail_cache(get_client):
+    """ Test work items listed again are served from the detail cache """
+    first_response = await get_client.list_work_items("salaht321")
+    hits = get_client.detail_cache_stats()["hits"]
+    second_response = await get_client.list_work_items("salaht321")
+
+    assert second_response == first_response
+    assert get_client.detail_cache_stats()["hits"] == hits + len(first_response.response)
+
+
+@pytest.mark.asyncio
+async def test_delete_projects_not_exist(get_client):
+    """ Test delete many projects that are not exist """
+    response = await get_client.delete_projects(["not exist project", "other not exist project"])
+
+    assert response.response["deleted"] == EMPTY_LEN
+    assert response.response["projects"]["not exist project"]["status_code"] == AzureClient.NOT_FOUND_STATUS_CODE
+
+
+@pytest.mark.asyncio
+async def test_create_work_item_idempotency_key(get_client, random_name):
+    """ Test retry of a creation in doubt returns the work item created with the same key """
+    response = await get_client.create_work_item("salaht321", "Task", random_name, idempotency_key=random_name)
+    get_client.mark_in_doubt([random_name])
+    retried_response = await get_client.create_work_item("salaht321", "Task", random_name,
+                                                         idempotency_key=random_name)
+
+    assert retried_response.status_code == AzureClient.OK_STATUS_CODE
+    assert retried_response.response["id"] == response.response["id"]
+
+
+@pytest.mark.asyncio
+async def test_find_idempotency_keys_not_exist(get_client, random_name):
+    """ Test find idempotency keys that no work item was created with """
+    response = await get_client.find_idempotency_keys("salaht321", [random_name])
+
+    assert response.status_code == AzureClient.OK_STATUS_CODE
+    assert response.response == {}
@@ -0,0 +1,110 @@
+import concurrent.futures
+import time
+
+import pytest
+
+from solution.benchmarks.fake_azure_server import FakeAzureServer
+from solution.models.abstract_azure_client import AzureClient
+from solution.models.async_azure_client import AsyncAzureClient
+from solution.models.async_backed_sync_azure_client import AsyncBackedSyncAzureClient
+from solution.models.data_classes.data_classes import DeadlineExceededError
+from solution.models.scheduler import BULK, current_priority, priority_scope
+from solution.telegram_bot import TelegramBot
+
+
+@pytest.fixture(scope="module")
+def client():
+    settings = {
+        "token": "{your testing token here}",  # ToDo: replace with your testing token
+        "organization": "{your organization name here}",  # ToDo: replace with your organization name
+    }
+    client: AsyncBackedSyncAzureClient = AsyncBackedSyncAzureClient(settings, TelegramBot())
+    yield client
+    client.close()
+
+
+EMPTY_LEN: int = 0
+
+
+def test_list_projects(client):
+    """ Test list azure project through the background loop """
+    response = client.list_projects()
+
+    assert response.status_code == AzureClient.OK_STATUS_CODE
+    assert response.message == "Projects listed successfully."
+    assert len(response.response) > EMPTY_LEN
+
+
+def test_get_not_exist_project(client):
+    """ Test get azure project with not existed name project """
+    response = client.get_project("not exist name")
+
+    assert response.status_code == AzureClient.NOT_FOUND_STATUS_CODE
+    assert response.message == "Project 'not exist name' not found."
+
+
+def test_list_work_items(client):
+    """ Test list work items through the background loop """
+    response = client.list_work_items("salaht321")
+
+    assert response.status_code == AzureClient.OK_STATUS_CODE
+    assert response.message == "Work items listed successfully."
+    assert len(response.response) > EMPTY_LEN
+
+
+def test_get_work_item(client):
+    """ Test get work item through the background loop """
+    response = client.get_work_item("salaht321", "exist work item")
+
+    assert response.status_code == AzureClient.OK_STATUS_CODE
+    assert response.message == "Work item found."
+    assert response.response["title"] == "exist work item"
+
+
+@pytest.fixture
+def fake_client():
+    server = FakeAzureServer().start()
+    server.state.add_project("salaht321")
+    for number in range(AzureClient.WORK_ITEMS_PER_BATCH + 50):
+        server.state.add_work_item("salaht321", "Task", f"Task {number}")
+    client = AsyncBackedSyncAzureClient({"token": "fake-token", "organization": "fake-organization",
+                                         "base_url": server.base_url})
+    yield client
+    client.close()
+    server.stop()
+
+
+def test_iter_work_items_timeout(fake_client):
+    """ Test the timeout of a stream reaches the async client, a stream read after it is cut off """
+    stream = fake_client.iter_work_items("salaht321", timeout=0.3)
+    time.sleep(0.4)
+
+    assert list(stream) == []
+    assert isinstance(stream.error, DeadlineExceededError)
+
+
+def test_caller_priority_reaches_loop(fake_client, monkeypatch):
+    """ Test requests sent on the background loop keep the priority scope of the sync caller """
+    priorities = []
+    send = AsyncAzureClient._send
+
+    async def record_priority(client, endpoint, *args, **kwargs):
+        priorities.append(current_priority())
+        return await send(client, endpoint, *args, **kwargs)
+
+    monkeypatch.setattr(AsyncAzureClient, "_send", record_priority)
+    with priority_scope(BULK):
+        fake_client.get_project("salaht321")
+        stream = fake_client.iter_work_items("salaht321")
+    list(stream)
+
+    assert priorities and set(priorities) == {BULK}
+
+
+def test_prefetch_returns_future(fake_client):
+    """ Test prefetch gives a future sync callers can wait on, and the listing is served from it """
+    future = fake_client.prefetch_work_items("salaht321")
+
+    assert isinstance(future, concurrent.futures.Future)
+    assert len(future.result(timeout=5).response) == AzureClient.WORK_ITEMS_PER_BATCH + 50
+    assert fake_client.prefetched.listing("salaht321") is not None
@@ -0,0 +1,99 @@
+import asyncio
+import io
+import json
+
+from solution.batch_runner import BatchRunner
+from solution.models.data_classes.data_classes import Success, Error
+
+
+class StubClient:
+    """ Async client that records the operations it ran, get_project of 'not exist' fails. """
+
+    def __init__(self) -> None:
+        self.calls = []
+
+    async def create_project(self, name, description):
+        await asyncio.sleep(0.01)
+        self.calls.append(("create_project", name))
+        return Success(message="Created.", response={"name": name}, status_code=202)
+
+    async def get_project(self, name):
+        self.calls.append(("get_project", name))
+        if name == "not exist":
+            return Error(message=f"Project '{name}' not found.", status_code=404)
+        return Success(message="Found.", response={"name": name}, status_code=200)
+
+
+def run_batch(operations: list, concurrency: int = 5):
+    client = StubClient()
+    output = io.StringIO()
+    counts = asyncio.run(asyncio.wait_for(BatchRunner(client, concurrency, output).run(operations), timeout=10))
+    results = {line["id"]: line for line in map(json.loads, output.getvalue().splitlines())}
+    return counts, results, client
+
+
+def test_dependency_runs_first():
+    """ Test an operation starts after the operation it depends on succeeded """
+    counts, results, client = run_batch([
+        {"id": "project", "op": "create_project", "args": {"name": "demo", "description": "demo project"}},
+        {"id": "get", "op": "get_project", "args": ["demo"], "depends_on": ["project"]},
+    ])
+
+    assert counts == {"ok": 2, "failed": 0}
+    assert client.calls == [("create_project", "demo"), ("get_project", "demo")]
+
+
+def test_failed_dependency():
+    """ Test an operation whose dependency failed is not run """
+    counts, results, client = run_batch([
+        {"id": "missing", "op": "get_project", "args": ["not exist"]},
+        {"id": "after", "op": "create_project", "args": ["demo", "demo project"], "depends_on": ["missing"]},
+    ])
+
+    assert counts == {"ok": 0, "failed": 2}
+    assert results["after"]["message"] == "Dependency 'missing' failed."
+    assert ("create_project", "demo") not in client.calls
+
+
+def test_duplicate_id():
+    """ Test the second operation with an id already used fails """
+    counts, results, client = run_batch([
+        {"id": "get", "op": "get_project", "args": ["demo"]},
+        {"id": "get", "op": "get_project", "args": ["other"]},
+    ])
+
+    assert counts == {"ok": 1, "failed": 1}
+    assert client.calls == [("get_project", "demo")]
+
+
+def test_forward_dependency():
+    """ Test a dependency on an operation later in the script is refused, also once it was read """
+    counts, results, client = run_batch([
+        {"id": "project", "op": "create_project", "args": ["demo", "demo project"]},
+        {"id": "first", "op": "get_project", "args": ["demo"], "depends_on": ["project", "second"]},
+        {"id": "second", "op": "get_project", "args": ["other"]},
+    ])
+
+    assert counts == {"ok": 2, "failed": 1}
+    assert results["first"]["message"] == "Dependency 'second' must be an earlier operation."
+
+
+def test_cyclic_dependency():
+    """ Test operations that depend on each other fail instead of waiting forever """
+    counts, results, client = run_batch([
+        {"id": "project", "op": "create_project", "args": ["demo", "demo project"]},
+        {"id": "first", "op": "get_project", "args": ["demo"], "depends_on": ["project", "second"]},
+        {"id": "second", "op": "get_project", "args": ["other"], "depends_on": ["first"]},
+        {"id": "self", "op": "get_project", "args": ["demo"], "depends_on": ["self"]},
+    ])
+
+    assert counts == {"ok": 1, "failed": 3}
+    assert client.calls == [("create_project", "demo")]
+
+
+def test_unknown_operation():
+    """ Test an operation that is not a client method fails """
+    counts, results, client = run_batch([{"id": "close", "op": "close"}])
+
+    assert counts == {"ok": 0, "failed": 1}
+    assert results["close"]["message"] == "Unknown operation in 'close'."
@@ -0,0 +1,59 @@
+import gzip
+import json
+
+import httpx
+import pytest
+
+from solution.models.cassette import RecordingTransport, AsyncRecordingTransport, ReplayTransport, \
+    AsyncReplayTransport, CassetteMissError
+
+PROJECTS = {"count": 1, "value": [{"id": "1", "name": "salaht321"}]}
+
+
+def gzip_handler(request: httpx.Request):
+    """ Answer like Azure DevOps does, with a gzip body. """
+    return httpx.Response(200, headers={"content-type": "application/json", "content-encoding": "gzip"},
+                          content=gzip.compress(json.dumps(PROJECTS).encode("utf-8")), request=request)
+
+
+def test_record_and_replay_gzip(tmp_path):
+    """ Test a gzip answer is recorded decoded and replayed """
+    path = str(tmp_path / "traffic.jsonl")
+    with httpx.Client(transport=RecordingTransport(httpx.MockTransport(gzip_handler), path)) as client:
+        recorded = client.get("https://dev.azure.com/org/_apis/projects")
+
+    with open(path, encoding="utf-8") as cassette_file:
+        interaction = json.loads(cassette_file.readline())
+    with httpx.Client(transport=ReplayTransport(path, "none")) as client:
+        replayed = client.get("https://dev.azure.com/org/_apis/projects")
+
+    assert recorded.json() == PROJECTS
+    assert json.loads(interaction["content"]) == PROJECTS
+    assert replayed.json() == PROJECTS
+    # replayed content counts as downloaded
+    assert replayed.num_bytes_downloaded == len(replayed.content)
+
+
+@pytest.mark.asyncio
+async def test_async_record_and_replay_gzip(tmp_path):
+    """ Test a gzip answer is recorded decoded and replayed by the async transports """
+    path = str(tmp_path / "traffic.jsonl")
+    async with httpx.AsyncClient(transport=AsyncRecordingTransport(httpx.MockTransport(gzip_handler),
+                                                                   path)) as client:
+        recorded = await client.get("https://dev.azure.com/org/_apis/projects")
+    async with httpx.AsyncClient(transport=AsyncReplayTransport(path, "none")) as client:
+        replayed = await client.get("https://dev.azure.com/org/_apis/projects")
+
+    assert recorded.json() == PROJECTS
+    assert replayed.json() == PROJECTS
+
+
+def test_replay_not_recorded(tmp_path):
+    """ Test replay of a request the cassette never recorded """
+    path = str(tmp_path / "traffic.jsonl")
+    with httpx.Client(transport=RecordingTransport(httpx.MockTransport(gzip_handler), path)) as client:
+        client.get("https://dev.azure.com/org/_apis/projects")
+
+    with httpx.Client(transport=ReplayTransport(path, "none")) as client:
+        with pytest.raises(CassetteMissError):
+            client.get("https://dev.azure.com/org/_apis/projects/other")
@@ -0,0 +1,118 @@
+import pytest
+
+from solution.models import circuit_breaker
+from solution.models.circuit_breaker import CircuitBreaker, CircuitBreakers
+
+
+class Clock:
+    """ monotonic that only moves when the test advances it. """
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker, "time", clock)
+    return clock
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.minimum_calls):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_opens_at_failure_rate(clock):
+    """ Test the circuit opens once failure_rate of at least minimum_calls failed, not before """
+    breaker = CircuitBreaker(failure_rate=0.5, window=10, minimum_calls=4)
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_success()
+    assert breaker.snapshot() == {"state": CircuitBreaker.CLOSED, "calls": 4, "failure_rate": 0.75}
+    breaker.record_success()
+    breaker.record_success()
+    # 3 failures of 6 calls
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_success()
+    breaker.record_failure()
+    # 4 failures of 8 calls
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_half_open_probe_after_cooldown(clock):
+    """ Test an open circuit lets one probe through after open_seconds and refuses the calls beside it """
+    breaker = CircuitBreaker(minimum_calls=2, open_seconds=30.0)
+    open_breaker(breaker)
+
+    clock.now += 29.9
+    assert not breaker.allow()
+    clock.now += 0.1
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_probe_success_closes(clock):
+    """ Test a successful probe closes the circuit and starts a new window """
+    breaker = CircuitBreaker(minimum_calls=2, open_seconds=30.0)
+    open_breaker(breaker)
+    clock.now += 30.0
+
+    assert breaker.allow()
+    breaker.record_success()
+
+    assert breaker.snapshot() == {"state": CircuitBreaker.CLOSED, "calls": 1, "failure_rate": 0.0}
+    assert breaker.allow() and breaker.allow()
+
+
+def test_probe_failure_reopens(clock):
+    """ Test a failed probe opens the circuit for another open_seconds """
+    breaker = CircuitBreaker(minimum_calls=2, open_seconds=30.0)
+    open_breaker(breaker)
+    clock.now += 30.0
+
+    assert breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 29.9
+    assert not breaker.allow()
+    clock.now += 0.1
+    assert breaker.allow()
+
+
+def test_cancelled_call_is_not_failure(clock):
+    """ Test cancelled calls leave the window alone and free the probe instead of opening the circuit """
+    breaker = CircuitBreaker(minimum_calls=2, open_seconds=30.0)
+    for _ in range(5):
+        assert breaker.allow()
+        breaker.record_cancelled()
+    assert breaker.snapshot() == {"state": CircuitBreaker.CLOSED, "calls": 0, "failure_rate": 0.0}
+
+    open_breaker(breaker)
+    clock.now += 30.0
+    assert breaker.allow()
+    breaker.record_cancelled()
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_breaker_per_endpoint(clock):
+    """ Test an open circuit of one endpoint leaves the others closed """
+    breakers = CircuitBreakers(minimum_calls=2)
+    open_breaker(breakers.get("get_project"))
+
+    assert breakers.get("list_projects").allow()
+    assert {endpoint: state["state"] for endpoint, state in breakers.states().items()} == \
+        {"get_project": CircuitBreaker.OPEN, "list_projects": CircuitBreaker.CLOSED}
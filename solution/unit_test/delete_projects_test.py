@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from solution.benchmarks.fake_azure_server import FakeAzureServer, PROJECTS_PAGE_SIZE
+from solution.models.abstract_azure_client import AzureClient
+from solution.models.async_azure_client import AsyncAzureClient
+from solution.models.sync_azure_client import SyncAzureClient
+
+# more projects than one page of a listing holds
+PROJECTS = PROJECTS_PAGE_SIZE + 30
+
+
+@pytest.fixture
+def server():
+    server = FakeAzureServer().start()
+    for number in range(PROJECTS):
+        server.state.add_project(f"test-{number}")
+    server.state.add_project("keep")
+    # the deletion of the last project ends failed
+    server.state.failed_operations.add(server.state.find_project(f"test-{PROJECTS - 1}")["id"])
+    yield server
+    server.stop()
+
+
+def settings(server):
+    return {"token": "fake-token", "organization": "fake-organization", "base_url": server.base_url,
+            "max_workers": 8}
+
+
+def remaining_projects(server):
+    return [project["name"] for project in server.state.projects.values()]
+
+
+def check_deleted(server, response):
+    assert response.response["deleted"] == PROJECTS - 1
+    assert response.response["failed"] == 1
+    assert response.response["projects"][f"test-{PROJECTS - 1}"]["status_code"] == \
+        AzureClient.SERVER_ERROR_STATUS_CODE
+    assert remaining_projects(server) == ["keep"]
+
+
+def test_delete_projects_on_every_page(server):
+    """ Test delete by names finds the projects past the first page of the listing """
+    client = SyncAzureClient(settings(server))
+    try:
+        response = client.delete_projects([f"test-{number}" for number in range(PROJECTS)] + ["not exist project"],
+                                          wait=True)
+    finally:
+        client.close()
+
+    assert response.response["projects"]["not exist project"]["status_code"] == AzureClient.NOT_FOUND_STATUS_CODE
+    assert response.response["deleted"] == PROJECTS - 1
+    assert remaining_projects(server) == ["keep"]
+
+
+def test_delete_projects_predicate_and_wait(server):
+    """ Test delete picked by a function waits for every operation and reports the failed one """
+    client = SyncAzureClient(settings(server))
+    try:
+        response = client.delete_projects(lambda name: name.startswith("test-"), wait=True)
+    finally:
+        client.close()
+
+    check_deleted(server, response)
+
+
+def test_async_delete_projects_predicate_and_wait(server):
+    """ Test async delete picked by a function waits for every operation and reports the failed one """
+    async def delete():
+        client = AsyncAzureClient(settings(server))
+        try:
+            return await client.delete_projects(lambda name: name.startswith("test-"), wait=True)
+        finally:
+            await client.close()
+
+    check_deleted(server, asyncio.run(delete()))
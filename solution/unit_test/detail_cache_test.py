@@ -0,0 +1,114 @@
+import json
+
+import pytest
+
+from solution.models import detail_cache
+from solution.models.detail_cache import WorkItemDetailCache
+
+FIELDS = ["System.Title", "System.State"]
+
+
+class Clock:
+    """ monotonic that only moves when the test advances it. """
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(detail_cache, "time", clock)
+    return clock
+
+
+def work_item(work_item_id: int, rev: int = 1, title: str = None):
+    return {"id": work_item_id, "rev": rev,
+            "fields": {"System.Title": title or f"Task {work_item_id}", "System.State": "New"}}
+
+
+def test_evicts_least_recently_used_item(clock):
+    """ Test the work item not looked up for the longest time goes first when max_items is reached """
+    cache = WorkItemDetailCache(max_items=2, max_bytes=10 ** 6, ttl=60)
+    cache.store(work_item(1))
+    cache.store(work_item(2))
+    cache.lookup([1], FIELDS)
+    cache.store(work_item(3))
+
+    fresh, _, missing = cache.lookup([1, 2, 3], FIELDS)
+    assert (sorted(fresh), missing) == ([1, 3], [2])
+    assert cache.stats()["evictions"] == 1
+
+
+def test_evicts_by_bytes(clock):
+    """ Test work items are evicted until they fit max_bytes and one larger than it is not kept """
+    size = len(json.dumps(work_item(1)))
+    cache = WorkItemDetailCache(max_items=100, max_bytes=2 * size, ttl=60)
+    for work_item_id in [1, 2, 3]:
+        cache.store(work_item(work_item_id))
+
+    assert (cache.stats()["items"], cache.stats()["bytes"]) == (2, 2 * size)
+    cache.store(work_item(4, title="x" * 3 * size))
+    assert cache.lookup([2, 3, 4], FIELDS)[2] == [4]
+
+
+def test_older_revision_does_not_replace_newer(clock):
+    """ Test a late answer with an older revision leaves the newer work item cached """
+    cache = WorkItemDetailCache(max_items=10, max_bytes=10 ** 6, ttl=60)
+    cache.store(work_item(1, rev=2, title="New title"))
+    cache.store(work_item(1, rev=1, title="Old title"))
+
+    assert cache.lookup([1], FIELDS)[0][1]["fields"]["System.Title"] == "New title"
+
+
+def test_field_subsets(clock):
+    """ Test a work item stored with some fields serves those fields only, one stored with all serves any """
+    cache = WorkItemDetailCache(max_items=10, max_bytes=10 ** 6, ttl=60)
+    cache.store({"id": 1, "rev": 1, "fields": {"System.Title": "Task 1"}}, ["System.Title"])
+    cache.store(work_item(2))
+
+    fresh, _, missing = cache.lookup([1, 2], ["System.Title"])
+    assert fresh == {1: {"id": 1, "rev": 1, "fields": {"System.Title": "Task 1"}},
+                     2: {"id": 2, "rev": 1, "fields": {"System.Title": "Task 2"}}}
+    assert cache.lookup([1, 2], FIELDS)[2] == [1]
+
+    # the same revision with other fields adds them to the ones already kept
+    cache.store({"id": 1, "rev": 1, "fields": {"System.State": "New"}}, ["System.State"])
+    assert cache.lookup([1], FIELDS)[0][1]["fields"] == {"System.Title": "Task 1", "System.State": "New"}
+
+
+def test_stale_item_revalidated(clock):
+    """ Test a work item older than ttl is served again when its revision did not change """
+    cache = WorkItemDetailCache(max_items=10, max_bytes=10 ** 6, ttl=60)
+    cache.store(work_item(1))
+    clock.now += 60
+
+    fresh, stale, missing = cache.lookup([1], FIELDS)
+    assert (fresh, stale, missing) == ({}, {1: 1}, [])
+    assert cache.revalidate(1, 1, FIELDS) == work_item(1)
+    # checked again, so fresh for another ttl
+    assert 1 in cache.lookup([1], FIELDS)[0]
+    assert cache.stats()["revalidated"] == 1
+
+
+def test_stale_item_changed(clock):
+    """ Test a stale work item whose revision changed is forgotten instead of served """
+    cache = WorkItemDetailCache(max_items=10, max_bytes=10 ** 6, ttl=60)
+    cache.store(work_item(1))
+    clock.now += 60
+
+    assert cache.revalidate(1, 2, FIELDS) is None
+    assert cache.lookup([1], FIELDS)[2] == [1]
+    assert cache.stats()["changed"] == 1
+
+
+def test_stale_item_not_revalidated(clock):
+    """ Test a stale work item is downloaded again when revalidating would take a request as well """
+    cache = WorkItemDetailCache(max_items=10, max_bytes=10 ** 6, ttl=60)
+    cache.store(work_item(1))
+    clock.now += 60
+
+    assert cache.lookup([1], FIELDS, revalidate=False) == ({}, {}, [1])
@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+
+import pytest
+
+from solution.benchmarks.fake_azure_server import FakeAzureServer, PROJECTS_PAGE_SIZE
+from solution.exporter import WorkItemExporter, export_format_of
+from solution.models.sync_azure_client import SyncAzureClient
+
+# more projects than one page of a listing holds
+PROJECTS = PROJECTS_PAGE_SIZE + 30
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = FakeAzureServer().start()
+    for number in range(PROJECTS):
+        server.state.add_project(f"test-{number}")
+        server.state.add_work_item(f"test-{number}", "Task", f"Item {number}", {"Custom.Team": "Core"})
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(server):
+    client = SyncAzureClient({"token": "fake-token", "organization": "fake-organization",
+                              "base_url": server.base_url})
+    yield client
+    client.close()
+
+
+def test_export_format_of():
+    """ Test the format is picked by the file extension """
+    assert export_format_of("work_items.CSV") == "csv"
+    assert export_format_of("work_items.jsonl") == "ndjson"
+
+
+def test_export_organization_every_page(client):
+    """ Test the organization export includes the projects past the first page of the listing """
+    output = io.StringIO()
+
+    result = WorkItemExporter(client, output, progress=io.StringIO()).export_organization()
+
+    rows = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert (result.response["rows"], result.response["projects"]) == (PROJECTS, PROJECTS)
+    assert result.response["errors"] == []
+    assert sorted(row["project"] for row in rows) == sorted(f"test-{number}" for number in range(PROJECTS))
+
+
+def test_export_project_csv(client):
+    """ Test a CSV export has a column for every extra field asked for """
+    output = io.StringIO()
+
+    result = WorkItemExporter(client, output, "csv", fields=["Custom.Team"],
+                              progress=io.StringIO()).export_project("test-7")
+
+    assert result.response["rows"] == 1
+    assert list(csv.reader(io.StringIO(output.getvalue()))) == [
+        ["project", "id", "type", "title", "Custom.Team"], ["test-7", "8", "Task", "Item 7", "Core"]]
+
+
+def test_export_project_not_found(client):
+    """ Test the export of a project that does not exist is an error and writes nothing """
+    output = io.StringIO()
+
+    result = WorkItemExporter(client, output, progress=io.StringIO()).export_project("not exist project")
+
+    assert result.status_code == 404
+    assert output.getvalue() == ""
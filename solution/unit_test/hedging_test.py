@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+
+import httpx
+
+from solution.models.async_azure_client import AsyncAzureClient
+from solution.models.sync_azure_client import SyncAzureClient
+
+PROJECT = {"id": "1", "name": "salaht321", "url": "projects/salaht321"}
+SETTINGS = {"token": "fake-token", "organization": "fake-organization", "max_workers": 4, "hedge_reads": True}
+
+
+class SlowTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """ Transport that answers the first slow_requests requests after delay seconds and the others at once. """
+
+    def __init__(self, slow_requests: int, delay: float) -> None:
+        self.slow_requests = slow_requests
+        self.delay = delay
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def _delay(self):
+        with self._lock:
+            self.requests += 1
+            return self.delay if self.requests <= self.slow_requests else 0
+
+    def handle_request(self, request):
+        time.sleep(self._delay())
+        return httpx.Response(200, json=PROJECT)
+
+    async def handle_async_request(self, request):
+        await asyncio.sleep(self._delay())
+        return httpx.Response(200, json=PROJECT)
+
+
+def fast_history(client):
+    """ Latencies that put the hedge delay at its minimum. """
+    for _ in range(client.latencies.minimum_samples):
+        client.latencies.record("get_project", 0.001)
+
+
+def test_slow_read_is_hedged(monkeypatch):
+    """ Test a read slower than usual is sent again and the duplicate answer wins """
+    transport = SlowTransport(slow_requests=1, delay=1.0)
+    monkeypatch.setattr(SyncAzureClient, "_transport", lambda client: transport)
+    client = SyncAzureClient(SETTINGS)
+    fast_history(client)
+    try:
+        start = time.monotonic()
+        result = client.get_project("salaht321")
+        elapsed = time.monotonic() - start
+    finally:
+        client.close()
+
+    assert result.response["name"] == "salaht321"
+    assert elapsed < 0.5
+    assert transport.requests == 2
+    assert (client.get_metrics()["hedged_requests"], client.get_metrics()["hedge_wins"]) == (1, 1)
+
+
+def test_fast_read_is_not_hedged(monkeypatch):
+    """ Test a read that answers within the hedge delay is sent once """
+    transport = SlowTransport(slow_requests=0, delay=0)
+    monkeypatch.setattr(SyncAzureClient, "_transport", lambda client: transport)
+    client = SyncAzureClient(SETTINGS)
+    fast_history(client)
+    try:
+        client.get_project("salaht321")
+    finally:
+        client.close()
+
+    assert transport.requests == 1
+    assert "hedged_requests" not in client.get_metrics()
+
+
+def test_async_slow_read_is_hedged(monkeypatch):
+    """ Test an async read slower than usual is sent again and the slow request is cancelled """
+    transport = SlowTransport(slow_requests=1, delay=1.0)
+    monkeypatch.setattr(AsyncAzureClient, "_transport", lambda client: transport)
+
+    async def read():
+        client = AsyncAzureClient(SETTINGS)
+        fast_history(client)
+        try:
+            start = time.monotonic()
+            result = await client.get_project("salaht321")
+            return result, time.monotonic() - start, client.get_metrics()
+        finally:
+            await client.close()
+
+    result, elapsed, metrics = asyncio.run(read())
+
+    assert result.response["name"] == "salaht321"
+    assert elapsed < 0.5
+    assert (metrics["hedged_requests"], metrics["hedge_wins"]) == (1, 1)
+
+
+def test_hedged_reads_get_connections_for_duplicates():
+    """ Test the pool and the hedge threads leave room for a duplicate of every request """
+    hedged, not_hedged = SyncAzureClient(SETTINGS), SyncAzureClient({**SETTINGS, "hedge_reads": False})
+    try:
+        assert hedged.connection_limit() == 2 * SETTINGS["max_workers"]
+        assert hedged._hedge_executor._max_workers == hedged.connection_limit()
+        assert not_hedged.connection_limit() == SETTINGS["max_workers"]
+    finally:
+        hedged.close()
+        not_hedged.close()
@@ -0,0 +1,255 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+from solution import importer
+from solution.benchmarks.fake_azure_server import FakeAzureServer
+from solution.importer import Checkpoint, WorkItemImporter, read_rows, validate_row
+from solution.models.async_azure_client import AsyncAzureClient
+from solution.models.data_classes.data_classes import Success, Error
+
+
+class StubClient:
+    """ Async client that creates work items in memory, answering with the status codes of failures first. """
+
+    def __init__(self, failures: list = None) -> None:
+        self.failures = list(failures or [])
+        self.created = []
+
+    async def create_work_item(self, project_id, work_item_type, work_item_value, idempotency_key=None,
+                               priority=None):
+        if self.failures:
+            return Error(message="Service unavailable.", status_code=self.failures.pop(0))
+        self.created.append(work_item_value)
+        return Success(message="Created.", response={"title": work_item_value, "id": len(self.created),
+                                                     "type": work_item_type}, status_code=200)
+
+    async def find_idempotency_keys(self, project_name, idempotency_keys, priority=None):
+        return Success(message="Found.", response={}, status_code=200)
+
+    def mark_in_doubt(self, idempotency_keys):
+        pass
+
+
+def rows(count: int):
+    return [(row_number, {"project": "salaht321", "type": "Task", "title": f"Task {row_number}"})
+            for row_number in range(1, count + 1)]
+
+
+def run_importer(client, checkpoint, source_rows, concurrency: int = 3):
+    work_item_importer = WorkItemImporter(client, checkpoint, concurrency, output=io.StringIO(),
+                                          progress=io.StringIO())
+    return asyncio.run(work_item_importer.run(source_rows)), work_item_importer
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(importer, "RETRY_DELAY", 0)
+
+
+def test_read_rows_csv(tmp_path):
+    """ Test rows of a CSV file are numbered from one """
+    path = tmp_path / "work_items.csv"
+    path.write_text("project,type,title\nsalaht321,Task,First\nsalaht321,Bug,Second\n", encoding="utf-8")
+
+    assert list(read_rows(str(path))) == [(1, {"project": "salaht321", "type": "Task", "title": "First"}),
+                                          (2, {"project": "salaht321", "type": "Bug", "title": "Second"})]
+
+
+def test_read_rows_ndjson(tmp_path):
+    """ Test empty lines of an NDJSON file are skipped and invalid ones read as None """
+    path = tmp_path / "work_items.ndjson"
+    path.write_text('{"title": "First"}\n\nnot json\n', encoding="utf-8")
+
+    assert list(read_rows(str(path))) == [(1, {"title": "First"}), (2, None)]
+
+
+def test_validate_row():
+    """ Test valid row gives create_work_item arguments and invalid ones an error """
+    assert validate_row({"project": " salaht321 ", "type": "Task", "title": "First"}) == \
+        ["salaht321", "Task", "First"]
+    assert isinstance(validate_row({"project": "salaht321", "type": "Task", "title": " "}), Error)
+    assert isinstance(validate_row(None), Error)
+
+
+def test_checkpoint_out_of_order(tmp_path):
+    """ Test rows done out of order are kept after done_through until the gap is done """
+    checkpoint = Checkpoint(str(tmp_path / "work_items.csv.checkpoint"))
+    for row_number in [1, 3, 4]:
+        checkpoint.mark_done(row_number)
+
+    assert (checkpoint.done_through, checkpoint.done_after) == (1, {3, 4})
+    checkpoint.mark_done(2)
+    assert (checkpoint.done_through, checkpoint.done_after) == (4, set())
+
+
+def test_checkpoint_save_and_load(tmp_path):
+    """ Test a saved checkpoint is read back by a new run """
+    path = str(tmp_path / "work_items.csv.checkpoint")
+    checkpoint = Checkpoint(path)
+    for row_number in [1, 2, 5]:
+        checkpoint.mark_done(row_number)
+    checkpoint.save()
+
+    loaded = Checkpoint(path)
+    assert [loaded.is_done(row_number) for row_number in range(1, 7)] == [True, True, False, False, True, False]
+    assert loaded.run_id == checkpoint.run_id
+
+
+def test_checkpoint_not_valid(tmp_path):
+    """ Test a truncated checkpoint is reported instead of read """
+    path = tmp_path / "work_items.csv.checkpoint"
+    path.write_text('{"done_through": 3, "done_af', encoding="utf-8")
+
+    with pytest.raises(ValueError, match="not valid"):
+        Checkpoint(str(path))
+
+
+def test_import_skips_done_rows(tmp_path):
+    """ Test resumed import creates only the rows that are not done """
+    checkpoint = Checkpoint(str(tmp_path / "work_items.csv.checkpoint"))
+    for row_number in [1, 2, 4]:
+        checkpoint.mark_done(row_number)
+    client = StubClient()
+
+    counts, _ = run_importer(client, checkpoint, rows(6))
+
+    assert counts == {"created": 3, "failed": 0, "skipped": 3}
+    assert sorted(client.created) == ["Task 3", "Task 5", "Task 6"]
+    assert checkpoint.done_through == 6
+
+
+def test_import_retries_busy_azure(tmp_path):
+    """ Test a row answered with 503 and 429 is tried again and created """
+    checkpoint = Checkpoint(str(tmp_path / "work_items.csv.checkpoint"))
+    client = StubClient(failures=[503, 429])
+
+    counts, _ = run_importer(client, checkpoint, rows(1), concurrency=1)
+
+    assert counts == {"created": 1, "failed": 0, "skipped": 0}
+
+
+def test_import_failed_rows_not_done(tmp_path):
+    """ Test rows that still fail after the retries are tried again by the next run """
+    checkpoint = Checkpoint(str(tmp_path / "work_items.csv.checkpoint"))
+    client = StubClient(failures=[503] * (importer.IMPORT_RETRIES + 1))
+    source_rows = rows(2) + [(3, {"project": "salaht321"})]
+
+    output = io.StringIO()
+    work_item_importer = WorkItemImporter(client, checkpoint, 1, output=output, progress=io.StringIO())
+    counts = asyncio.run(work_item_importer.run(source_rows))
+
+    assert counts == {"created": 1, "failed": 2, "skipped": 0}
+    assert [json.loads(line)["row"] for line in output.getvalue().splitlines()] == [1, 3]
+    # the invalid row can never be imported, so it is done
+    assert [checkpoint.is_done(row_number) for row_number in [1, 2, 3]] == [False, True, True]
+
+    counts, _ = run_importer(StubClient(), Checkpoint(checkpoint.path), source_rows)
+    assert counts == {"created": 1, "failed": 0, "skipped": 2}
+
+
+def test_import_stops_when_checkpoint_fails(tmp_path, monkeypatch):
+    """ Test a checkpoint that can not be saved stops the import instead of hanging it """
+    def save(checkpoint):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(importer, "CHECKPOINT_EVERY", 1)
+    monkeypatch.setattr(Checkpoint, "save", save)
+    checkpoint = Checkpoint(str(tmp_path / "work_items.csv.checkpoint"))
+
+    async def run():
+        work_item_importer = WorkItemImporter(StubClient(), checkpoint, 2, output=io.StringIO(),
+                                              progress=io.StringIO())
+        return await asyncio.wait_for(work_item_importer.run(rows(200)), timeout=10)
+
+    with pytest.raises(OSError):
+        asyncio.run(run())
+
+
+@pytest.fixture
+def server():
+    server = FakeAzureServer(latency=0.01).start()
+    server.state.add_project("salaht321")
+    yield server
+    server.stop()
+
+
+def import_into(server, checkpoint, source_rows, stop_after: int = None):
+    """ Import against the fake server, a stop_after interrupts the run once that many work items exist
+    without the final checkpoint save, like a killed process. """
+    async def run():
+        client = AsyncAzureClient({"token": "fake-token", "organization": "fake-organization",
+                                   "base_url": server.base_url})
+        work_item_importer = WorkItemImporter(client, checkpoint, 4, output=io.StringIO(), progress=io.StringIO())
+        try:
+            task = asyncio.create_task(work_item_importer.run(source_rows))
+            if stop_after is None:
+                return await asyncio.wait_for(task, timeout=30)
+
+            while len(server.state.work_items) < stop_after and not task.done():
+                await asyncio.sleep(0.005)
+            checkpoint.save = lambda: None
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            # creations the server was still running when the client gave up on them
+            await asyncio.sleep(0.1)
+        finally:
+            await client.close()
+
+    return asyncio.run(run())
+
+
+def created_titles(server):
+    return sorted(work_item["fields"]["System.Title"] for work_item in server.state.work_items.values())
+
+
+def test_resume_after_interruption_creates_no_duplicates(server, tmp_path, monkeypatch):
+    """ Test an import killed between checkpoint saves is resumed without creating any row twice """
+    monkeypatch.setattr(importer, "CHECKPOINT_EVERY", 10)
+    path = str(tmp_path / "work_items.csv.checkpoint")
+    source_rows = rows(120)
+
+    import_into(server, Checkpoint(path), source_rows, stop_after=25)
+    created_before = len(server.state.work_items)
+    saved = Checkpoint(path)
+    done_saved = saved.done_through + len(saved.done_after)
+    # some created rows were not saved as done, the resumed run has to find them by key
+    assert created_before > done_saved
+
+    counts = import_into(server, Checkpoint(path), source_rows)
+
+    assert counts == {"created": 120 - created_before, "failed": 0, "skipped": created_before}
+    assert created_titles(server) == sorted(row["title"] for _, row in source_rows)
+
+
+def test_started_through_covers_rows_after_gaps(server, tmp_path, monkeypatch):
+    """ Test every row an interrupted run created is within started_through when done rows leave gaps """
+    monkeypatch.setattr(importer, "CHECKPOINT_EVERY", 5)
+    path = str(tmp_path / "work_items.csv.checkpoint")
+    checkpoint = Checkpoint(path)
+    # a resumed file where only every fourth row is left
+    for row_number in range(1, 401):
+        if row_number % 4:
+            checkpoint.mark_done(row_number)
+    source_rows = rows(400)
+
+    import_into(server, checkpoint, source_rows, stop_after=30)
+    created_rows = [int(title.split()[1]) for title in created_titles(server)]
+
+    assert max(created_rows) <= Checkpoint(path).started_through
+    counts = import_into(server, Checkpoint(path), source_rows)
+    assert counts["created"] + len(created_rows) == 100
+    assert created_titles(server) == sorted(f"Task {row_number}" for row_number in range(4, 401, 4))
+
+
+def test_retry_after_server_error_returns_existing_item(server, tmp_path):
+    """ Test a creation answered with 500 after Azure stored it is not created again by the retry """
+    server.state.lost_creations = 1
+
+    counts = import_into(server, Checkpoint(str(tmp_path / "work_items.csv.checkpoint")), rows(1))
+
+    assert counts == {"created": 1, "failed": 0, "skipped": 0}
+    assert created_titles(server) == ["Task 1"]
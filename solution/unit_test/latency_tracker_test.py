@@ -0,0 +1,35 @@
+from solution.models.latency_tracker import LatencyTracker
+
+
+def test_percentile_needs_minimum_samples():
+    """ Test no percentile is given before enough calls of the endpoint are seen """
+    tracker = LatencyTracker(minimum_samples=5)
+    for _ in range(4):
+        tracker.record("get_project", 0.1)
+
+    assert tracker.percentile("get_project", 95) is None
+    assert tracker.percentile("list_projects", 95) is None
+    tracker.record("get_project", 0.1)
+    assert tracker.percentile("get_project", 95) == 0.1
+
+
+def test_percentile():
+    """ Test the percentile is the latency under which that share of the calls answered """
+    tracker = LatencyTracker(minimum_samples=1)
+    for milliseconds in reversed(range(1, 101)):
+        tracker.record("get_project", milliseconds / 1000)
+
+    assert tracker.percentile("get_project", 50) == 0.051
+    assert tracker.percentile("get_project", 95) == 0.096
+    assert tracker.percentile("get_project", 99.9) == 0.1
+
+
+def test_window_keeps_recent_latencies():
+    """ Test only the last window latencies of an endpoint count """
+    tracker = LatencyTracker(window=10, minimum_samples=10)
+    for _ in range(10):
+        tracker.record("get_project", 5.0)
+    for _ in range(10):
+        tracker.record("get_project", 0.2)
+
+    assert tracker.percentile("get_project", 99) == 0.2
@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+import pytest
+
+from solution import main
+from solution.benchmarks.fake_azure_server import FakeAzureServer
+from solution.models.async_azure_client import AsyncAzureClient
+from solution.models.async_backed_sync_azure_client import AsyncBackedSyncAzureClient
+
+
+@pytest.fixture
+def server():
+    server = FakeAzureServer().start()
+    server.state.add_project("salaht321")
+    server.state.add_work_item("salaht321", "Task", "First task")
+    yield server
+    server.stop()
+
+
+def settings(server):
+    return {"token": "fake-token", "organization": "fake-organization", "base_url": server.base_url}
+
+
+def answer(monkeypatch, answers: list):
+    """ Let the menus read answers instead of the keyboard. """
+    answers = iter(answers)
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(answers))
+
+
+def test_exit_closes_async_engine(server, monkeypatch, capsys):
+    """ Test exiting the menu closes the client and stops the event loop thread of the async engine """
+    clients = []
+
+    def create_client():
+        clients.append(AsyncBackedSyncAzureClient(settings(server)))
+        return clients[0]
+
+    answer(monkeypatch, ["2", "4", "salaht321", "6", "5"])
+    main.pick_sync(create_client)
+
+    assert "salaht321" in capsys.readouterr().out
+    assert len(clients) == 1
+    assert not clients[0]._thread.is_alive()
+    assert clients[0].async_client.client.is_closed
+
+
+def test_exit_without_client(monkeypatch):
+    """ Test exiting before any operation builds no client """
+    def create_client():
+        raise AssertionError("client built")
+
+    answer(monkeypatch, ["5"])
+    main.pick_sync(create_client)
+
+
+def test_async_exit_closes_client(server, monkeypatch, capsys):
+    """ Test exiting the async menu closes the client it used """
+    clients = []
+
+    def create_client():
+        clients.append(AsyncAzureClient(settings(server)))
+        return clients[0]
+
+    monkeypatch.setattr(main, "create_async_client", create_client)
+    answer(monkeypatch, ["2", "5"])
+    asyncio.run(main.pick_async())
+
+    assert "salaht321" in capsys.readouterr().out
+    assert clients[0].client.is_closed
+
+
+def test_async_prefetch_runs_while_menu_waits(server, monkeypatch):
+    """ Test the work items of the chosen project are listed while the user reads the work item menu """
+    clients, listings = [], []
+    answers = iter(["4", "salaht321", "6", "5"])
+
+    def create_client():
+        clients.append(AsyncAzureClient(settings(server)))
+        return clients[0]
+
+    def read_menu(prompt=""):
+        choice = next(answers)
+        if choice == "6":
+            # the user takes a moment to pick a work item operation
+            time.sleep(0.5)
+            listings.append(clients[0].prefetched.listing("salaht321"))
+        return choice
+
+    monkeypatch.setattr(main, "create_async_client", create_client)
+    monkeypatch.setattr("builtins.input", read_menu)
+    asyncio.run(main.pick_async())
+
+    assert listings[0] is not None
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from solution.benchmarks.fake_azure_server import FakeAzureServer, PROJECTS_PAGE_SIZE
+from solution.models.async_azure_client import AsyncAzureClient
+from solution.models.sync_azure_client import SyncAzureClient
+
+# more projects than one page of a listing holds
+PROJECTS = PROJECTS_PAGE_SIZE + 30
+
+
+@pytest.fixture
+def server():
+    server = FakeAzureServer().start()
+    for number in range(PROJECTS):
+        server.state.add_project(f"test-{number}")
+        server.state.add_work_item(f"test-{number}", "Bug" if number % 2 else "Task", f"Item {number}")
+    yield server
+    server.stop()
+
+
+def settings(server):
+    return {"token": "fake-token", "organization": "fake-organization", "base_url": server.base_url}
+
+
+def check_stats(result):
+    assert result.response["total"] == PROJECTS
+    assert len(result.response["projects"]) == PROJECTS
+    assert result.response["by_type"] == {"Bug": PROJECTS // 2, "Task": PROJECTS // 2}
+    assert result.response["errors"] == {}
+
+
+def test_org_stats_counts_every_page(server):
+    """ Test the statistics count the projects past the first page of the listing """
+    client = SyncAzureClient(settings(server))
+    try:
+        result = client.org_stats()
+    finally:
+        client.close()
+
+    check_stats(result)
+
+
+def test_async_org_stats_counts_every_page(server):
+    """ Test the async statistics count the projects past the first page of the listing """
+    async def org_stats():
+        client = AsyncAzureClient(settings(server))
+        try:
+            return await client.org_stats()
+        finally:
+            await client.close()
+
+    check_stats(asyncio.run(org_stats()))
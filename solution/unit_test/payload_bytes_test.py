@@ -0,0 +1,47 @@
+import asyncio
+import gzip
+import json
+
+import httpx
+
+from solution.models.async_azure_client import AsyncAzureClient
+from solution.models.sync_azure_client import SyncAzureClient
+
+PROJECT = {"id": "1", "name": "salaht321", "url": "projects/salaht321", "description": "x" * 2000}
+COMPRESSED = gzip.compress(json.dumps(PROJECT).encode("utf-8"))
+SETTINGS = {"token": "fake-token", "organization": "fake-organization"}
+
+
+def gzip_handler(request: httpx.Request):
+    """ Answer like Azure DevOps does, with a gzip body that arrives as a stream. """
+    return httpx.Response(200, headers={"content-type": "application/json", "content-encoding": "gzip"},
+                          stream=httpx.ByteStream(COMPRESSED), request=request)
+
+
+def test_payload_bytes_counts_compressed_answer(monkeypatch):
+    """ Test downloaded bytes are the gzip bytes on the wire, not the decoded content """
+    monkeypatch.setattr(SyncAzureClient, "_transport", lambda client: httpx.MockTransport(gzip_handler))
+    client = SyncAzureClient(SETTINGS)
+    try:
+        result = client.get_project("salaht321")
+    finally:
+        client.close()
+
+    assert result.response["name"] == "salaht321"
+    assert client.get_metrics()["payload_bytes.get_project"] == len(COMPRESSED)
+    assert client.get_metrics()["payload_bytes"] < len(json.dumps(PROJECT))
+
+
+def test_async_payload_bytes_counts_compressed_answer(monkeypatch):
+    """ Test the async client counts the gzip bytes on the wire as well """
+    monkeypatch.setattr(AsyncAzureClient, "_transport", lambda client: httpx.MockTransport(gzip_handler))
+
+    async def get_project():
+        client = AsyncAzureClient(SETTINGS)
+        try:
+            await client.get_project("salaht321")
+        finally:
+            await client.close()
+        return client.get_metrics()
+
+    assert asyncio.run(get_project())["payload_bytes.get_project"] == len(COMPRESSED)
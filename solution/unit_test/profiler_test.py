@@ -0,0 +1,84 @@
+import cProfile
+import os
+import pstats
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from solution.models import profiler
+from solution.models.profiler import OperationProfiler
+
+
+def profiled_files(directory):
+    return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+
+def test_profile_operation(tmp_path):
+    """ Test a profiled operation writes its .prof and .txt files """
+    operation_profiler = OperationProfiler(str(tmp_path))
+    with operation_profiler.profile("list_projects"):
+        sum(range(1000))
+
+    files = profiled_files(str(tmp_path))
+    assert [os.path.splitext(file_name)[1] for file_name in files] == [".prof", ".txt"]
+
+
+def test_profile_two_threads(tmp_path):
+    """ Test two operations profiled at the same time in two threads both run, only one is profiled """
+    operation_profiler = OperationProfiler(str(tmp_path))
+    both_started = threading.Barrier(2)
+
+    def operation():
+        with operation_profiler.profile("get_project"):
+            both_started.wait(timeout=5)
+            return True
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = [future.result() for future in [executor.submit(operation), executor.submit(operation)]]
+
+    assert results == [True, True]
+    assert len(profiled_files(str(tmp_path))) == 2
+
+
+def test_profile_after_failed_enable(tmp_path, monkeypatch):
+    """ Test a thread whose profiler could not be enabled is profiled again later """
+    class BusyProfile(cProfile.Profile):
+        def enable(self, *args, **kwargs):
+            raise ValueError("Another profiling tool is already active")
+
+    operation_profiler = OperationProfiler(str(tmp_path))
+    monkeypatch.setattr(profiler.cProfile, "Profile", BusyProfile)
+    with operation_profiler.profile("get_project"):
+        pass
+    monkeypatch.undo()
+    with operation_profiler.profile("get_project"):
+        pass
+
+    assert len(profiled_files(str(tmp_path))) == 2
+
+
+def test_lock_wait_is_not_network_wait():
+    """ Test waiting for a lock held by another thread counts as lock wait only """
+    lock = threading.Lock()
+    lock.acquire()
+    profile = cProfile.Profile()
+    profile.enable()
+    lock.acquire(timeout=0.1)
+    profile.disable()
+
+    breakdown = profiler.time_breakdown(pstats.Stats(profile))
+
+    assert breakdown["lock wait"] >= 0.09
+    assert breakdown["network wait"] < 0.01
+
+
+def test_report_states_its_scope(tmp_path):
+    """ Test the report says it covers the calling thread only """
+    operation_profiler = OperationProfiler(str(tmp_path))
+    with operation_profiler.profile("list_work_items"):
+        sum(range(1000))
+
+    report_name = next(name for name in profiled_files(str(tmp_path)) if name.endswith(".txt"))
+    with open(os.path.join(str(tmp_path), report_name), encoding="utf-8") as report_file:
+        report = report_file.read()
+    assert f"scope: {profiler.SCOPE_NOTE}" in report
+    assert "lock wait:" in report
@@ -0,0 +1,165 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from solution.models.scheduler import INTERACTIVE, NORMAL, BULK, PriorityQueues, RequestScheduler, \
+    AsyncRequestScheduler, PriorityExecutor, priority_scope, current_priority
+
+
+def test_interactive_goes_ahead_of_queued_bulk():
+    """ Test the first waiting interactive request starts before bulk requests queued earlier """
+    queues = PriorityQueues(1, {})
+    queues.enqueue(BULK)
+    queues.start(*queues.next_start()[:1], 0.0)
+    bulk_ticket = queues.enqueue(BULK)
+    interactive_ticket = queues.enqueue(INTERACTIVE)
+
+    assert queues.next_start() is None
+    queues.finish(BULK)
+    assert queues.next_start() == (INTERACTIVE, interactive_ticket)
+    assert not queues.can_start(BULK, bulk_ticket)
+
+
+def test_bulk_cap_holds():
+    """ Test bulk requests never run more than their cap while normal ones may use the rest """
+    queues = PriorityQueues(4, {BULK: 2})
+    for _ in range(4):
+        queues.enqueue(BULK)
+    while (next_start := queues.next_start()) is not None:
+        queues.start(next_start[0], 0.0)
+
+    normal_ticket = queues.enqueue(NORMAL)
+    assert queues.stats()[BULK]["running"] == 2
+    assert queues.stats()[BULK]["queued"] == 2
+    assert queues.next_start() == (NORMAL, normal_ticket)
+
+
+def test_same_class_is_first_in_first_out():
+    """ Test requests of one class start in the order they were queued """
+    queues = PriorityQueues(1, {})
+    first, second = queues.enqueue(NORMAL), queues.enqueue(NORMAL)
+
+    assert not queues.can_start(NORMAL, second)
+    assert queues.next_start() == (NORMAL, first)
+
+
+def test_scheduler_timeout_hands_slot_to_next():
+    """ Test a request that timed out waiting lets the one queued behind it start """
+    scheduler = RequestScheduler(1, {})
+    assert scheduler.acquire(NORMAL)
+    assert not scheduler.acquire(NORMAL, timeout=0.05)
+
+    started = threading.Event()
+    waiter = threading.Thread(target=lambda: scheduler.acquire(NORMAL, timeout=5) and started.set())
+    waiter.start()
+    scheduler.release(NORMAL)
+    waiter.join(timeout=5)
+
+    assert started.is_set()
+    assert scheduler.stats()[NORMAL]["queued"] == 0
+
+
+def test_scheduler_interactive_before_bulk():
+    """ Test the released slot goes to the interactive thread although bulk threads waited longer """
+    scheduler = RequestScheduler(1, {})
+    assert scheduler.acquire(NORMAL)
+    order = []
+
+    def request(priority):
+        if scheduler.acquire(priority, timeout=5):
+            order.append(priority)
+            scheduler.release(priority)
+
+    threads = [threading.Thread(target=request, args=(BULK,)) for _ in range(3)]
+    threads.append(threading.Thread(target=request, args=(INTERACTIVE,)))
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    scheduler.release(NORMAL)
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert order == [INTERACTIVE, BULK, BULK, BULK]
+
+
+def test_async_scheduler_cancel_hands_slot_to_next():
+    """ Test a cancelled waiting coroutine lets the one queued behind it start """
+    async def run():
+        scheduler = AsyncRequestScheduler(1, {})
+        assert await scheduler.acquire(NORMAL)
+        cancelled = asyncio.create_task(scheduler.acquire(NORMAL))
+        behind = asyncio.create_task(scheduler.acquire(NORMAL, timeout=5))
+        await asyncio.sleep(0.01)
+
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        scheduler.release(NORMAL)
+        return await behind, scheduler.stats()[NORMAL]
+
+    started, stats = asyncio.run(run())
+    assert started
+    assert (stats["queued"], stats["running"]) == (0, 1)
+
+
+def test_async_scheduler_timeout():
+    """ Test a coroutine that waited longer than its timeout gets no slot """
+    async def run():
+        scheduler = AsyncRequestScheduler(1, {})
+        await scheduler.acquire(BULK)
+        return await scheduler.acquire(BULK, timeout=0.05), scheduler.stats()[BULK]["queued"]
+
+    assert asyncio.run(run()) == (False, 0)
+
+
+def test_priority_scope():
+    """ Test the priority class holds inside the scope only """
+    with priority_scope(BULK):
+        assert current_priority() == BULK
+    assert current_priority() == NORMAL
+    with pytest.raises(ValueError):
+        with priority_scope("urgent"):
+            pass
+
+
+def test_executor_runs_interactive_beside_bulk():
+    """ Test bulk functions holding their cap of threads leave threads to an interactive fan-out """
+    executor = PriorityExecutor(4, {BULK: 2})
+    release_bulk = threading.Event()
+    try:
+        with priority_scope(BULK):
+            bulk_futures = [executor.submit(release_bulk.wait, 5) for _ in range(10)]
+        with priority_scope(INTERACTIVE):
+            interactive_futures = [executor.submit(sum, [number, 1]) for number in range(4)]
+
+        assert [future.result(timeout=2) for future in interactive_futures] == [1, 2, 3, 4]
+        assert sum(future.running() for future in bulk_futures) == 2
+    finally:
+        release_bulk.set()
+        executor.shutdown(wait=True)
+
+    assert all(future.result() for future in bulk_futures)
+
+
+def test_executor_shutdown_cancels_waiting():
+    """ Test shutdown with cancel_futures drops the functions that did not start """
+    executor = PriorityExecutor(1, {})
+    started, release = threading.Event(), threading.Event()
+
+    def work():
+        started.set()
+        return release.wait(5)
+
+    running = executor.submit(work)
+    waiting = executor.submit(sum, [1, 2])
+    started.wait(timeout=5)
+
+    executor.shutdown(wait=False, cancel_futures=True)
+    release.set()
+
+    assert running.result(timeout=5) is True
+    assert waiting.cancelled()
+    with pytest.raises(RuntimeError):
+        executor.submit(sum, [1, 2])
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from solution.models.deadline import deadline_scope
+from solution.models.metrics import Metrics
+from solution.models.single_flight import SingleFlight, AsyncSingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    """ Test concurrent calls with the same key run the function once """
+    single_flight = SingleFlight(Metrics())
+    calls = []
+    both_called = threading.Barrier(2)
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return "salaht321"
+
+    def call():
+        both_called.wait(timeout=5)
+        return single_flight.do(("get_project", "salaht321"), fetch)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = [future.result() for future in [executor.submit(call), executor.submit(call)]]
+
+    assert results == ["salaht321", "salaht321"]
+    assert len(calls) == 1
+
+
+def test_deadline_of_one_call_does_not_fail_another():
+    """ Test a call under a deadline is not shared with a call that has no budget """
+    single_flight = SingleFlight(Metrics())
+    leader_started = threading.Event()
+
+    def fetch(budget_seconds):
+        leader_started.set()
+        time.sleep(0.2)
+        if budget_seconds is not None and budget_seconds < 0.2:
+            raise TimeoutError("deadline exceeded")
+        return "salaht321"
+
+    def call_with_budget():
+        with deadline_scope(0.05):
+            return single_flight.do(("get_project", "salaht321"), fetch, 0.05)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        leader = executor.submit(call_with_budget)
+        leader_started.wait(timeout=5)
+        follower_result = single_flight.do(("get_project", "salaht321"), fetch, None)
+
+        with pytest.raises(TimeoutError):
+            leader.result()
+
+    assert follower_result == "salaht321"
+
+
+def test_async_deadline_of_one_call_does_not_fail_another():
+    """ Test a coroutine under a deadline is not shared with one that has no budget """
+    single_flight = AsyncSingleFlight(Metrics())
+
+    async def fetch(budget_seconds):
+        await asyncio.sleep(0.1)
+        if budget_seconds is not None:
+            raise TimeoutError("deadline exceeded")
+        return "salaht321"
+
+    async def call_with_budget():
+        with deadline_scope(0.05):
+            return await single_flight.do(("get_project", "salaht321"), fetch, 0.05)
+
+    async def run():
+        return await asyncio.gather(call_with_budget(), single_flight.do(("get_project", "salaht321"), fetch, None),
+                                    return_exceptions=True)
+
+    leader_result, follower_result = asyncio.run(run())
+
+    assert isinstance(leader_result, TimeoutError)
+    assert follower_result == "salaht321"
@@ -1,8 +1,13 @@
+import io
+
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 import random
 import string
 
+from solution.exporter import WorkItemExporter
 from solution.models.abstract_azure_client import AzureClient
+from solution.models.wiql import WorkItemQuery
 from solution.models.sync_azure_client import SyncAzureClient
 from solution.telegram_bot import TelegramBot
 
@@ -182,3 +187,224 @@ def test_update_not_exist_work_item(client):
 
     assert response.status_code == AzureClient.NOT_FOUND_STATUS_CODE
     assert response.message == "Work item 'not exist work item' not found."
+
+
+def test_concurrent_get_project_is_coalesced(client):
+    """ Test identical get project calls in flight together share one request """
+    hits_before = client.get_metrics().get("single_flight_hits", 0)
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        responses = list(executor.map(lambda _: client.get_project("salaht321"), range(5)))
+
+    assert all(response.response["name"] == "salaht321" for response in responses)
+    assert client.get_metrics().get("single_flight_hits", 0) > hits_before
+
+
+def test_get_work_items_by_titles(client):
+    """ Test bulk title lookup returns every match grouped by title """
+    response = client.get_work_items_by_titles("salaht321", ["exist work item", "not exist work item"])
+
+    assert response.status_code == AzureClient.OK_STATUS_CODE
+    assert response.message == "Work items found."
+    assert len(response.response["exist work item"]) > EMPTY_LEN
+    assert response.response["not exist work item"] == []
+
+
+def test_list_work_items_with_fields(client):
+    """ Test list work items with extra projected fields """
+    response = client.list_work_items("salaht321", fields=["System.State"])
+
+    assert response.status_code == AzureClient.OK_STATUS_CODE
+    assert all("state" in work_item for work_item in response.response.values())
+    assert client.get_metrics()["payload_bytes.get_work_items_batch"] > EMPTY_LEN
+
+
+def test_prefetched_work_items(client):
+    """ Test work items listing is served from the prefetch once it finished """
+    client.prefetch_work_items("salaht321").result()
+    hits_before = client.get_metrics().get("prefetch_hits", 0)
+
+    response = client.list_work_items("salaht321")
+    client.stop_prefetch("salaht321")
+
+    assert response.status_code == AzureClient.OK_STATUS_CODE
+    assert len(response.response) > EMPTY_LEN
+    assert client.get_metrics()["prefetch_hits"] == hits_before + 1
+
+
+def test_iter_work_items(client):
+    """ Test work items stream yields every work item of the query """
+    stream = client.iter_work_items("salaht321")
+    work_items = list(stream)
+
+    assert stream.error is None
+    assert len(work_items) == stream.total == stream.fetched
+    assert len(work_items) > EMPTY_LEN
+
+
+def test_iter_work_items_not_exist_project(client):
+    """ Test work items stream of not existed project """
+    response = client.iter_work_items("not exist project")
+
+    assert response.status_code == AzureClient.NOT_FOUND_STATUS_CODE
+    assert response.message == "Project 'not exist project' not found."
+
+
+def test_circuit_breaker_states(client):
+    """ Test circuit of a healthy endpoint stays closed """
+    client.get_project("salaht321")
+
+    assert client.circuit_breaker_states()["get_project"]["state"] == "closed"
+
+
+def test_get_work_item_timeout(client):
+    """ Test operation that can not finish within its budget """
+    response = client.get_work_item("salaht321", "test", timeout=0.001)
+
+    assert response.status_code == AzureClient.REQUEST_TIMEOUT_STATUS_CODE
+
+
+def test_list_projects_disk_cache(client, tmp_path):
+    """ Test projects listed again by another client are read from the disk cache """
+    settings = {"token": client.settings.token, "organization": client.settings.organization,
+                "cache_dir": str(tmp_path)}
+    first_client = SyncAzureClient(settings)
+    second_client = SyncAzureClient(settings)
+
+    first_response = first_client.list_projects()
+    second_response = second_client.list_projects()
+
+    assert second_response == first_response
+    assert second_client.get_metrics()["disk_cache_hits"] == 1
+    assert "requests" not in second_client.get_metrics()
+
+    first_client.close()
+    second_client.close()
+
+
+def test_export_project(client):
+    """ Test every work item of project is exported as one NDJSON line """
+    output = io.StringIO()
+    response = WorkItemExporter(client, output, "ndjson").export_project("salaht321")
+
+    assert response.status_code == AzureClient.OK_STATUS_CODE
+    assert len(output.getvalue().splitlines()) == response.response["rows"]
+    assert response.response["rows"] > EMPTY_LEN
+
+
+def test_clone_project_work_items_not_exist_target(client):
+    """ Test clone into not existed project """
+    response = client.clone_project_work_items("salaht321", "not exist project")
+
+    assert response.status_code == AzureClient.NOT_FOUND_STATUS_CODE
+    assert response.message == "Project 'not exist project' not found."
+
+
+def test_profile_dir(client, tmp_path):
+    """ Test every operation of a profiled client writes its profile """
+    profiled_client = SyncAzureClient({"token": client.settings.token, "organization": client.settings.organization,
+                                       "profile_dir": str(tmp_path)})
+
+    profiled_client.get_project("salaht321")
+    profiled_client.close()
+
+    assert len(list(tmp_path.glob("get_project-*.prof"))) == 1
+    assert "network wait" in next(tmp_path.glob("get_project-*.txt")).read_text()
+
+
+def test_org_stats(client):
+    """ Test organization counts are the sum of the project counts and are cached """
+    response = client.org_stats(refresh=True)
+
+    assert response.status_code == AzureClient.OK_STATUS_CODE
+    assert response.response["total"] == sum(stats["total"] for stats in response.response["projects"].values())
+    assert client.org_stats() is response
+
+
+def test_list_work_items_with_query(client):
+    """ Test only work items matching the query are listed """
+    response = client.list_work_items("salaht321", query=WorkItemQuery().types("Task"))
+
+    assert response.status_code == AzureClient.OK_STATUS_CODE
+    assert all(work_item["type"] == "Task" for work_item in response.response.values())
+
+
+def test_replay_cassette(client, tmp_path):
+    """ Test a replayed client answers like the recorded one without reaching Azure """
+    cassette = str(tmp_path / "cassette.jsonl")
+    recording_client = SyncAzureClient({"token": client.settings.token, "organization": client.settings.organization,
+                                        "record_cassette": cassette})
+    recorded_response = recording_client.get_project("salaht321")
+    recording_client.close()
+
+    replaying_client = SyncAzureClient({"token": "no token", "organization": client.settings.organization,
+                                        "replay_cassette": cassette, "replay_timing": "none"})
+    replayed_response = replaying_client.get_project("salaht321")
+    replaying_client.close()
+
+    assert replayed_response == recorded_response
+    assert client.settings.token not in (tmp_path / "cassette.jsonl").read_text()
+
+
+def test_interactive_priority(client):
+    """ Test an interactive call is counted in its own priority class """
+    started = client.scheduler_stats()["interactive"]["started"]
+    response = client.get_project("salaht321", priority="interactive")
+
+    assert response.status_code == AzureClient.OK_STATUS_CODE
+    assert client.scheduler_stats()["interactive"]["started"] == started + 1
+    assert client.scheduler_stats()["interactive"]["queued"] == EMPTY_LEN
+
+
+def test_not_exist_priority(client):
+    """ Test call with unknown priority class """
+    with pytest.raises(ValueError):
+        client.get_project("salaht321", priority="urgent")
+
+
+def test_work_item_detail_cache(client):
+    """ Test work items listed again are served from the detail cache """
+    first_response = client.list_work_items("salaht321")
+    hits = client.detail_cache_stats()["hits"]
+    second_response = client.list_work_items("salaht321")
+
+    assert second_response == first_response
+    assert client.detail_cache_stats()["hits"] == hits + len(first_response.response)
+
+
+def test_delete_projects_not_exist(client):
+    """ Test delete many projects that are not exist """
+    response = client.delete_projects(["not exist project", "other not exist project"])
+
+    assert response.response["deleted"] == EMPTY_LEN
+    assert response.response["projects"]["not exist project"]["status_code"] == AzureClient.NOT_FOUND_STATUS_CODE
+
+
+def test_delete_projects_invalid_selection(client):
+    """ Test delete many projects with one name instead of a list """
+    with pytest.raises(TypeError):
+        client.delete_projects("salaht321")
+
+
+def test_create_work_item_idempotency_key(client, random_name):
+    """ Test retry of a creation in doubt returns the work item created with the same key """
+    response = client.create_work_item("salaht321", "Task", random_name, idempotency_key=random_name)
+    client.mark_in_doubt([random_name])
+    retried_response = client.create_work_item("salaht321", "Task", random_name, idempotency_key=random_name)
+
+    assert retried_response.status_code == AzureClient.OK_STATUS_CODE
+    assert retried_response.response["id"] == response.response["id"]
+
+
+def test_find_idempotency_keys_not_exist(client, random_name):
+    """ Test find idempotency keys that no work item was created with """
+    response = client.find_idempotency_keys("salaht321", [random_name])
+
+    assert response.status_code == AzureClient.OK_STATUS_CODE
+    assert response.response == {}
+
+
+def test_invalid_idempotency_key(client, random_name):
+    """ Test create work item with idempotency key that can not be a tag """
+    with pytest.raises(TypeError):
+        client.create_work_item("salaht321", "Task", random_name, idempotency_key="first;second")
@@ -0,0 +1,100 @@
+import datetime
+
+import pytest
+
+from solution.models.abstract_azure_client import AzureClient
+from solution.models.wiql import WorkItemQuery, ME, escape_wiql_literal
+
+PROJECT_CONDITION = "Select [System.Id] From WorkItems where [System.TeamProject] = 'salaht321'"
+
+
+def test_escape_wiql_literal():
+    """ Test a literal is quoted and a quote inside it doubled """
+    assert escape_wiql_literal("it's") == "'it''s'"
+    assert escape_wiql_literal("") == "''"
+
+
+def test_query_without_filters():
+    """ Test a query without filters selects every work item of the project """
+    assert WorkItemQuery().to_wiql("salaht321") == PROJECT_CONDITION
+
+
+def test_project_name_escaped():
+    """ Test a quote in the project name can not end the literal """
+    assert WorkItemQuery().to_wiql("o'brien") == \
+        "Select [System.Id] From WorkItems where [System.TeamProject] = 'o''brien'"
+
+
+def test_in_lists():
+    """ Test types and states become IN lists with escaped values """
+    wiql = WorkItemQuery().types("Bug", "User Story").states("Won't Fix").to_wiql("salaht321")
+
+    assert wiql == PROJECT_CONDITION + " and [System.WorkItemType] IN ('Bug', 'User Story')" \
+                                       " and [System.State] IN ('Won''t Fix')"
+
+
+def test_in_list_needs_values():
+    """ Test an empty or not string filter is refused """
+    with pytest.raises(TypeError):
+        WorkItemQuery().types()
+    with pytest.raises(TypeError):
+        WorkItemQuery().states("New", 1)
+
+
+def test_assigned_to():
+    """ Test @Me stays a macro and a name is escaped """
+    assert WorkItemQuery().assigned_to(ME).to_wiql("salaht321") == PROJECT_CONDITION + " and [System.AssignedTo] = @Me"
+    assert WorkItemQuery().assigned_to("D'Arcy").to_wiql("salaht321") == \
+        PROJECT_CONDITION + " and [System.AssignedTo] = 'D''Arcy'"
+
+
+def test_changed_dates():
+    """ Test dates are compared by day and relative days use @Today """
+    since = WorkItemQuery().changed_since(datetime.datetime(2024, 3, 5, 17, 30)).to_wiql("salaht321")
+    within = WorkItemQuery().changed_within_days(7).to_wiql("salaht321")
+
+    assert since == PROJECT_CONDITION + " and [System.ChangedDate] >= '2024-03-05'"
+    assert within == PROJECT_CONDITION + " and [System.ChangedDate] >= @Today - 7"
+    with pytest.raises(TypeError):
+        WorkItemQuery().changed_within_days(True)
+
+
+def test_title_starts_with():
+    """ Test a title prefix is sent as CONTAINS and matched exactly, whatever its last character """
+    for prefix in ["Task", "z", "Z", "Release 9"]:
+        query = WorkItemQuery().title_starts_with(prefix)
+        assert query.to_wiql("salaht321") == PROJECT_CONDITION + f" and [System.Title] CONTAINS '{prefix}'"
+
+    query = WorkItemQuery().title_starts_with("release 9")
+    assert query.matches({"fields": {"System.Title": "Release 9.1"}})
+    assert not query.matches({"fields": {"System.Title": "Old Release 9"}})
+    assert not query.matches({"fields": {"System.Title": "Release 10"}})
+
+
+def test_filters_without_prefix_match_everything():
+    """ Test a query without title prefix keeps every work item Azure returned """
+    assert WorkItemQuery().types("Bug").matches({"fields": {"System.Title": "anything"}})
+
+
+def test_titles_queries_stay_under_length_limit():
+    """ Test long titles with quotes are split so every titles query fits Azure's WIQL length limit """
+    titles = [f"Release {number} can't ship: " + "'" * 60 + "x" * 180 for number in range(500)]
+
+    titles_chunks = AzureClient.titles_chunks("salaht321", titles)
+    queries = [AzureClient.work_items_by_titles_body("salaht321", titles_chunk)["query"]
+               for titles_chunk in titles_chunks]
+
+    assert [title for titles_chunk in titles_chunks for title in titles_chunk] == titles
+    assert all(len(query) <= AzureClient.WIQL_MAX_LENGTH for query in queries)
+    assert len(titles_chunks[0]) < AzureClient.TITLES_PER_QUERY
+    # a full query leaves no room for one more title
+    assert len(queries[0]) + len(escape_wiql_literal(titles_chunks[1][0])) + 2 > AzureClient.WIQL_MAX_LENGTH
+
+
+def test_short_titles_split_by_count():
+    """ Test short titles are split every TITLES_PER_QUERY titles """
+    titles = [f"Task {number}" for number in range(AzureClient.TITLES_PER_QUERY * 2 + 1)]
+
+    assert [len(titles_chunk) for titles_chunk in AzureClient.titles_chunks("salaht321", titles)] == \
+        [AzureClient.TITLES_PER_QUERY, AzureClient.TITLES_PER_QUERY, 1]
+    assert AzureClient.titles_chunks("salaht321", []) == []
@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+import pytest
+
+from solution.benchmarks.fake_azure_server import FakeAzureServer
+from solution.models.async_azure_client import AsyncAzureClient
+from solution.models.data_classes.data_classes import DeadlineExceededError
+from solution.models.scheduler import BULK, NORMAL, current_priority
+from solution.models.sync_azure_client import SyncAzureClient
+
+# three batches of work item details
+WORK_ITEMS = 2 * AsyncAzureClient.WORK_ITEMS_PER_BATCH + 50
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = FakeAzureServer().start()
+    server.state.add_project("salaht321")
+    for number in range(WORK_ITEMS):
+        server.state.add_work_item("salaht321", "Task", f"Task {number}")
+    yield server
+    server.stop()
+
+
+def settings(server):
+    return {"token": "fake-token", "organization": "fake-organization", "base_url": server.base_url,
+            "max_workers": 2}
+
+
+def test_stream_read_after_deadline_is_cut_off(server):
+    """ Test batches of a stream read after the operation's deadline are not fetched """
+    client = SyncAzureClient(settings(server))
+    try:
+        stream = client.iter_work_items("salaht321", timeout=0.3)
+        time.sleep(0.4)
+        work_items = list(stream)
+    finally:
+        client.close()
+
+    assert work_items == []
+    assert isinstance(stream.error, DeadlineExceededError)
+
+
+def test_stream_within_deadline(server):
+    """ Test a stream read within the deadline yields every work item """
+    client = SyncAzureClient(settings(server))
+    try:
+        stream = client.iter_work_items("salaht321", timeout=10)
+        work_items = list(stream)
+    finally:
+        client.close()
+
+    assert (len(work_items), stream.error) == (WORK_ITEMS, None)
+
+
+def test_stream_batches_keep_priority(server, monkeypatch):
+    """ Test batches of a stream created at bulk priority are sent at bulk priority wherever it is read """
+    priorities = []
+    send = SyncAzureClient._send
+
+    def record_priority(client, endpoint, *args, **kwargs):
+        priorities.append((endpoint, current_priority()))
+        return send(client, endpoint, *args, **kwargs)
+
+    monkeypatch.setattr(SyncAzureClient, "_send", record_priority)
+    client = SyncAzureClient(settings(server))
+    try:
+        stream = client.iter_work_items("salaht321", priority=BULK)
+        assert current_priority() == NORMAL
+        list(stream)
+    finally:
+        client.close()
+
+    assert {priority for _, priority in priorities} == {BULK}
+    assert len(priorities) == 4
+
+
+def test_async_stream_read_after_deadline_is_cut_off(server):
+    """ Test batches of an async stream read after the operation's deadline are not fetched """
+    async def read():
+        client = AsyncAzureClient(settings(server))
+        try:
+            stream = await client.iter_work_items("salaht321", timeout=0.3)
+            await asyncio.sleep(0.4)
+            return [work_item async for work_item in stream], stream.error
+        finally:
+            await client.close()
+
+    work_items, error = asyncio.run(read())
+
+    assert work_items == []
+    assert isinstance(error, DeadlineExceededError)